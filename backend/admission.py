@@ -0,0 +1,235 @@
+"""
+Admission control for password-hashing endpoints.
+
+Login and registration spend most of their time in the password KDF, the
+most CPU-expensive operation in the service. AdmissionController lets at
+most AUTH_MAX_CONCURRENT of them hash at once and queues up to
+AUTH_MAX_QUEUE more; beyond that, requests are rejected with 429 right
+away instead of piling up behind the hashing pool. In-memory token
+buckets per client IP and per username reject bursts before they queue.
+
+Limits are per worker process.
+"""
+
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Dict, Hashable, List, Optional, Union
+import asyncio
+import ipaddress
+import math
+import os
+import threading
+import time
+
+from fastapi import HTTPException, Request, status
+
+from .passwords import HASH_WORKERS
+
+# Password checks running at once (default: one per hashing thread)
+AUTH_MAX_CONCURRENT = int(os.getenv("AUTH_MAX_CONCURRENT", str(HASH_WORKERS)))
+
+# Requests allowed to wait for a slot; more are rejected with 429
+AUTH_MAX_QUEUE = int(os.getenv("AUTH_MAX_QUEUE", "50"))
+
+# Token buckets: sustained attempts per minute and burst size
+AUTH_IP_RATE_PER_MINUTE = float(os.getenv("AUTH_IP_RATE_PER_MINUTE", "30"))
+AUTH_IP_BURST = int(os.getenv("AUTH_IP_BURST", "10"))
+AUTH_USERNAME_RATE_PER_MINUTE = float(os.getenv("AUTH_USERNAME_RATE_PER_MINUTE", "10"))
+AUTH_USERNAME_BURST = int(os.getenv("AUTH_USERNAME_BURST", "5"))
+
+# Reverse proxies whose X-Forwarded-For is trusted: comma-separated IPs or
+# networks (e.g. "127.0.0.1,10.0.0.0/8"). Empty: the peer address is the client.
+AUTH_TRUSTED_PROXIES = os.getenv("AUTH_TRUSTED_PROXIES", "")
+
+# Buckets kept per limiter (least recently used are dropped)
+AUTH_BUCKET_MAX_ENTRIES = int(os.getenv("AUTH_BUCKET_MAX_ENTRIES", "10000"))
+
+# Queue wait samples kept for percentiles
+WAIT_SAMPLES = 1024
+
+Network = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+
+
+def parse_networks(value: str) -> List[Network]:
+    """Networks from a comma-separated list of IPs and CIDRs."""
+    return [ipaddress.ip_network(part.strip(), strict=False) for part in value.split(",") if part.strip()]
+
+
+def _is_trusted(address: str, trusted: List[Network]) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in trusted)
+
+
+def resolve_client_ip(request: Request, trusted: List[Network]) -> str:
+    """
+    Client address of a request.
+
+    When the peer is a trusted proxy, X-Forwarded-For is read from the
+    right and the first address that is not a trusted proxy is the
+    client; entries further left are client-supplied and ignored.
+    """
+    client_ip = request.client.host if request.client else "unknown"
+    if not trusted or not _is_trusted(client_ip, trusted):
+        return client_ip
+
+    forwarded = [
+        address.strip()
+        for header in request.headers.getlist("x-forwarded-for")
+        for address in header.split(",")
+        if address.strip()
+    ]
+    for address in reversed(forwarded):
+        client_ip = address
+        if not _is_trusted(address, trusted):
+            break
+    return client_ip
+
+
+class TokenBucketLimiter:
+    """Per-key token buckets: `burst` tokens, refilled at `rate_per_minute`."""
+
+    def __init__(self, rate_per_minute: float, burst: int, max_entries: int = AUTH_BUCKET_MAX_ENTRIES):
+        self.rate = rate_per_minute / 60.0
+        self.burst = burst
+        self.max_entries = max_entries
+        # key -> (tokens, last refill time)
+        self._buckets: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: Hashable) -> float:
+        """Take a token for `key`. Returns 0 on success, else seconds until one is available."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.get(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            if tokens >= 1:
+                tokens -= 1
+                retry_after = 0.0
+            else:
+                retry_after = (1 - tokens) / self.rate if self.rate > 0 else math.inf
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_entries:
+                self._buckets.popitem(last=False)
+        return retry_after
+
+
+class AdmissionController:
+    """Concurrency limit, bounded queue and rate limits around an expensive operation."""
+
+    def __init__(self, max_concurrent: int = AUTH_MAX_CONCURRENT, max_queue: int = AUTH_MAX_QUEUE,
+                 trusted_proxies: str = AUTH_TRUSTED_PROXIES):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.trusted_proxies = parse_networks(trusted_proxies)
+        self.by_ip = TokenBucketLimiter(AUTH_IP_RATE_PER_MINUTE, AUTH_IP_BURST)
+        self.by_username = TokenBucketLimiter(AUTH_USERNAME_RATE_PER_MINUTE, AUTH_USERNAME_BURST)
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.in_flight = 0
+        self.queued = 0
+
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_rate_limited = 0
+        self._wait_count = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._wait_samples: deque = deque(maxlen=WAIT_SAMPLES)
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # Semaphores belong to one event loop; tests may run several in turn
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        return self._semaphore
+
+    def _reject(self, detail: str, retry_after: float):
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=detail,
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+        )
+
+    def _check_rate(self, request: Request, username: Optional[str]):
+        retry_after = self.by_ip.take(resolve_client_ip(request, self.trusted_proxies))
+        if not retry_after and username:
+            retry_after = self.by_username.take(username.lower())
+        if retry_after:
+            self.rejected_rate_limited += 1
+            self._reject("Too many attempts, try again later", retry_after)
+
+    def _record_wait(self, seconds: float):
+        self._wait_count += 1
+        self._wait_total += seconds
+        self._wait_max = max(self._wait_max, seconds)
+        self._wait_samples.append(seconds)
+
+    @asynccontextmanager
+    async def admit(self, request: Request, username: Optional[str] = None):
+        """
+        Run the body once a slot is free.
+
+        Raises 429 (with Retry-After) when the client or username is over
+        its rate, or when the queue is full.
+        """
+        self._check_rate(request, username)
+
+        semaphore = self._get_semaphore()
+        if semaphore.locked() and self.queued >= self.max_queue:
+            self.rejected_queue_full += 1
+            self._reject("Server is busy, try again later", 1)
+
+        self.queued += 1
+        started = time.perf_counter()
+        try:
+            await semaphore.acquire()
+        finally:
+            self.queued -= 1
+        self._record_wait(time.perf_counter() - started)
+
+        self.admitted += 1
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            semaphore.release()
+
+    def metrics(self) -> Dict[str, object]:
+        """Counters and queue wait times (seconds)."""
+        samples = sorted(self._wait_samples)
+
+        def percentile(p: float) -> float:
+            return samples[min(len(samples) - 1, int(p * len(samples)))] if samples else 0.0
+
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "admitted": self.admitted,
+            "rejected_queue_full": self.rejected_queue_full,
+            "rejected_rate_limited": self.rejected_rate_limited,
+            "queue_wait": {
+                "count": self._wait_count,
+                "mean": self._wait_total / self._wait_count if self._wait_count else 0.0,
+                "max": self._wait_max,
+                "p50": percentile(0.50),
+                "p95": percentile(0.95),
+                "p99": percentile(0.99),
+            },
+        }
+
+
+_auth_admission = AdmissionController()
+
+
+def get_auth_admission() -> AdmissionController:
+    """Admission controller shared by login and registration."""
+    return _auth_admission
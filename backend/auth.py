@@ -1,23 +1,33 @@
 """
 JWT authentication and password hashing utilities.
 Uses custom HS256 JWT implementation to avoid cryptography dependency issues.
+
+Authenticated requests are served from two in-process caches: verified
+tokens (until they expire) and user snapshots (for PRINCIPAL_CACHE_TTL
+seconds, dropped as soon as the user row changes), so most requests
+neither re-check the signature nor query the users table.
 """
 
-from datetime import datetime, timedelta
-from typing import Optional
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Hashable, Optional
 import os
 import hashlib
 import hmac
 import base64
 import json
+import threading
+import time
 
-import secrets
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from dotenv import load_dotenv
 
-from .database import get_db
+from .database import get_async_db
+from .passwords import hash_password, hash_password_async, needs_rehash, verify_password_async
+from .passwords import verify_password as _verify_password
 from . import models, schemas
 
 # Load environment variables
@@ -28,13 +38,87 @@ SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "1440"))
 
-# Password hashing iterations (PBKDF2-like approach using SHA-256)
-HASH_ITERATIONS = 100000
+# Seconds a user snapshot is reused before the users table is read again.
+# Changes made through the ORM in this process invalidate it immediately;
+# this bounds how stale other workers' snapshots can get.
+PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", "60"))
+PRINCIPAL_CACHE_MAX_ENTRIES = int(os.getenv("PRINCIPAL_CACHE_MAX_ENTRIES", "10000"))
+
+# Users allowed to read operational endpoints (comma-separated usernames)
+OPS_USERNAMES = frozenset(u.strip() for u in os.getenv("OPS_USERNAMES", "").split(",") if u.strip())
 
 # OAuth2 scheme for token extraction
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
 
+class ExpiringCache:
+    """Thread-safe LRU whose entries also expire at a wall-clock timestamp."""
+
+    def __init__(self, max_entries: int = PRINCIPAL_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value: Any, expires_at: float):
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def pop(self, key: Hashable):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class Principal:
+    """Snapshot of the authenticated user's account fields."""
+
+    def __init__(self, user: models.User):
+        self.id = user.id
+        self.username = user.username
+        self.email = user.email
+        self.is_active = user.is_active
+        self.created_at = user.created_at
+
+
+# Verified token -> TokenData, until the token expires
+_verified_tokens = ExpiringCache()
+
+# Username -> Principal
+_principals = ExpiringCache()
+
+
+def invalidate_principal(username: str):
+    """Drop a user's cached snapshot (call after changing the user outside the ORM)."""
+    _principals.pop(username)
+
+
+@event.listens_for(models.User, "after_update")
+@event.listens_for(models.User, "after_delete")
+def _invalidate_changed_user(mapper, connection, target: models.User):
+    invalidate_principal(target.username)
+    # A renamed user is cached under the old name
+    for username in inspect(target).attrs.username.history.deleted or ():
+        invalidate_principal(username)
+
+
 def _base64url_encode(data: bytes) -> str:
     """Base64 URL-safe encoding without padding."""
     return base64.urlsafe_b64encode(data).rstrip(b'=').decode('utf-8')
@@ -58,30 +142,14 @@ def _create_signature(message: str, secret: str) -> str:
     return _base64url_encode(signature)
 
 
-def _hash_password_with_salt(password: str, salt: str) -> str:
-    """Hash password with salt using PBKDF2-like iterations."""
-    result = password + salt
-    for _ in range(HASH_ITERATIONS):
-        result = hashlib.sha256(result.encode('utf-8')).hexdigest()
-    return result
-
-
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a plain password against a hashed password."""
-    try:
-        # Format: salt$hash
-        salt, stored_hash = hashed_password.split('$')
-        computed_hash = _hash_password_with_salt(plain_password, salt)
-        return hmac.compare_digest(computed_hash, stored_hash)
-    except ValueError:
-        return False
+    """Verify a plain password against a hashed password (see passwords.py)."""
+    return _verify_password(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
-    """Hash a password for storage with random salt."""
-    salt = secrets.token_hex(16)
-    password_hash = _hash_password_with_salt(password, salt)
-    return f"{salt}${password_hash}"
+    """Hash a password for storage with the configured hasher."""
+    return hash_password(password)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -98,9 +166,9 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     to_encode = data.copy()
 
     if expires_delta:
-        expire = datetime.utcnow() + expires_delta
+        expire = datetime.now(timezone.utc) + expires_delta
     else:
-        expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+        expire = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
 
     to_encode.update({"exp": expire.timestamp()})
 
@@ -119,9 +187,16 @@ def decode_token(token: str) -> Optional[schemas.TokenData]:
     """
     Decode and validate a JWT token.
 
+    Verified tokens are memoized until they expire. "exp" is a Unix
+    timestamp, checked against time.time() like the cache itself.
+
     Returns:
         TokenData with username if valid, None otherwise
     """
+    token_data = _verified_tokens.get(token)
+    if token_data is not None:
+        return token_data
+
     try:
         parts = token.split('.')
         if len(parts) != 3:
@@ -142,45 +217,56 @@ def decode_token(token: str) -> Optional[schemas.TokenData]:
 
         # Check expiration
         exp = payload.get("exp")
-        if exp and datetime.utcnow().timestamp() > exp:
+        now = time.time()
+        if exp and now >= exp:
             return None
 
         username = payload.get("sub")
         if username is None:
             return None
 
-        return schemas.TokenData(username=username)
+        token_data = schemas.TokenData(username=username)
+        _verified_tokens.put(token, token_data, exp or now + PRINCIPAL_CACHE_TTL)
+        return token_data
 
     except Exception:
         return None
 
 
-def get_user_by_username(db: Session, username: str) -> Optional[models.User]:
+async def get_user_by_username(db: AsyncSession, username: str) -> Optional[models.User]:
     """Get a user by username."""
-    return db.query(models.User).filter(models.User.username == username).first()
+    return await db.scalar(select(models.User).where(models.User.username == username))
 
 
-def get_user_by_email(db: Session, email: str) -> Optional[models.User]:
+async def get_user_by_email(db: AsyncSession, email: str) -> Optional[models.User]:
     """Get a user by email."""
-    return db.query(models.User).filter(models.User.email == email).first()
+    return await db.scalar(select(models.User).where(models.User.email == email))
 
 
-def authenticate_user(db: Session, username: str, password: str) -> Optional[models.User]:
+async def authenticate_user(db: AsyncSession, username: str, password: str) -> Optional[models.User]:
     """
     Authenticate a user by username and password.
 
+    A password stored in an outdated format (e.g. legacy salt$hash) is
+    re-hashed with the current hasher once it has been verified.
+
     Returns:
         User object if credentials are valid, None otherwise
     """
-    user = get_user_by_username(db, username)
+    user = await get_user_by_username(db, username)
     if not user:
         return None
-    if not verify_password(password, user.hashed_password):
+    if not await verify_password_async(password, user.hashed_password):
         return None
+
+    if needs_rehash(user.hashed_password):
+        user.hashed_password = await hash_password_async(password)
+        await db.commit()
+
     return user
 
 
-def create_user(db: Session, user_data: schemas.UserCreate) -> models.User:
+async def create_user(db: AsyncSession, user_data: schemas.UserCreate) -> models.User:
     """
     Create a new user in the database.
 
@@ -188,15 +274,15 @@ def create_user(db: Session, user_data: schemas.UserCreate) -> models.User:
         ValueError: If username or email already exists
     """
     # Check if username exists
-    if get_user_by_username(db, user_data.username):
+    if await get_user_by_username(db, user_data.username):
         raise ValueError("Username already registered")
 
     # Check if email exists
-    if get_user_by_email(db, user_data.email):
+    if await get_user_by_email(db, user_data.email):
         raise ValueError("Email already registered")
 
     # Create user
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await hash_password_async(user_data.password)
     db_user = models.User(
         username=user_data.username,
         email=user_data.email,
@@ -204,8 +290,7 @@ def create_user(db: Session, user_data: schemas.UserCreate) -> models.User:
     )
 
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.flush()
 
     # Initialize first module as unlocked for each book
     for book_id in range(1, 11):  # 10 books
@@ -217,18 +302,23 @@ def create_user(db: Session, user_data: schemas.UserCreate) -> models.User:
         )
         db.add(progress)
 
-    db.commit()
+    await db.commit()
+    await db.refresh(db_user)
 
     return db_user
 
 
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> models.User:
+    db: AsyncSession = Depends(get_async_db)
+) -> Principal:
     """
     Dependency to get current authenticated user from JWT token.
 
+    Returns a Principal snapshot (id, username, email, is_active,
+    created_at) from the principal cache; the users table is only read
+    on a cache miss.
+
     Raises:
         HTTPException: If token is invalid or user not found
     """
@@ -242,14 +332,34 @@ async def get_current_user(
     if token_data is None:
         raise credentials_exception
 
-    user = get_user_by_username(db, token_data.username)
-    if user is None:
-        raise credentials_exception
+    principal = _principals.get(token_data.username)
+    if principal is None:
+        user = await get_user_by_username(db, token_data.username)
+        if user is None:
+            raise credentials_exception
+        principal = Principal(user)
+        _principals.put(token_data.username, principal, time.time() + PRINCIPAL_CACHE_TTL)
 
-    if not user.is_active:
+    if not principal.is_active:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User account is disabled"
         )
 
-    return user
+    return principal
+
+
+async def get_ops_user(current_user: Principal = Depends(get_current_user)) -> Principal:
+    """
+    Dependency for operational endpoints: the current user, if listed in
+    OPS_USERNAMES.
+
+    Raises:
+        HTTPException: 403 for any other user
+    """
+    if current_user.username not in OPS_USERNAMES:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not allowed"
+        )
+    return current_user
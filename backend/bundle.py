@@ -0,0 +1,413 @@
+"""
+Compiled content bundle for CFA Trainer.
+
+A bundle packs the JSON content under frontend/data into one file that the
+backend memory-maps instead of parsing every JSON file at startup. Records
+are decoded lazily, so resident memory does not grow with content size,
+and all workers share the same page cache.
+
+File layout (all integers little-endian):
+
+    header   64 bytes   magic, format version, content hash, TOC offset/length
+    records  ...        UTF-8 JSON blobs (questions, terms, modules, files)
+    tables   ...        sorted fixed-size entries keyed by question_id,
+                        term_id and (book_id, module_id)
+    TOC      JSON       file/directory listing and table locations
+
+Build with: python scripts/build_content_bundle.py
+"""
+
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+import hashlib
+import json
+import mmap
+import os
+import struct
+
+MAGIC = b"CFABUNDL"
+FORMAT_VERSION = 1
+
+# magic, format version, flags, sha256 of sources, TOC offset, TOC length
+HEADER = struct.Struct("<8sII32sQQ")
+
+# key offset, key length, record offset, record length, book_id, module_id
+TABLE_ENTRY = struct.Struct("<QHQIHH")
+
+# Number of decoded question/term records kept per process
+RECORD_CACHE_SIZE = 4096
+
+# Files compiled into the bundle, relative to frontend/data
+MODULE_FILES = ("questions.json", "glossary.json")
+BOOK_FILES = ("meta.json",)
+ROOT_FILES = ("v2/calculator_templates.json", "v2/formulas_master.json")
+
+# Pre-v2 book files whose questions are added to the question table when
+# no v2 module has their ID (the files themselves are not stored)
+LEGACY_BOOK_FILE = "books/book{book_id}.json"
+
+# List inside each module file that is stored as individual records
+EXPAND_KEYS = {"questions.json": "questions", "glossary.json": "terms"}
+
+
+class BundleError(Exception):
+    """Raised when a bundle file is missing, corrupt or of an unknown format."""
+
+
+def _module_key(book_id: int, module_id: int) -> bytes:
+    return struct.pack(">HH", book_id, module_id)
+
+
+# ============== Builder ==============
+
+class _BundleWriter:
+    """Accumulates records and tables, then writes the bundle file."""
+
+    def __init__(self):
+        self.body = bytearray()
+        self.tables: Dict[str, List[Tuple[bytes, int, int, int, int]]] = {
+            "questions": [], "terms": [], "modules": []
+        }
+        self.files: Dict[str, list] = {}
+        self.dirs: Dict[str, Any] = {}
+
+    def add_record(self, value: Any) -> Tuple[int, int]:
+        """Append a JSON record; returns (offset, length) in the file."""
+        blob = json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        offset = HEADER.size + len(self.body)
+        self.body += blob
+        return offset, len(blob)
+
+    def add_entry(self, table: str, key: bytes, record: Tuple[int, int],
+                  book_id: int = 0, module_id: int = 0):
+        self.tables[table].append((key, record[0], record[1], book_id, module_id))
+
+    def write(self, path: str, content_hash: bytes):
+        toc = {"files": self.files, "dirs": self.dirs, "tables": {}}
+
+        for name, entries in self.tables.items():
+            entries.sort(key=lambda e: e[0])
+            key_offsets = []
+            for key, *_ in entries:
+                key_offsets.append(HEADER.size + len(self.body))
+                self.body += key
+
+            table_offset = HEADER.size + len(self.body)
+            for key_offset, (key, rec_offset, rec_length, book_id, module_id) in zip(key_offsets, entries):
+                self.body += TABLE_ENTRY.pack(key_offset, len(key), rec_offset, rec_length, book_id, module_id)
+            toc["tables"][name] = [table_offset, len(entries)]
+
+        toc_blob = json.dumps(toc, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        toc_offset = HEADER.size + len(self.body)
+        header = HEADER.pack(MAGIC, FORMAT_VERSION, 0, content_hash, toc_offset, len(toc_blob))
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(header)
+            f.write(self.body)
+            f.write(toc_blob)
+        # Atomic swap, so running workers never map a half-written file
+        os.replace(tmp_path, path)
+
+
+def _source_files(data_root: str, book_folders: Dict[int, str]) -> Iterator[Tuple[str, int, int]]:
+    """Yield (relpath, book_id, module_id) for every file compiled into a bundle."""
+    for relpath in ROOT_FILES:
+        yield relpath, 0, 0
+
+    calculator_dir = os.path.join(data_root, "calculator")
+    if os.path.isdir(calculator_dir):
+        for name in sorted(os.listdir(calculator_dir)):
+            if name.endswith("_problems.json"):
+                yield f"calculator/{name}", 0, 0
+
+    for book_id, folder in book_folders.items():
+        book_dir = os.path.join(data_root, "v2", folder)
+        if not os.path.isdir(book_dir):
+            continue
+
+        for name in BOOK_FILES:
+            yield f"v2/{folder}/{name}", book_id, 0
+
+        for name in sorted(os.listdir(book_dir)):
+            suffix = name[len("module"):]
+            if not (name.startswith("module") and suffix.isdigit()):
+                continue
+            for file_name in MODULE_FILES:
+                yield f"v2/{folder}/{name}/{file_name}", book_id, int(suffix)
+
+
+def build_bundle(data_root: str, output_path: str, book_folders: Dict[int, str]) -> dict:
+    """
+    Compile the JSON content under data_root into a bundle file.
+
+    Returns a summary with record counts and the content hash.
+    """
+    writer = _BundleWriter()
+    digest = hashlib.sha256()
+    modules: Dict[Tuple[int, int], dict] = {}
+
+    for relpath, book_id, module_id in _source_files(data_root, book_folders):
+        path = os.path.join(data_root, *relpath.split("/"))
+        if not os.path.exists(path):
+            continue
+
+        with open(path, 'rb') as f:
+            raw = f.read()
+        digest.update(relpath.encode('utf-8') + b"\0" + raw)
+        data = json.loads(raw)
+
+        # Register the file and its parents in the directory listings
+        parts = relpath.split("/")
+        for depth in range(len(parts)):
+            writer.dirs.setdefault("/".join(parts[:depth]), set()).add(parts[depth])
+        name = parts[-1]
+
+        expand_key = EXPAND_KEYS.get(name) if module_id else None
+        if expand_key is None:
+            offset, length = writer.add_record(data)
+            writer.files[relpath] = [offset, length, None]
+            continue
+
+        # Store each question/term as its own record and keep only
+        # their (offset, length) pairs in the file record
+        table = "questions" if expand_key == "questions" else "terms"
+        id_field = "question_id" if table == "questions" else "term_id"
+        refs = []
+        ids = []
+        for item in data.get(expand_key, []):
+            record = writer.add_record(item)
+            refs.append(list(record))
+            if item.get(id_field):
+                ids.append(item[id_field])
+                writer.add_entry(table, item[id_field].encode('utf-8'), record, book_id, module_id)
+
+        offset, length = writer.add_record({**data, expand_key: refs})
+        writer.files[relpath] = [offset, length, expand_key]
+
+        module = modules.setdefault((book_id, module_id), {
+            "book_id": book_id,
+            "module_id": module_id,
+            "module_name": data.get("module_name"),
+            "module_name_ru": data.get("module_name_ru"),
+        })
+        module[f"{table[:-1]}_ids"] = ids
+        module[f"{table}_file"] = relpath
+
+    # Legacy-only questions, so IDs stored before the v2 move still resolve
+    known_ids = {key for key, *_ in writer.tables["questions"]}
+    legacy_questions = 0
+    for book_id in book_folders:
+        relpath = LEGACY_BOOK_FILE.format(book_id=book_id)
+        path = os.path.join(data_root, *relpath.split("/"))
+        if not os.path.exists(path):
+            continue
+
+        with open(path, 'rb') as f:
+            raw = f.read()
+        digest.update(relpath.encode('utf-8') + b"\0" + raw)
+        for module in json.loads(raw).get("learning_modules", []):
+            for item in module.get("questions", []):
+                key = (item.get("question_id") or "").encode('utf-8')
+                if key and key not in known_ids:
+                    known_ids.add(key)
+                    writer.add_entry("questions", key, writer.add_record(item),
+                                     book_id, module.get("module_id") or 0)
+                    legacy_questions += 1
+
+    for (book_id, module_id), module in sorted(modules.items()):
+        record = writer.add_record(module)
+        writer.add_entry("modules", _module_key(book_id, module_id), record, book_id, module_id)
+
+    writer.dirs = {path: sorted(names) for path, names in writer.dirs.items()}
+
+    content_hash = digest.digest()
+    writer.write(output_path, content_hash)
+
+    return {
+        "path": output_path,
+        "content_hash": content_hash.hex(),
+        "files": len(writer.files),
+        "questions": len(writer.tables["questions"]),
+        "legacy_questions": legacy_questions,
+        "terms": len(writer.tables["terms"]),
+        "modules": len(writer.tables["modules"]),
+        "size_bytes": os.path.getsize(output_path),
+    }
+
+
+# ============== Reader ==============
+
+class ContentBundle:
+    """
+    Read-only, memory-mapped view of a bundle file.
+
+    Only the header and the small TOC are decoded when the bundle is opened;
+    questions, terms and files are decoded on access.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        try:
+            with open(path, 'rb') as f:
+                self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            raise BundleError(f"Cannot open content bundle {path}: {e}")
+
+        try:
+            self._read_header_and_toc()
+        except BundleError:
+            self._mm.close()
+            raise
+
+        self._decode = lru_cache(maxsize=RECORD_CACHE_SIZE)(self._decode_record)
+
+    def _read_header_and_toc(self):
+        path = self.path
+        if len(self._mm) < HEADER.size:
+            raise BundleError(f"Content bundle {path} is truncated")
+
+        magic, version, _, content_hash, toc_offset, toc_length = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise BundleError(f"{path} is not a content bundle")
+        if version != FORMAT_VERSION:
+            raise BundleError(f"Unsupported content bundle format {version} (expected {FORMAT_VERSION})")
+        if toc_offset + toc_length > len(self._mm):
+            raise BundleError(f"Content bundle {path} is truncated")
+
+        self.format_version = version
+        self.content_hash = content_hash.hex()
+
+        try:
+            toc = json.loads(self._mm[toc_offset:toc_offset + toc_length])
+            self._files: Dict[str, list] = toc["files"]
+            self._dirs: Dict[str, List[str]] = toc["dirs"]
+            self._tables: Dict[str, Tuple[int, int]] = {
+                name: (int(offset), int(count)) for name, (offset, count) in toc["tables"].items()
+            }
+        except (ValueError, TypeError, KeyError, AttributeError) as e:
+            raise BundleError(f"Content bundle {path} has a corrupt table of contents: {e}")
+
+    def close(self):
+        self._mm.close()
+
+    def _decode_record(self, offset: int, length: int) -> Any:
+        return json.loads(self._mm[offset:offset + length])
+
+    # ---------- Offset tables ----------
+
+    def _find(self, table: str, key: bytes) -> Optional[Tuple[int, int, int, int]]:
+        """Binary search a table; returns (offset, length, book_id, module_id)."""
+        table_offset, count = self._tables.get(table, (0, 0))
+        mm = self._mm
+        lo, hi = 0, count
+
+        while lo < hi:
+            mid = (lo + hi) // 2
+            key_offset, key_length, rec_offset, rec_length, book_id, module_id = \
+                TABLE_ENTRY.unpack_from(mm, table_offset + mid * TABLE_ENTRY.size)
+            probe = mm[key_offset:key_offset + key_length]
+            if probe < key:
+                lo = mid + 1
+            elif probe > key:
+                hi = mid
+            else:
+                return rec_offset, rec_length, book_id, module_id
+
+        return None
+
+    def _iter_table(self, table: str) -> Iterator[Tuple[bytes, int, int, int, int]]:
+        table_offset, count = self._tables.get(table, (0, 0))
+        mm = self._mm
+        for i in range(count):
+            key_offset, key_length, rec_offset, rec_length, book_id, module_id = \
+                TABLE_ENTRY.unpack_from(mm, table_offset + i * TABLE_ENTRY.size)
+            yield mm[key_offset:key_offset + key_length], rec_offset, rec_length, book_id, module_id
+
+    def question_count(self) -> int:
+        return self._tables.get("questions", (0, 0))[1]
+
+    def question(self, question_id: str) -> Optional[dict]:
+        """Decode a question by ID, or None if it is not in the bundle."""
+        entry = self._find("questions", question_id.encode('utf-8'))
+        return self._decode(entry[0], entry[1]) if entry else None
+
+    def question_location(self, question_id: str) -> Optional[Tuple[int, int]]:
+        """(book_id, module_id) of a question."""
+        entry = self._find("questions", question_id.encode('utf-8'))
+        return (entry[2], entry[3]) if entry else None
+
+    def question_ids(self) -> Iterator[str]:
+        for key, *_ in self._iter_table("questions"):
+            yield key.decode('utf-8')
+
+    def term(self, term_id: str) -> Optional[dict]:
+        """Decode a glossary term by ID (as stored in its module file)."""
+        entry = self._find("terms", term_id.encode('utf-8'))
+        return self._decode(entry[0], entry[1]) if entry else None
+
+    def term_location(self, term_id: str) -> Optional[Tuple[int, int]]:
+        """(book_id, module_id) of a glossary term."""
+        entry = self._find("terms", term_id.encode('utf-8'))
+        return (entry[2], entry[3]) if entry else None
+
+    def module(self, book_id: int, module_id: int) -> Optional[dict]:
+        """Module summary: names plus ordered question_ids and term_ids."""
+        entry = self._find("modules", _module_key(book_id, module_id))
+        return self._decode(entry[0], entry[1]) if entry else None
+
+    # ---------- File view (used by the content catalog) ----------
+
+    def has_file(self, relpath: str) -> bool:
+        return relpath in self._files
+
+    def read_json(self, relpath: str) -> Any:
+        """
+        Reassemble a source file by its path relative to frontend/data.
+
+        Returns None if the file was not compiled into the bundle.
+        """
+        entry = self._files.get(relpath)
+        if entry is None:
+            return None
+
+        offset, length, expand_key = entry
+        data = json.loads(self._mm[offset:offset + length])
+        if expand_key:
+            data[expand_key] = [self._decode(o, n) for o, n in data[expand_key]]
+        return data
+
+    def list_dir(self, relpath: str) -> Tuple[str, ...]:
+        """Names in a directory relative to frontend/data."""
+        return tuple(self._dirs.get(relpath.strip("/"), ()))
+
+
+class BundleQuestionIndex:
+    """QuestionIndex backed by a bundle's question_id offset table."""
+
+    def __init__(self, bundle: ContentBundle):
+        self._bundle = bundle
+
+    def __len__(self) -> int:
+        return self._bundle.question_count()
+
+    def __contains__(self, question_id: str) -> bool:
+        return self._bundle.question_location(question_id) is not None
+
+    def get(self, question_id: str) -> Optional[dict]:
+        """Get a question by ID, or None if it is unknown."""
+        return self._bundle.question(question_id)
+
+    def get_many(self, question_ids: Iterable[str]) -> Dict[str, dict]:
+        """Resolve several question IDs in one pass. Unknown IDs are omitted."""
+        result = {}
+        for qid in question_ids:
+            if qid not in result:
+                question = self._bundle.question(qid)
+                if question is not None:
+                    result[qid] = question
+        return result
+
+    def location(self, question_id: str) -> Optional[tuple]:
+        """Get (book_id, module_id) for a question."""
+        return self._bundle.question_location(question_id)
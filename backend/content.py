@@ -0,0 +1,529 @@
+"""
+Content catalog for CFA Trainer (questions, glossary, calculator problems).
+
+All routers read JSON content through one shared ContentCatalog, which
+parses each file once and reloads it only when its mtime/size changes.
+When CONTENT_BUNDLE points to a compiled bundle (scripts/build_content_bundle.py),
+the catalog reads from the memory-mapped bundle instead of the JSON files.
+"""
+
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+import json
+import logging
+import os
+import threading
+import time
+
+from dotenv import load_dotenv
+
+from .bundle import BundleError, BundleQuestionIndex, ContentBundle
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Path to content data
+DATA_ROOT = os.path.join(os.path.dirname(__file__), "..", "frontend", "data")
+
+# Path to questions and glossary data (v2 structure)
+DATA_PATH = os.path.join(DATA_ROOT, "v2")
+
+# Pre-v2 book files (books/book{N}.json); only consulted for question IDs
+# that no v2 module has, so old error records and results keep resolving
+LEGACY_BOOKS_PATH = os.path.join(DATA_ROOT, "books")
+
+# Path to calculator problems data
+CALCULATOR_PATH = os.path.join(DATA_ROOT, "calculator")
+
+# Mapping of book_id to folder name
+BOOK_FOLDERS = {
+    1: "book1_quants",
+    2: "book2_economics",
+    3: "book3_corporate",
+    4: "book4_fsa",
+    5: "book5_equity",
+    6: "book6_fixed_income",
+    7: "book7_derivatives",
+    8: "book8_alternatives",
+    9: "book9_portfolio",
+    10: "book10_ethics"
+}
+
+# Minimum seconds between two mtime/size sweeps over loaded files
+CONTENT_CHECK_INTERVAL = float(os.getenv("CONTENT_CHECK_INTERVAL", "1.0"))
+
+# Optional compiled content bundle (empty = read the JSON files)
+CONTENT_BUNDLE = os.getenv("CONTENT_BUNDLE", "")
+
+
+def _file_signature(path: str) -> Optional[Tuple[int, int]]:
+    """Return (mtime_ns, size) for a path, or None if it does not exist."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+class ContentCatalog:
+    """
+    Shared, lazily loaded view over the JSON content files.
+
+    Parsed files and derived views (book aggregates, glossary lists, indexes)
+    are cached until one of the loaded files changes on disk. Every change
+    bumps `version`, which derived structures use as their cache key.
+
+    With a bundle, decoded files, books and glossaries are not kept: they
+    are reassembled on each call from the bundle's bounded record cache,
+    so memory does not grow with content size. Only derived views
+    (indexes, unlock graph) are cached.
+
+    Everything returned by the catalog is shared between requests and must
+    be treated as read-only; sequences are returned as tuples.
+    """
+
+    def __init__(self, data_root: str = DATA_ROOT, check_interval: float = CONTENT_CHECK_INTERVAL,
+                 bundle_path: Optional[str] = CONTENT_BUNDLE or None):
+        self.data_root = data_root
+        self.data_path = os.path.join(data_root, "v2")
+        self.legacy_books_path = os.path.join(data_root, "books")
+        self.calculator_path = os.path.join(data_root, "calculator")
+        self.check_interval = check_interval
+
+        self._files: Dict[str, Tuple[Optional[Tuple[int, int]], Any]] = {}
+        self._dirs: Dict[str, Tuple[Optional[Tuple[int, int]], Tuple[str, ...]]] = {}
+        self._views: Dict[Any, Any] = {}
+        self._version = 0
+        self._last_check = time.monotonic()
+        self._lock = threading.RLock()
+
+        self.bundle_path = bundle_path
+        self.bundle: Optional[ContentBundle] = None
+        self._bundle_signature = None
+        if bundle_path:
+            self._open_bundle()
+
+    def _open_bundle(self):
+        """(Re)open the bundle; fall back to the JSON files if it is unusable."""
+        self._bundle_signature = _file_signature(self.bundle_path)
+        try:
+            self.bundle = ContentBundle(self.bundle_path)
+        except BundleError as e:
+            logger.warning("%s; reading JSON content files instead", e)
+            self.bundle = None
+
+    # ---------- Invalidation ----------
+
+    @property
+    def version(self) -> int:
+        """Content version, bumped whenever a loaded file changes."""
+        self.refresh()
+        return self._version
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Drop cached files whose mtime/size changed.
+
+        Runs at most once per check_interval unless forced.
+        Returns True if anything was invalidated.
+        """
+        now = time.monotonic()
+        if not force and now - self._last_check < self.check_interval:
+            return False
+
+        with self._lock:
+            self._last_check = now
+            changed = False
+
+            if self.bundle_path and _file_signature(self.bundle_path) != self._bundle_signature:
+                # Bundle was rebuilt: everything may have changed
+                self._open_bundle()
+                self._files.clear()
+                self._dirs.clear()
+                changed = True
+
+            if self.bundle is None:
+                for cache in (self._files, self._dirs):
+                    for path, (signature, _) in list(cache.items()):
+                        if _file_signature(path) != signature:
+                            del cache[path]
+                            changed = True
+
+            if changed:
+                self._version += 1
+                self._views.clear()
+
+            return changed
+
+    def view(self, key: Any, builder: Callable[["ContentCatalog"], Any]) -> Any:
+        """
+        Get a derived view, building it with builder(catalog) if missing.
+
+        Views are discarded whenever the content version changes.
+        """
+        self.refresh()
+        try:
+            return self._views[key]
+        except KeyError:
+            pass
+
+        with self._lock:
+            if key in self._views:
+                return self._views[key]
+
+            version = self._version
+            value = builder(self)
+            # Do not cache a view built across an invalidation
+            if self._version == version:
+                self._views[key] = value
+            return value
+
+    def _content_view(self, key: Any, builder: Callable[["ContentCatalog"], Any]) -> Any:
+        """view() for views holding decoded content; not cached in bundle mode."""
+        self.refresh()
+        if self.bundle is not None:
+            return builder(self)
+        return self.view(key, builder)
+
+    # ---------- File access ----------
+
+    def _read_json(self, path: str) -> Any:
+        """Parse a JSON file once; None if it is missing or invalid."""
+        self.refresh()
+        entry = self._files.get(path)
+        if entry is not None:
+            return entry[1]
+
+        with self._lock:
+            entry = self._files.get(path)
+            if entry is not None:
+                return entry[1]
+
+            if self.bundle is not None:
+                return self.bundle.read_json(self._relpath(path))
+
+            signature = _file_signature(path)
+            data = None
+            if signature is not None:
+                try:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        data = json.load(f)
+                except Exception as e:
+                    logger.warning("Failed to load %s: %s", path, e)
+
+            self._files[path] = (signature, data)
+            return data
+
+    def _list_dir(self, path: str) -> Tuple[str, ...]:
+        """List a directory once; empty if it does not exist."""
+        self.refresh()
+        entry = self._dirs.get(path)
+        if entry is not None:
+            return entry[1]
+
+        with self._lock:
+            if self.bundle is not None:
+                return self.bundle.list_dir(self._relpath(path))
+
+            signature = _file_signature(path)
+            try:
+                names = tuple(sorted(os.listdir(path)))
+            except OSError:
+                names = ()
+            self._dirs[path] = (signature, names)
+            return names
+
+    def _relpath(self, path: str) -> str:
+        """Path relative to data_root with '/' separators (bundle keys)."""
+        relpath = os.path.relpath(path, self.data_root).replace(os.sep, "/")
+        return "" if relpath == "." else relpath
+
+    def _book_path(self, book_id: int) -> Optional[str]:
+        book_folder = BOOK_FOLDERS.get(book_id)
+        if book_folder is None:
+            return None
+        return os.path.join(self.data_path, book_folder)
+
+    # ---------- Raw content ----------
+
+    def book_ids(self) -> Tuple[int, ...]:
+        """IDs of books whose folder exists."""
+        names = set(self._list_dir(self.data_path))
+        return tuple(book_id for book_id, folder in BOOK_FOLDERS.items() if folder in names)
+
+    def module_ids(self, book_id: int) -> Tuple[int, ...]:
+        """Module numbers present for a book, in numeric order."""
+        return self.view(("module_ids", book_id), lambda c: c._build_module_ids(book_id))
+
+    def _build_module_ids(self, book_id: int) -> Tuple[int, ...]:
+        book_path = self._book_path(book_id)
+        if book_path is None:
+            return ()
+
+        return tuple(sorted(
+            int(name[len("module"):])
+            for name in self._list_dir(book_path)
+            if name.startswith("module") and name[len("module"):].isdigit()
+        ))
+
+    def meta(self, book_id: int) -> Optional[dict]:
+        """Parsed meta.json for a book."""
+        book_path = self._book_path(book_id)
+        if book_path is None:
+            return None
+        return self._read_json(os.path.join(book_path, "meta.json"))
+
+    def module_questions(self, book_id: int, module_id: int) -> Optional[dict]:
+        """Parsed questions.json for a module."""
+        book_path = self._book_path(book_id)
+        if book_path is None:
+            return None
+        return self._read_json(os.path.join(book_path, f"module{module_id}", "questions.json"))
+
+    def legacy_book(self, book_id: int) -> Optional[dict]:
+        """Parsed pre-v2 books/book{N}.json, or None if absent."""
+        return self._read_json(os.path.join(self.legacy_books_path, f"book{book_id}.json"))
+
+    def module_glossary(self, book_id: int, module_id: int) -> Optional[dict]:
+        """Glossary for a module; every term carries book_id, book_name and module_id."""
+        return self._content_view(("module_glossary", book_id, module_id),
+                                  lambda c: c._build_module_glossary(book_id, module_id))
+
+    def _build_module_glossary(self, book_id: int, module_id: int) -> Optional[dict]:
+        book_path = self._book_path(book_id)
+        if book_path is None:
+            return None
+
+        module_data = self._read_json(os.path.join(book_path, f"module{module_id}", "glossary.json"))
+        if module_data is None:
+            return None
+
+        book_name = module_data.get("book_name") or f"Book {book_id}"
+        terms = tuple(
+            {
+                **term,
+                "module_id": term.get("module_id", module_data.get("module_id")),
+                "book_id": book_id,
+                "book_name": book_name,
+            }
+            for term in module_data.get("terms", [])
+        )
+        return {**module_data, "terms": terms}
+
+    def calculator_problems(self, worksheet_type: str) -> Optional[Tuple[dict, ...]]:
+        """Problems from calculator/<type>_problems.json, or None if absent."""
+        return self.view(("calculator", worksheet_type.lower()),
+                         lambda c: c._build_calculator_problems(worksheet_type))
+
+    def _build_calculator_problems(self, worksheet_type: str) -> Optional[Tuple[dict, ...]]:
+        path = os.path.join(self.calculator_path, f"{worksheet_type.lower()}_problems.json")
+        data = self._read_json(path)
+        if data is None:
+            return None
+        return tuple(data.get("problems", []))
+
+    # ---------- Aggregated views ----------
+
+    def book(self, book_id: int) -> Optional[dict]:
+        """
+        Book structure with all module questions, or None if the book is missing.
+
+        Format: {"book_id", "book_name", "book_name_ru", "book_code", "learning_modules"}
+        """
+        return self._content_view(("book", book_id), lambda c: c._build_book(book_id))
+
+    def _build_book(self, book_id: int) -> Optional[dict]:
+        if book_id not in self.book_ids():
+            return None
+
+        learning_modules = []
+        book_name = None
+        book_name_ru = None
+        book_code = None
+
+        for module_id in self.module_ids(book_id):
+            module_data = self.module_questions(book_id, module_id)
+            if module_data is None:
+                continue
+
+            # Extract book info from first module
+            if book_name is None:
+                book_name = module_data.get("book_name", "")
+                book_name_ru = module_data.get("book_name_ru", "")
+                book_code = module_data.get("book_code", "")
+
+            learning_modules.append({
+                "module_id": module_data.get("module_id"),
+                "module_name": module_data.get("module_name", ""),
+                "module_name_ru": module_data.get("module_name_ru", ""),
+                "questions": tuple(module_data.get("questions", []))
+            })
+
+        return {
+            "book_id": book_id,
+            "book_name": book_name or f"Book {book_id}",
+            "book_name_ru": book_name_ru or "",
+            "book_code": book_code or "",
+            "learning_modules": tuple(learning_modules)
+        }
+
+    def next_modules(self) -> Dict[Tuple[int, int], Optional[int]]:
+        """
+        Module unlock graph: (book_id, module_id) -> the module unlocked by
+        mastering it (None for the last module of a book).
+
+        Follows the module list of each book's meta.json, or the module
+        folders when meta.json has none.
+        """
+        return self.view("next_modules", lambda c: c._build_next_modules())
+
+    def _build_next_modules(self) -> Dict[Tuple[int, int], Optional[int]]:
+        graph = {}
+        for book_id in self.book_ids():
+            meta = self.meta(book_id) or {}
+            order = [m["module_id"] for m in meta.get("modules", []) if m.get("module_id") is not None]
+            if not order:
+                order = list(self.module_ids(book_id))
+            for current, following in zip(order, order[1:] + [None]):
+                graph[(book_id, current)] = following
+        return graph
+
+    def book_glossary(self, book_id: int) -> dict:
+        """Glossary aggregated over all modules of a book."""
+        return self._content_view(("book_glossary", book_id), lambda c: c._build_book_glossary(book_id))
+
+    def _build_book_glossary(self, book_id: int) -> dict:
+        all_terms = []
+        module_info = []
+        book_name = None
+        book_name_ru = None
+
+        for module_id in self.module_ids(book_id):
+            module_data = self.module_glossary(book_id, module_id)
+            if module_data is None:
+                continue
+
+            # Extract book metadata from first module
+            if book_name is None:
+                book_name = module_data.get("book_name")
+                book_name_ru = module_data.get("book_name_ru")
+
+            module_info.append({
+                "module_id": module_data.get("module_id"),
+                "module_name": module_data.get("module_name"),
+                "module_name_ru": module_data.get("module_name_ru"),
+                "term_count": len(module_data["terms"])
+            })
+            all_terms.extend(module_data["terms"])
+
+        return {
+            "book_id": book_id,
+            "book_name": book_name or f"Book {book_id}",
+            "book_name_ru": book_name_ru or f"Книга {book_id}",
+            "total_modules": len(module_info),
+            "modules": tuple(module_info),
+            "terms": tuple(all_terms)
+        }
+
+    def term(self, term_id: str) -> Optional[dict]:
+        """Glossary term by ID, or None if it is unknown."""
+        if self.bundle is not None:
+            location = self.bundle.term_location(term_id)
+            terms = self.module_glossary(*location)["terms"] if location else ()
+            return next((t for t in terms if t.get("term_id") == term_id), None)
+
+        return self.view("terms_by_id", lambda c: {
+            term.get("term_id"): term for term in c.all_terms()
+        }).get(term_id)
+
+    def all_terms(self) -> Tuple[dict, ...]:
+        """Glossary terms of every book, in book/module order."""
+        return self._content_view("all_terms", lambda c: tuple(
+            term
+            for book_id in BOOK_FOLDERS
+            for term in c.book_glossary(book_id)["terms"]
+        ))
+
+
+class QuestionIndex:
+    """
+    question_id -> question lookup over all v2 questions.
+
+    Built once per content version from the catalog, so resolving
+    a question is a dict lookup instead of a file scan. Questions that
+    exist only in the legacy books/book{N}.json files are indexed too
+    (v2 wins when both have an ID), so IDs stored before the v2 move
+    still resolve.
+    """
+
+    def __init__(self):
+        self._questions: Dict[str, dict] = {}
+        self._locations: Dict[str, tuple] = {}
+
+    @classmethod
+    def from_catalog(cls, catalog: ContentCatalog) -> "QuestionIndex":
+        """Index every question of every book in the catalog."""
+        if catalog.bundle is not None:
+            # The bundle already has a question_id offset table
+            return BundleQuestionIndex(catalog.bundle)
+
+        index = cls()
+        for book_id in BOOK_FOLDERS:
+            book = catalog.book(book_id)
+            if book is None:
+                continue
+            for module in book["learning_modules"]:
+                for q in module["questions"]:
+                    question_id = q.get("question_id")
+                    if question_id:
+                        index._questions[question_id] = q
+                        index._locations[question_id] = (book_id, module["module_id"])
+
+        for book_id in BOOK_FOLDERS:
+            legacy = catalog.legacy_book(book_id) or {}
+            for module in legacy.get("learning_modules", []):
+                for q in module.get("questions", []):
+                    question_id = q.get("question_id")
+                    if question_id and question_id not in index._questions:
+                        index._questions[question_id] = q
+                        index._locations[question_id] = (book_id, module.get("module_id"))
+        return index
+
+    def __len__(self) -> int:
+        return len(self._questions)
+
+    def __contains__(self, question_id: str) -> bool:
+        return question_id in self._questions
+
+    def get(self, question_id: str) -> Optional[dict]:
+        """Get a question by ID, or None if it is unknown."""
+        return self._questions.get(question_id)
+
+    def get_many(self, question_ids: Iterable[str]) -> Dict[str, dict]:
+        """Resolve several question IDs in one pass. Unknown IDs are omitted."""
+        questions = self._questions
+        return {qid: questions[qid] for qid in question_ids if qid in questions}
+
+    def location(self, question_id: str) -> Optional[tuple]:
+        """Get (book_id, module_id) for a question."""
+        return self._locations.get(question_id)
+
+
+_catalog: Optional[ContentCatalog] = None
+_catalog_lock = threading.Lock()
+
+
+def get_catalog() -> ContentCatalog:
+    """Get the process-wide content catalog."""
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                _catalog = ContentCatalog()
+    return _catalog
+
+
+def get_question_index() -> QuestionIndex:
+    """Get the question index for the current content version."""
+    return get_catalog().view("question_index", QuestionIndex.from_catalog)
@@ -1,10 +1,15 @@
 """
 Database connection and session management for CFA Trainer.
+
+Routers use the async engine (aiosqlite) through `get_async_db`; the
+sync engine serves `init_db`/migrations, scripts and the few endpoints
+that still run in the threadpool through `get_db`.
 """
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 import os
 from dotenv import load_dotenv
 
@@ -14,20 +19,111 @@ load_dotenv()
 # Database URL from environment or default
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./cfa_trainer.db")
 
-# Create engine
-# check_same_thread=False is needed for SQLite with FastAPI
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {}
-)
+# Async drivers for the sync URL schemes
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+# SQLite pragma profiles, applied to every new connection.
+# "tuned": WAL lets readers run alongside the single writer, and
+# synchronous=NORMAL is durable across application crashes in WAL mode
+# (only an OS crash or power loss can drop the last commits).
+SQLITE_PROFILES = {
+    "default": {},
+    "tuned": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -65536,       # negative = KiB (64 MB)
+        "mmap_size": 268435456,     # 256 MB
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,       # ms to wait for a lock instead of failing
+    },
+}
+
+# Profile name, plus per-pragma overrides (e.g. SQLITE_SYNCHRONOUS=FULL)
+SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "tuned")
+
+# Connection pool (ignored for in-memory SQLite)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+
+
+def sqlite_pragmas(profile: str = SQLITE_PROFILE) -> dict:
+    """Pragmas of a profile with SQLITE_<PRAGMA> environment overrides applied."""
+    if profile not in SQLITE_PROFILES:
+        raise ValueError(f"Unknown SQLITE_PROFILE {profile!r}, expected one of {list(SQLITE_PROFILES)}")
+
+    pragmas = dict(SQLITE_PROFILES[profile])
+    for name in SQLITE_PROFILES["tuned"]:
+        override = os.getenv(f"SQLITE_{name.upper()}")
+        if override:
+            pragmas[name] = override
+    return pragmas
+
+
+def _engine_options(url: str) -> dict:
+    if "sqlite" not in url:
+        return {"pool_size": DB_POOL_SIZE, "max_overflow": DB_MAX_OVERFLOW, "pool_timeout": DB_POOL_TIMEOUT}
+
+    # check_same_thread=False is needed for SQLite with FastAPI
+    options = {"connect_args": {"check_same_thread": False}}
+    if ":memory:" not in url and "mode=memory" not in url:
+        options.update(pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW, pool_timeout=DB_POOL_TIMEOUT)
+    return options
+
+
+def async_database_url(url: str) -> str:
+    """Same database through its async driver (sqlite:/// -> sqlite+aiosqlite:///)."""
+    scheme, sep, rest = url.partition("://")
+    return ASYNC_DRIVERS.get(scheme, scheme) + sep + rest
+
+
+def _install_sqlite_pragmas(sync_engine):
+    pragmas = sqlite_pragmas()
+
+    @event.listens_for(sync_engine, "connect")
+    def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
 
-# Session factory
+
+# Create engines
+engine = create_engine(DATABASE_URL, **_engine_options(DATABASE_URL))
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or async_database_url(DATABASE_URL)
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **_engine_options(ASYNC_DATABASE_URL))
+
+if engine.dialect.name == "sqlite":
+    _install_sqlite_pragmas(engine)
+if async_engine.dialect.name == "sqlite":
+    _install_sqlite_pragmas(async_engine.sync_engine)
+
+# Session factories
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Objects stay usable after commit (no implicit lazy reload in async code)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 # Base class for models
 Base = declarative_base()
 
 
+def dialect_insert(db, table):
+    """
+    INSERT for the session's database dialect, supporting
+    on_conflict_do_update (bulk upserts). SQLite and PostgreSQL only.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(table)
+
+
 def get_db():
     """
     Dependency for FastAPI endpoints.
@@ -40,10 +136,21 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    """
+    Async dependency for FastAPI endpoints.
+    Yields an AsyncSession and ensures it's closed after use.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 def init_db():
     """
-    Initialize database tables.
+    Initialize database tables and apply pending schema migrations.
     Call this on application startup.
     """
     from . import models  # noqa: F401
+    from .migrations import run_migrations
     Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
@@ -0,0 +1,298 @@
+"""
+Mock exam assembly.
+
+QuestionPool indexes every question once per content version by
+(book, module), book, LOS and question_id. The samplers draw question
+positions from those indexes, so building an exam never copies or
+rescans the corpus.
+
+Two exam modes exist:
+- adaptive: 30% user errors, 30% weak modules, 40% random
+- weighted: stratified by the official CFA Level I topic weights, with
+  per-LOS coverage and user priorities inside each topic
+"""
+
+from bisect import bisect_right
+from itertools import accumulate
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+import heapq
+import math
+import random
+
+from .content import BOOK_FOLDERS, ContentCatalog, get_catalog, get_question_index
+
+# Mock exam composition
+MOCK_EXAM_QUESTIONS = 180
+MOCK_EXAM_ERROR_SHARE = 0.3
+MOCK_EXAM_WEAK_SHARE = 0.3
+
+# Modules below this mastery are "weak"
+WEAK_MASTERY_PERCENT = 70
+
+# Exam modes for /api/tests/mock-exam
+EXAM_MODE_ADAPTIVE = "adaptive"
+EXAM_MODE_WEIGHTED = "weighted"
+EXAM_MODES = (EXAM_MODE_ADAPTIVE, EXAM_MODE_WEIGHTED)
+
+# CFA Level I topic weight ranges (share of exam) per book_id
+TOPIC_WEIGHTS = {
+    1: (0.06, 0.09),    # Quantitative Methods
+    2: (0.06, 0.09),    # Economics
+    3: (0.06, 0.09),    # Corporate Issuers
+    4: (0.11, 0.14),    # Financial Statement Analysis
+    5: (0.11, 0.14),    # Equity Investments
+    6: (0.11, 0.14),    # Fixed Income
+    7: (0.05, 0.08),    # Derivatives
+    8: (0.07, 0.10),    # Alternative Investments
+    9: (0.08, 0.12),    # Portfolio Management
+    10: (0.15, 0.20),   # Ethical and Professional Standards
+}
+
+# Sampling weight boosts inside a topic
+ERROR_PRIORITY = 1.0        # per recorded error on the question
+WEAK_MODULE_PRIORITY = 2.0  # scaled by how far the module is below WEAK_MASTERY_PERCENT
+
+
+class QuestionPool:
+    """
+    Read-only pool of all questions with positional indexes.
+
+    Questions are referenced by their position in `question_ids`; all
+    indexes map to tuples of positions. The pool holds IDs only: `take`
+    resolves questions through the question index, so with a content
+    bundle they stay in the memory-mapped file.
+    """
+
+    def __init__(self):
+        self.question_ids: Tuple[str, ...] = ()
+        self.locations: Tuple[Tuple[int, int], ...] = ()
+        self.by_id: Dict[str, int] = {}
+        self.by_module: Dict[Tuple[int, int], Tuple[int, ...]] = {}
+        self.by_book: Dict[int, Tuple[int, ...]] = {}
+        # LOS codes restart per book, so they are keyed by (book_id, los_id)
+        self.by_los: Dict[Tuple[int, str], Tuple[int, ...]] = {}
+
+    @classmethod
+    def from_catalog(cls, catalog: ContentCatalog) -> "QuestionPool":
+        pool = cls()
+        question_ids = []
+        locations = []
+        by_module: Dict[Tuple[int, int], List[int]] = {}
+        by_book: Dict[int, List[int]] = {}
+        by_los: Dict[Tuple[int, str], List[int]] = {}
+
+        for book_id in BOOK_FOLDERS:
+            book = catalog.book(book_id)
+            if book is None:
+                continue
+            for module in book["learning_modules"]:
+                location = (book_id, module["module_id"])
+                for q in module["questions"]:
+                    question_id = q.get("question_id")
+                    if not question_id:
+                        continue
+                    position = len(question_ids)
+                    question_ids.append(question_id)
+                    locations.append(location)
+                    by_module.setdefault(location, []).append(position)
+                    by_book.setdefault(book_id, []).append(position)
+                    if q.get("los_id"):
+                        by_los.setdefault((book_id, q["los_id"]), []).append(position)
+                    pool.by_id[question_id] = position
+
+        pool.question_ids = tuple(question_ids)
+        pool.locations = tuple(locations)
+        pool.by_module = {k: tuple(v) for k, v in by_module.items()}
+        pool.by_book = {k: tuple(v) for k, v in by_book.items()}
+        pool.by_los = {k: tuple(v) for k, v in by_los.items()}
+        return pool
+
+    def __len__(self) -> int:
+        return len(self.question_ids)
+
+    def positions_for_ids(self, question_ids: Iterable[str]) -> List[int]:
+        """Positions of known question IDs (unknown IDs are skipped)."""
+        by_id = self.by_id
+        return [by_id[qid] for qid in dict.fromkeys(question_ids) if qid in by_id]
+
+    def take(self, positions: Iterable[int]) -> List[dict]:
+        question_ids = self.question_ids
+        index = get_question_index()
+        return [index.get(question_ids[p]) for p in positions]
+
+
+def sample_from_groups(groups: Sequence[Sequence[int]], k: int, exclude: set,
+                       rng: random.Random) -> List[int]:
+    """
+    Draw up to k distinct positions from the concatenation of groups, skipping
+    `exclude`, without materializing the concatenation.
+    """
+    offsets = list(accumulate(len(g) for g in groups))
+    total = offsets[-1] if offsets else 0
+    if not total or k <= 0:
+        return []
+
+    # At most len(exclude) draws can collide, so drawing that many
+    # extra slots always leaves k usable ones when they exist
+    draws = rng.sample(range(total), min(total, k + len(exclude)))
+
+    picked = []
+    for slot in draws:
+        group = bisect_right(offsets, slot)
+        start = offsets[group - 1] if group else 0
+        position = groups[group][slot - start]
+        if position not in exclude:
+            picked.append(position)
+            if len(picked) == k:
+                break
+    return picked
+
+
+def assemble_mock_exam(pool: QuestionPool,
+                       error_question_ids: Sequence[str],
+                       weak_modules: Iterable[Tuple[int, int]],
+                       total: int = MOCK_EXAM_QUESTIONS,
+                       rng: Optional[random.Random] = None) -> List[int]:
+    """
+    Pick positions for a mock exam: 30% from the user's errors, 30% from weak
+    modules and the rest at random, shuffled.
+    """
+    rng = rng or random.Random()
+
+    if len(pool) < total:
+        # Not enough questions, use all of them
+        positions = list(range(len(pool)))
+        rng.shuffle(positions)
+        return positions
+
+    used: set = set()
+    selected: List[int] = []
+
+    # 1. Questions the user got wrong
+    error_positions = pool.positions_for_ids(error_question_ids)
+    error_sample = rng.sample(error_positions, min(int(total * MOCK_EXAM_ERROR_SHARE), len(error_positions)))
+    selected.extend(error_sample)
+    used.update(error_sample)
+
+    # 2. Questions from weak modules
+    groups = [pool.by_module[m] for m in dict.fromkeys(weak_modules) if m in pool.by_module]
+    weak_sample = sample_from_groups(groups, int(total * MOCK_EXAM_WEAK_SHARE), used, rng)
+    selected.extend(weak_sample)
+    used.update(weak_sample)
+
+    # 3. Fill the rest at random
+    random_sample = sample_from_groups([range(len(pool))], total - len(selected), used, rng)
+    selected.extend(random_sample)
+
+    rng.shuffle(selected)
+    return selected
+
+
+def allocate_topic_quotas(available: Mapping[int, int], total: int,
+                          weights: Mapping[int, Tuple[float, float]] = TOPIC_WEIGHTS) -> Dict[int, int]:
+    """
+    Split `total` questions across books within their weight ranges.
+
+    Starts from the midpoint of each range (largest-remainder rounding),
+    clamps to [min, max] and to the questions available, then hands any
+    shortfall to books that still have room. When the pool cannot satisfy
+    a range, the book gets everything it has.
+    """
+    books = [b for b in weights if available.get(b, 0) > 0]
+    if not books:
+        return {}
+
+    midpoint = {b: sum(weights[b]) / 2 for b in books}
+    scale = total / sum(midpoint.values())
+    exact = {b: midpoint[b] * scale for b in books}
+    quotas = {b: int(exact[b]) for b in books}
+    for b in sorted(books, key=lambda b: exact[b] - quotas[b], reverse=True)[:total - sum(quotas.values())]:
+        quotas[b] += 1
+
+    upper = {b: min(available[b], math.floor(weights[b][1] * total)) for b in books}
+    lower = {b: min(available[b], math.ceil(weights[b][0] * total)) for b in books}
+    quotas = {b: max(lower[b], min(quotas[b], upper[b])) for b in books}
+
+    # Redistribute: first within the ranges, then beyond them if the pool is lopsided
+    for limit in (upper, available):
+        while sum(quotas.values()) < total:
+            room = [b for b in books if quotas[b] < limit[b]]
+            if not room:
+                break
+            # Give to the book furthest below its target share
+            b = min(room, key=lambda b: (quotas[b] / exact[b], b))
+            quotas[b] += 1
+
+    while sum(quotas.values()) > total:
+        b = max(books, key=lambda b: (quotas[b] / exact[b], -b))
+        quotas[b] -= 1
+
+    return quotas
+
+
+def _priority_keys(pool: QuestionPool, positions: Sequence[int],
+                   error_counts: Mapping[str, int],
+                   module_mastery: Mapping[Tuple[int, int], float],
+                   rng: random.Random) -> Dict[int, float]:
+    """
+    Efraimidis-Spirakis keys (u ** (1 / weight)) for weighted sampling
+    without replacement: the k largest keys are a weighted sample of size k.
+    """
+    keys = {}
+    question_ids = pool.question_ids
+    locations = pool.locations
+
+    for p in positions:
+        weight = 1.0 + ERROR_PRIORITY * error_counts.get(question_ids[p], 0)
+        mastery = module_mastery.get(locations[p])
+        if mastery is not None and mastery < WEAK_MASTERY_PERCENT:
+            weight += WEAK_MODULE_PRIORITY * (WEAK_MASTERY_PERCENT - mastery) / WEAK_MASTERY_PERCENT
+        keys[p] = rng.random() ** (1.0 / weight)
+
+    return keys
+
+
+def assemble_weighted_exam(pool: QuestionPool,
+                           error_counts: Mapping[str, int],
+                           module_mastery: Mapping[Tuple[int, int], float],
+                           total: int = MOCK_EXAM_QUESTIONS,
+                           seed: int = 0) -> List[int]:
+    """
+    Pick positions for a topic-weighted mock exam.
+
+    Each book gets a quota from TOPIC_WEIGHTS. Inside a book, every LOS is
+    covered once (as far as the quota allows) before the rest of the quota
+    is filled, and questions the user got wrong or from weak modules are
+    more likely to be drawn. The same seed, content version and user state
+    always produce the same exam.
+    """
+    rng = random.Random(seed)
+    available = {b: len(positions) for b, positions in pool.by_book.items()}
+    quotas = allocate_topic_quotas(available, total)
+
+    los_by_book: Dict[int, List[Tuple[int, ...]]] = {}
+    for (book_id, _), positions in sorted(pool.by_los.items()):
+        los_by_book.setdefault(book_id, []).append(positions)
+
+    selected: List[int] = []
+    for book_id in sorted(quotas):
+        quota = quotas[book_id]
+        keys = _priority_keys(pool, pool.by_book[book_id], error_counts, module_mastery, rng)
+
+        # LOS coverage: best candidate of each LOS, strongest LOS first
+        los_best = [max(positions, key=keys.__getitem__) for positions in los_by_book.get(book_id, [])]
+        picked = heapq.nlargest(quota, los_best, key=keys.__getitem__)
+
+        # Fill the rest of the quota by priority
+        chosen = set(picked)
+        rest = (p for p in pool.by_book[book_id] if p not in chosen)
+        picked.extend(heapq.nlargest(quota - len(picked), rest, key=keys.__getitem__))
+        selected.extend(picked)
+
+    rng.shuffle(selected)
+    return selected
+
+
+def get_question_pool() -> QuestionPool:
+    """Get the question pool for the current content version."""
+    return get_catalog().view("question_pool", QuestionPool.from_catalog)
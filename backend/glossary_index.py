@@ -0,0 +1,276 @@
+"""
+Glossary search indexes.
+
+GlossaryIndex is an inverted index over term_en, term_ru, definition_en,
+definition_ru and los_id ranked with BM25F, where hits in the term name weigh
+more than hits in the definition. SuggestIndex serves prefix autocomplete
+over term names, their abbreviations and LOS ids. Both are built once per
+content version.
+"""
+
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Tuple
+import heapq
+import math
+import re
+
+from .content import ContentCatalog, get_catalog
+
+# Indexed fields and their BM25F weights
+FIELD_WEIGHTS = {
+    "term_en": 3.0,
+    "term_ru": 3.0,
+    "definition_en": 1.0,
+    "definition_ru": 1.0,
+    "los_id": 2.0,
+}
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Query tokens also match indexed tokens they are a prefix of
+# ("amort" -> "amortization"), at a reduced weight
+PREFIX_WEIGHT = 0.5
+MAX_PREFIX_EXPANSIONS = 50
+
+STOPWORDS = frozenset({
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "is",
+    "it", "its", "of", "on", "or", "that", "the", "to", "with",
+    "а", "в", "во", "и", "или", "к", "на", "не", "о", "об", "от", "по", "с",
+    "со", "что", "это",
+})
+
+# Words; underscores join parts of one token, so "LOS_1a" stays "los_1a"
+TOKEN_RE = re.compile(r"[^\W_]+(?:_[^\W_]+)*")
+
+# Abbreviations given in parentheses: "Holding Period Return (HPR)", "(P/E)"
+ABBREVIATION_RE = re.compile(r"\(([A-ZА-ЯЁ][A-Za-zА-Яа-яЁё0-9/&\-]*[A-ZА-ЯЁ0-9])\)")
+
+# Largest number of suggestions a single request may ask for
+SUGGEST_MAX_LIMIT = 20
+
+# Suggestions for prefixes up to this length are precomputed
+SUGGEST_PRECOMPUTED_PREFIX = 2
+
+# Suggestion match kinds, best first
+MATCH_NAME = 0          # prefix of the full term name or an abbreviation
+MATCH_WORD = 1          # prefix of a later word in the term name
+
+
+def normalize(text: str) -> str:
+    """Lowercase and fold ё to е."""
+    return text.lower().replace("ё", "е")
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Split English/Russian text into normalized tokens, without stopwords."""
+    if not text:
+        return []
+    return [t for t in TOKEN_RE.findall(normalize(text)) if t not in STOPWORDS]
+
+
+class GlossaryIndex:
+    """
+    BM25F inverted index over glossary terms.
+
+    Postings store each (token, term) pair's precomputed score contribution,
+    so a query only sums a few short lists.
+    """
+
+    def __init__(self, terms: Sequence[dict]):
+        self.terms = tuple(terms)
+        self._postings: Dict[str, Tuple[Tuple[int, float], ...]] = {}
+        self._vocabulary: List[str] = []
+        self._build()
+
+    @classmethod
+    def from_catalog(cls, catalog: ContentCatalog) -> "GlossaryIndex":
+        return cls(catalog.all_terms())
+
+    def _build(self):
+        doc_count = len(self.terms)
+        if not doc_count:
+            return
+
+        # Per field token counts and lengths
+        field_tokens = {field: [] for field in FIELD_WEIGHTS}
+        for term in self.terms:
+            for field in FIELD_WEIGHTS:
+                field_tokens[field].append(tokenize(term.get(field)))
+
+        avg_length = {
+            field: (sum(len(t) for t in tokens) / doc_count) or 1.0
+            for field, tokens in field_tokens.items()
+        }
+
+        # Length-normalized, field-weighted term frequency per (token, doc)
+        weighted_tf: Dict[str, Dict[int, float]] = defaultdict(lambda: defaultdict(float))
+        for field, weight in FIELD_WEIGHTS.items():
+            for doc, tokens in enumerate(field_tokens[field]):
+                if not tokens:
+                    continue
+                norm = 1 - BM25_B + BM25_B * len(tokens) / avg_length[field]
+                for token in tokens:
+                    weighted_tf[token][doc] += weight / norm
+
+        postings = {}
+        for token, docs in weighted_tf.items():
+            df = len(docs)
+            idf = math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+            postings[token] = tuple(
+                (doc, idf * tf * (BM25_K1 + 1) / (tf + BM25_K1))
+                for doc, tf in docs.items()
+            )
+
+        self._postings = postings
+        self._vocabulary = sorted(postings)
+
+    def _expand(self, token: str) -> List[Tuple[str, float]]:
+        """Indexed tokens matching a query token, with their weights."""
+        matches = []
+        if token in self._postings:
+            matches.append((token, 1.0))
+
+        vocabulary = self._vocabulary
+        i = bisect_left(vocabulary, token)
+        while i < len(vocabulary) and len(matches) < MAX_PREFIX_EXPANSIONS:
+            candidate = vocabulary[i]
+            if not candidate.startswith(token):
+                break
+            if candidate != token:
+                matches.append((candidate, PREFIX_WEIGHT))
+            i += 1
+
+        return matches
+
+    def search(self, query: str, limit: int = 50, book_id: Optional[int] = None) -> List[dict]:
+        """
+        Rank terms for a query.
+
+        Terms matching more distinct query words come first, then by score.
+        """
+        query_tokens = list(dict.fromkeys(tokenize(query)))
+        if not query_tokens:
+            return []
+
+        scores: Dict[int, float] = defaultdict(float)
+        matched: Dict[int, int] = defaultdict(int)
+
+        for token in query_tokens:
+            best: Dict[int, float] = {}
+            for indexed_token, weight in self._expand(token):
+                for doc, score in self._postings[indexed_token]:
+                    score *= weight
+                    if score > best.get(doc, 0.0):
+                        best[doc] = score
+            for doc, score in best.items():
+                scores[doc] += score
+                matched[doc] += 1
+
+        terms = self.terms
+        if book_id is not None:
+            candidates = [doc for doc in scores if terms[doc].get("book_id") == book_id]
+        else:
+            candidates = scores
+
+        top = heapq.nlargest(limit, candidates, key=lambda doc: (matched[doc], scores[doc]))
+        return [terms[doc] for doc in top]
+
+
+class SuggestIndex:
+    """
+    Prefix autocomplete over EN/RU term names, abbreviations and LOS ids.
+
+    Keys are kept in one sorted array, so the candidates for a prefix are a
+    contiguous slice found by binary search. Results for 1-2 character
+    prefixes, whose slices are the longest, are precomputed.
+    """
+
+    def __init__(self, terms: Sequence[dict]):
+        self.terms = tuple(terms)
+        entries = []
+
+        for doc, term in enumerate(self.terms):
+            for field in ("term_en", "term_ru"):
+                name = term.get(field) or ""
+                words = normalize(name).split()
+                if not words:
+                    continue
+                entries.append((" ".join(words), MATCH_NAME, len(name), doc, name))
+                for i in range(1, len(words)):
+                    entries.append((" ".join(words[i:]), MATCH_WORD, len(name), doc, name))
+
+                for abbreviation in ABBREVIATION_RE.findall(name):
+                    entries.append((normalize(abbreviation), MATCH_NAME, len(abbreviation), doc, abbreviation))
+
+            los_id = term.get("los_id")
+            if los_id:
+                entries.append((normalize(los_id), MATCH_WORD, len(los_id), doc, los_id))
+
+        entries.sort()
+        self._keys = [e[0] for e in entries]
+        self._entries = [e[1:] for e in entries]
+
+        self._precomputed: Dict[str, List[Tuple[int, str]]] = {}
+        for key in set(k[:n] for k in self._keys for n in range(1, SUGGEST_PRECOMPUTED_PREFIX + 1)):
+            self._precomputed[key] = self._rank(key, SUGGEST_MAX_LIMIT)
+
+    @classmethod
+    def from_catalog(cls, catalog: ContentCatalog) -> "SuggestIndex":
+        return cls(catalog.all_terms())
+
+    def _rank(self, prefix: str, limit: int) -> List[Tuple[int, str]]:
+        """Best (doc, matched label) pairs for a normalized prefix."""
+        lo = bisect_left(self._keys, prefix)
+        hi = bisect_right(self._keys, prefix + "\uffff")
+
+        best: Dict[int, tuple] = {}
+        for kind, length, doc, label in self._entries[lo:hi]:
+            rank = (kind, length, label)
+            if doc not in best or rank < best[doc][0]:
+                best[doc] = (rank, label)
+
+        top = heapq.nsmallest(limit, best.items(), key=lambda item: item[1][0])
+        return [(doc, label) for doc, (_, label) in top]
+
+    def suggest(self, prefix: str, limit: int = 10, book_id: Optional[int] = None) -> List[dict]:
+        """Top matches for a prefix, as lightweight term summaries."""
+        prefix = " ".join(normalize(prefix).split())
+        if not prefix:
+            return []
+
+        limit = min(limit, SUGGEST_MAX_LIMIT)
+        if book_id is None and prefix in self._precomputed:
+            ranked = self._precomputed[prefix][:limit]
+        else:
+            ranked = self._rank(prefix, len(self.terms) if book_id is not None else limit)
+
+        results = []
+        for doc, label in ranked:
+            term = self.terms[doc]
+            if book_id is not None and term.get("book_id") != book_id:
+                continue
+            results.append({
+                "term_id": term.get("term_id"),
+                "term_en": term.get("term_en"),
+                "term_ru": term.get("term_ru"),
+                "book_id": term.get("book_id"),
+                "module_id": term.get("module_id"),
+                "match": label
+            })
+            if len(results) >= limit:
+                break
+
+        return results
+
+
+def get_glossary_index() -> GlossaryIndex:
+    """Get the glossary index for the current content version."""
+    return get_catalog().view("glossary_index", GlossaryIndex.from_catalog)
+
+
+def get_suggest_index() -> SuggestIndex:
+    """Get the autocomplete index for the current content version."""
+    return get_catalog().view("suggest_index", SuggestIndex.from_catalog)
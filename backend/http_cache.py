@@ -0,0 +1,253 @@
+"""
+Response helpers for large content endpoints.
+
+Cached JSON: a response body is serialized once per (endpoint, params,
+content version), given a content-hash ETag, and compressed lazily once per
+encoding (gzip, and brotli when the `brotli` package is installed). Building
+and compressing run in the threadpool, never on the event loop, and each
+encoding of a body is computed by one request while concurrent ones wait
+for it. Repeat requests are answered with 304 Not Modified or with the
+stored bytes.
+
+NDJSON streams: records are serialized one per line while they are sent,
+so exporting the whole corpus never builds the full document in memory.
+"""
+
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, Optional, Tuple
+import gzip
+import hashlib
+import json
+import os
+import threading
+
+from fastapi import Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+
+from .content import get_catalog
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Maximum number of cached response bodies (all encodings of one body count once)
+HTTP_CACHE_MAX_ENTRIES = int(os.getenv("HTTP_CACHE_MAX_ENTRIES", "256"))
+
+# Bodies smaller than this are not worth compressing
+MIN_COMPRESS_SIZE = 1024
+
+# Responses depend on the user's token, so shared caches must not store them
+CACHE_CONTROL = "private, no-cache"
+
+# NDJSON records serialized per chunk sent
+STREAM_BATCH_SIZE = 100
+
+# Compression levels: bodies are compressed on demand, while a request
+# waits, so favour speed over the last few percent of size
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def _compress_gzip(body: bytes) -> bytes:
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def _compress_brotli(body: bytes) -> bytes:
+    return brotli.compress(body, quality=BROTLI_QUALITY)
+
+
+# Supported encodings, in order of preference
+ENCODERS: Dict[str, Callable[[bytes], bytes]] = {}
+if brotli is not None:
+    ENCODERS["br"] = _compress_brotli
+ENCODERS["gzip"] = _compress_gzip
+
+
+class CachedBody:
+    """A serialized JSON body with its ETag and compressed variants."""
+
+    def __init__(self, payload: Any):
+        self.body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        # Weak: the same ETag covers every content-encoding of the body
+        self.etag = 'W/"%s"' % hashlib.blake2b(self.body, digest_size=16).hexdigest()
+        self._encoded: Dict[str, bytes] = {}
+        self._encode_lock = threading.Lock()
+
+    def ready(self, encoding: str) -> Optional[bytes]:
+        """The body in `encoding` if it has been compressed already."""
+        return self._encoded.get(encoding)
+
+    def encoded(self, encoding: str) -> bytes:
+        """The body in `encoding`, compressed on first use (blocking)."""
+        data = self._encoded.get(encoding)
+        if data is None:
+            with self._encode_lock:
+                data = self._encoded.get(encoding)
+                if data is None:
+                    data = ENCODERS[encoding](self.body)
+                    self._encoded[encoding] = data
+        return data
+
+
+async def encode_body(body, encoding: str) -> bytes:
+    """
+    `body.encoded(encoding)` (of a CachedBody or static Asset), compressing
+    it in the threadpool when it is not ready yet.
+    """
+    data = body.ready(encoding)
+    if data is None:
+        data = await run_in_threadpool(body.encoded, encoding)
+    return data
+
+
+class ResponseCache:
+    """LRU of CachedBody objects keyed by (content version, key)."""
+
+    def __init__(self, max_entries: int = HTTP_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[int, Hashable], CachedBody]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def lookup(self, key: Hashable) -> Optional[CachedBody]:
+        """The cached body for `key` at the current content version, if any."""
+        catalog = get_catalog()
+        catalog.refresh()
+        with self._lock:
+            cached = self._entries.get((catalog.version, key))
+            if cached is not None:
+                self._entries.move_to_end((catalog.version, key))
+            return cached
+
+    def get(self, key: Hashable, build: Callable[[], Any]) -> CachedBody:
+        """The cached body for `key`, built and serialized on a miss (blocking)."""
+        catalog = get_catalog()
+        catalog.refresh()
+        version = catalog.version
+        cache_key = (version, key)
+
+        with self._lock:
+            cached = self._entries.get(cache_key)
+            if cached is not None:
+                self._entries.move_to_end(cache_key)
+                return cached
+
+        cached = CachedBody(build())
+
+        # Content changed while building: serve the body but don't keep it
+        if catalog.version != version:
+            return cached
+
+        with self._lock:
+            self._entries[cache_key] = cached
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return cached
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_response_cache = ResponseCache()
+
+
+def _accepted_encodings(header: str) -> set:
+    """Encodings the client accepts (q=0 excluded)."""
+    accepted = set()
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        if coding:
+            accepted.add(coding)
+    return accepted
+
+
+def negotiate_encoding(request: Request) -> Optional[str]:
+    """Best supported content-encoding the client accepts, or None."""
+    accepted = _accepted_encodings(request.headers.get("accept-encoding", ""))
+    return next((e for e in ENCODERS if e in accepted), None)
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Whether the request's If-None-Match covers `etag`."""
+    header = request.headers.get("if-none-match")
+    return bool(header) and _etag_matches(header, etag)
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """If-None-Match comparison (weak, as required for GET)."""
+    if header.strip() == "*":
+        return True
+    tag = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == tag:
+            return True
+    return False
+
+
+async def cached_json_response(request: Request, key: Hashable, build: Callable[[], Any]) -> Response:
+    """
+    Serve a JSON payload through the response cache.
+
+    `key` must identify the endpoint and every parameter that shapes the
+    payload; `build` is only called on a cache miss, in the threadpool.
+    """
+    cached = _response_cache.lookup(key)
+    if cached is None:
+        cached = await run_in_threadpool(_response_cache.get, key, build)
+    headers = {
+        "ETag": cached.etag,
+        "Cache-Control": CACHE_CONTROL,
+        "Vary": "Accept-Encoding",
+    }
+
+    if etag_matches(request, cached.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    body = cached.body
+    if len(body) >= MIN_COMPRESS_SIZE:
+        encoding = negotiate_encoding(request)
+        if encoding is not None:
+            body = await encode_body(cached, encoding)
+            headers["Content-Encoding"] = encoding
+
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def _ndjson_chunks(records: Iterable[Any]) -> Iterator[bytes]:
+    batch = []
+    for record in records:
+        batch.append(json.dumps(record, ensure_ascii=False, separators=(",", ":")))
+        if len(batch) >= STREAM_BATCH_SIZE:
+            yield ("\n".join(batch) + "\n").encode("utf-8")
+            batch = []
+    if batch:
+        yield ("\n".join(batch) + "\n").encode("utf-8")
+
+
+def ndjson_response(records: Iterable[Any]) -> StreamingResponse:
+    """
+    Stream records as newline-delimited JSON.
+
+    `records` should be lazy (a generator); validate parameters before
+    calling, since errors after the first chunk can no longer change the
+    status code.
+    """
+    return StreamingResponse(
+        _ndjson_chunks(records),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": CACHE_CONTROL}
+    )
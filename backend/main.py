@@ -4,12 +4,21 @@ CFA Level 1 Trainer - FastAPI Backend Application
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
+import logging
 import os
 
 from .database import init_db
-from .routers import users, progress, tests, errors, glossary, calculator
+from .routers import users, progress, tests, errors, glossary, calculator, assets
+from .static_assets import get_static_assets
+from .pagination import NEXT_CURSOR_HEADER
+
+# Level of the backend.* loggers (uvicorn only configures its own loggers)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+
+logging.basicConfig(format="%(levelname)s:     %(name)s - %(message)s")
+logging.getLogger("backend").setLevel(LOG_LEVEL)
+logger = logging.getLogger(__name__)
 
 
 @asynccontextmanager
@@ -20,10 +29,12 @@ async def lifespan(app: FastAPI):
     """
     # Startup: Initialize database
     init_db()
-    print("Database initialized")
+    logger.info("Database initialized")
+    # Fingerprint frontend assets before the first request
+    get_static_assets().refresh(force=True)
     yield
     # Shutdown: cleanup if needed
-    print("Application shutting down")
+    logger.info("Application shutting down")
 
 
 # Create FastAPI application
@@ -50,6 +61,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "X-Exam-Seed"],
 )
 
 # Include routers
@@ -59,6 +71,7 @@ app.include_router(tests.router)
 app.include_router(errors.router)
 app.include_router(glossary.router)
 app.include_router(calculator.router)
+app.include_router(assets.router)
 
 
 @app.get("/")
@@ -79,8 +92,7 @@ async def health_check():
     return {"status": "healthy"}
 
 
-# Mount static files for frontend (when running together)
-# Uncomment when frontend is ready:
-# frontend_path = os.path.join(os.path.dirname(__file__), "..", "frontend")
-# if os.path.exists(frontend_path):
-#     app.mount("/", StaticFiles(directory=frontend_path, html=True), name="frontend")
+# Plain paths of the published frontend files (when running together).
+# /app serves index.html with fingerprinted URLs (/static/...); this is the
+# revalidated fallback for the same files. Must stay the last route.
+app.include_router(assets.fallback_router)
@@ -0,0 +1,315 @@
+"""
+Versioned schema migrations for CFA Trainer.
+
+`init_db` creates missing tables with `create_all`, which never changes
+tables that already exist. Changes to existing tables (indexes, columns,
+data fixes) are applied here, in order, each exactly once per database.
+Applied versions are recorded in the schema_migrations table.
+
+Migrations must be safe on a database freshly created by `create_all`
+(use IF NOT EXISTS, tolerate empty tables), and must not import the
+models: they describe the schema as it was when they were written.
+"""
+
+from typing import Callable, List, Optional, Tuple
+from datetime import datetime
+import json
+import logging
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+from .content import get_question_index
+
+logger = logging.getLogger(__name__)
+
+# Test results converted per batch by the question_attempts backfill
+BACKFILL_BATCH_SIZE = 500
+
+
+def _dedupe_user_progress(conn: Connection):
+    """
+    Merge duplicate progress rows into the newest one per user/book/module,
+    the way /api/progress/sync merges progress: the highest counts win and
+    mastery is recomputed from them.
+    """
+    duplicates = """
+        WHERE id IN (
+            SELECT MAX(id) FROM user_progress
+            GROUP BY user_id, book_id, module_id
+            HAVING COUNT(*) > 1
+        )
+    """
+    conn.execute(text("""
+        UPDATE user_progress SET
+            questions_seen = (
+                SELECT MAX(p.questions_seen) FROM user_progress p
+                WHERE p.user_id = user_progress.user_id
+                  AND p.book_id = user_progress.book_id
+                  AND p.module_id = user_progress.module_id
+            ),
+            questions_correct = (
+                SELECT MAX(p.questions_correct) FROM user_progress p
+                WHERE p.user_id = user_progress.user_id
+                  AND p.book_id = user_progress.book_id
+                  AND p.module_id = user_progress.module_id
+            ),
+            is_unlocked = (
+                SELECT MAX(p.is_unlocked) FROM user_progress p
+                WHERE p.user_id = user_progress.user_id
+                  AND p.book_id = user_progress.book_id
+                  AND p.module_id = user_progress.module_id
+            ),
+            completed_at = (
+                SELECT MIN(p.completed_at) FROM user_progress p
+                WHERE p.user_id = user_progress.user_id
+                  AND p.book_id = user_progress.book_id
+                  AND p.module_id = user_progress.module_id
+            )
+    """ + duplicates))
+    conn.execute(text("""
+        UPDATE user_progress SET mastery_percent = CASE
+            WHEN questions_seen > 0 THEN questions_correct * 100.0 / questions_seen
+            ELSE 0
+        END
+    """ + duplicates))
+    conn.execute(text("""
+        DELETE FROM user_progress WHERE id NOT IN (
+            SELECT MAX(id) FROM user_progress
+            GROUP BY user_id, book_id, module_id
+        )
+    """))
+
+
+def _dedupe_user_errors(conn: Connection):
+    """Merge duplicate error rows into the newest one per user/question."""
+    conn.execute(text("""
+        UPDATE user_errors SET
+            error_count = (
+                SELECT SUM(e.error_count) FROM user_errors e
+                WHERE e.user_id = user_errors.user_id AND e.question_id = user_errors.question_id
+            ),
+            last_error_at = (
+                SELECT MAX(e.last_error_at) FROM user_errors e
+                WHERE e.user_id = user_errors.user_id AND e.question_id = user_errors.question_id
+            ),
+            next_review_at = (
+                SELECT MIN(e.next_review_at) FROM user_errors e
+                WHERE e.user_id = user_errors.user_id AND e.question_id = user_errors.question_id
+            )
+        WHERE id IN (
+            SELECT MAX(id) FROM user_errors
+            GROUP BY user_id, question_id
+            HAVING COUNT(*) > 1
+        )
+    """))
+    conn.execute(text("""
+        DELETE FROM user_errors WHERE id NOT IN (
+            SELECT MAX(id) FROM user_errors
+            GROUP BY user_id, question_id
+        )
+    """))
+
+
+def _001_progress_and_error_indexes(conn: Connection):
+    _dedupe_user_progress(conn)
+    _dedupe_user_errors(conn)
+    for statement in (
+        "CREATE UNIQUE INDEX IF NOT EXISTS ix_user_progress_user_book_module "
+        "ON user_progress (user_id, book_id, module_id)",
+        "CREATE UNIQUE INDEX IF NOT EXISTS ix_user_errors_user_question "
+        "ON user_errors (user_id, question_id)",
+        "CREATE INDEX IF NOT EXISTS ix_user_errors_user_next_review "
+        "ON user_errors (user_id, next_review_at)",
+        "CREATE INDEX IF NOT EXISTS ix_test_results_user_created "
+        "ON test_results (user_id, created_at)",
+        "CREATE INDEX IF NOT EXISTS ix_calculator_sessions_user_id "
+        "ON calculator_sessions (user_id)",
+    ):
+        conn.execute(text(statement))
+
+
+def _answer_text(value) -> Optional[str]:
+    return None if value is None else str(value)[:50]
+
+
+def _seconds(value) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _002_backfill_question_attempts(conn: Connection):
+    """
+    Copy the question_details JSON of existing test results into
+    question_attempts (the table itself is created by create_all).
+
+    Results that already have attempts are skipped, so the copy can be
+    rerun. Locations come from the current content, falling back to the
+    test's own book/module.
+    """
+    question_index = get_question_index()
+    last_id = 0
+
+    while True:
+        results = conn.execute(text("""
+            SELECT id, user_id, book_id, module_id, question_details, created_at
+            FROM test_results
+            WHERE id > :last_id
+              AND question_details IS NOT NULL
+              AND NOT EXISTS (
+                  SELECT 1 FROM question_attempts a WHERE a.test_result_id = test_results.id
+              )
+            ORDER BY id
+            LIMIT :batch
+        """), {"last_id": last_id, "batch": BACKFILL_BATCH_SIZE}).all()
+        if not results:
+            break
+
+        attempts = []
+        for result in results:
+            details = result.question_details
+            if isinstance(details, str):
+                details = json.loads(details)
+            for detail in details or []:
+                question_id = detail.get("question_id") if isinstance(detail, dict) else None
+                if not question_id:
+                    continue
+                book_id, module_id = question_index.location(question_id) or (result.book_id or 0, result.module_id or 0)
+                attempts.append({
+                    "user_id": result.user_id,
+                    "test_result_id": result.id,
+                    "question_id": question_id,
+                    "book_id": book_id,
+                    "module_id": module_id,
+                    "los_id": (question_index.get(question_id) or {}).get("los_id"),
+                    "user_answer": _answer_text(detail.get("user_answer")),
+                    "correct": bool(detail.get("correct", False)),
+                    "time_spent_seconds": _seconds(detail.get("time_spent")),
+                    "created_at": result.created_at,
+                })
+
+        if attempts:
+            conn.execute(text("""
+                INSERT INTO question_attempts (
+                    user_id, test_result_id, question_id, book_id, module_id, los_id,
+                    user_answer, correct, time_spent_seconds, created_at
+                ) VALUES (
+                    :user_id, :test_result_id, :question_id, :book_id, :module_id, :los_id,
+                    :user_answer, :correct, :time_spent_seconds, :created_at
+                )
+            """), attempts)
+        last_id = results[-1].id
+
+
+def _003_user_stats(conn: Connection):
+    """
+    Fill user_error_stats and user_calculator_stats (created by create_all)
+    from the existing rows, and add the indexes behind the stats queries.
+    """
+    now = datetime.utcnow()
+    conn.execute(text("DELETE FROM user_error_stats"))
+    conn.execute(text("""
+        INSERT INTO user_error_stats (user_id, book_id, error_count, mastered_count, updated_at)
+        SELECT user_id, book_id, COUNT(*),
+               SUM(CASE WHEN review_interval_days >= 30 THEN 1 ELSE 0 END), :now
+        FROM user_errors
+        GROUP BY user_id, book_id
+    """), {"now": now})
+    conn.execute(text("DELETE FROM user_calculator_stats"))
+    conn.execute(text("""
+        INSERT INTO user_calculator_stats (user_id, worksheet_type, attempts, correct, updated_at)
+        SELECT user_id, worksheet_type, COUNT(*),
+               SUM(CASE WHEN is_correct THEN 1 ELSE 0 END), :now
+        FROM calculator_sessions
+        GROUP BY user_id, worksheet_type
+    """), {"now": now})
+
+    for statement in (
+        "CREATE INDEX IF NOT EXISTS ix_user_errors_user_error_count "
+        "ON user_errors (user_id, error_count, id)",
+        "CREATE INDEX IF NOT EXISTS ix_calculator_sessions_user_created "
+        "ON calculator_sessions (user_id, created_at, id)",
+        # Superseded by ix_calculator_sessions_user_created
+        "DROP INDEX IF EXISTS ix_calculator_sessions_user_id",
+    ):
+        conn.execute(text(statement))
+
+
+def _004_keyset_pagination_indexes(conn: Connection):
+    for statement in (
+        # Add id to the history index so (created_at, id) is fully indexed
+        "DROP INDEX IF EXISTS ix_test_results_user_created",
+        "CREATE INDEX ix_test_results_user_created "
+        "ON test_results (user_id, created_at, id)",
+        "CREATE INDEX IF NOT EXISTS ix_user_errors_user_book_error_count "
+        "ON user_errors (user_id, book_id, error_count, id)",
+    ):
+        conn.execute(text(statement))
+
+
+def _005_review_scheduler_state(conn: Connection):
+    """
+    Add per-error SM-2 state. Repetitions are recovered from the position of
+    the current interval in the old fixed ladder (1, 3, 7, 14, 30, 60 days).
+    """
+    columns = {column["name"] for column in inspect(conn).get_columns("user_errors")}
+    if "ease_factor" not in columns:
+        conn.execute(text("ALTER TABLE user_errors ADD COLUMN ease_factor FLOAT NOT NULL DEFAULT 2.5"))
+    if "repetitions" not in columns:
+        conn.execute(text("ALTER TABLE user_errors ADD COLUMN repetitions INTEGER NOT NULL DEFAULT 0"))
+
+    conn.execute(text("""
+        UPDATE user_errors SET repetitions = CASE
+            WHEN review_interval_days >= 60 THEN 5
+            WHEN review_interval_days >= 30 THEN 4
+            WHEN review_interval_days >= 14 THEN 3
+            WHEN review_interval_days >= 7 THEN 2
+            WHEN review_interval_days >= 3 THEN 1
+            ELSE 0
+        END
+        WHERE repetitions = 0
+    """))
+
+
+# (version, name, migration), in the order they must be applied
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "progress_and_error_indexes", _001_progress_and_error_indexes),
+    (2, "backfill_question_attempts", _002_backfill_question_attempts),
+    (3, "user_stats", _003_user_stats),
+    (4, "keyset_pagination_indexes", _004_keyset_pagination_indexes),
+    (5, "review_scheduler_state", _005_review_scheduler_state),
+]
+
+
+def run_migrations(engine: Engine) -> List[int]:
+    """
+    Apply pending migrations, each in its own transaction.
+
+    Returns the versions applied by this call.
+    """
+    with engine.begin() as conn:
+        conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INTEGER PRIMARY KEY,
+                name VARCHAR(100) NOT NULL,
+                applied_at DATETIME NOT NULL
+            )
+        """))
+        applied = {row[0] for row in conn.execute(text("SELECT version FROM schema_migrations"))}
+
+    newly_applied = []
+    for version, name, migrate in MIGRATIONS:
+        if version in applied:
+            continue
+        with engine.begin() as conn:
+            migrate(conn)
+            conn.execute(
+                text("INSERT INTO schema_migrations (version, name, applied_at) VALUES (:version, :name, :applied_at)"),
+                {"version": version, "name": name, "applied_at": datetime.utcnow()}
+            )
+        logger.info("Applied migration %03d %s", version, name)
+        newly_applied.append(version)
+
+    return newly_applied
@@ -4,7 +4,7 @@ SQLAlchemy models for CFA Trainer database.
 
 from sqlalchemy import (
     Column, Integer, String, Float, Boolean,
-    DateTime, ForeignKey, JSON, Text
+    DateTime, ForeignKey, JSON, Text, Index
 )
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -28,6 +28,10 @@ class User(Base):
     test_results = relationship("TestResult", back_populates="user", cascade="all, delete-orphan")
     errors = relationship("UserError", back_populates="user", cascade="all, delete-orphan")
     calculator_sessions = relationship("CalculatorSession", back_populates="user", cascade="all, delete-orphan")
+    question_attempts = relationship("QuestionAttempt", back_populates="user", cascade="all, delete-orphan")
+    error_stats = relationship("UserErrorStats", back_populates="user", cascade="all, delete-orphan")
+    calculator_stats = relationship("UserCalculatorStats", back_populates="user", cascade="all, delete-orphan")
+    exam_sessions = relationship("ExamSession", back_populates="user", cascade="all, delete-orphan")
 
 
 class UserProgress(Base):
@@ -55,11 +59,11 @@ class UserProgress(Base):
     # Relationship
     user = relationship("User", back_populates="progress")
 
-    class Config:
-        # Unique constraint: one progress record per user/book/module
-        __table_args__ = (
-            {"sqlite_autoincrement": True},
-        )
+    __table_args__ = (
+        # One progress record per user/book/module
+        Index("ix_user_progress_user_book_module", "user_id", "book_id", "module_id", unique=True),
+        {"sqlite_autoincrement": True},
+    )
 
 
 class TestResult(Base):
@@ -81,15 +85,22 @@ class TestResult(Base):
     score_percent = Column(Float, nullable=False)
     time_spent_seconds = Column(Integer, nullable=False)
 
-    # Detailed question results
+    # Legacy per-question results, only set on results submitted before
+    # question_attempts existed (migration 002 copied them there)
     # Format: [{"question_id": "QM-1-001", "user_answer": "A", "correct": false, "time_spent": 45}]
     question_details = Column(JSON, nullable=True)
 
     # Timestamp
     created_at = Column(DateTime, default=datetime.utcnow)
 
-    # Relationship
+    # Relationships
     user = relationship("User", back_populates="test_results")
+    attempts = relationship("QuestionAttempt", back_populates="test_result", cascade="all, delete-orphan")
+
+    __table_args__ = (
+        # History: latest results of a user, keyset-paginated on (created_at, id)
+        Index("ix_test_results_user_created", "user_id", "created_at", "id"),
+    )
 
 
 class UserError(Base):
@@ -109,7 +120,9 @@ class UserError(Base):
 
     # Spaced Repetition fields
     next_review_at = Column(DateTime, nullable=True)
-    review_interval_days = Column(Integer, default=1)  # SM-2 interval: 1, 3, 7, 14, 30, 60
+    review_interval_days = Column(Integer, default=1)  # days until the next review
+    ease_factor = Column(Float, nullable=False, default=2.5)  # SM-2 interval multiplier
+    repetitions = Column(Integer, nullable=False, default=0)  # successful reviews in a row
 
     # Timestamps
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -118,6 +131,74 @@ class UserError(Base):
     # Relationship
     user = relationship("User", back_populates="errors")
 
+    __table_args__ = (
+        # One error record per user/question
+        Index("ix_user_errors_user_question", "user_id", "question_id", unique=True),
+        # Review queue: due errors of a user
+        Index("ix_user_errors_user_next_review", "user_id", "next_review_at"),
+        # Most problematic errors of a user, keyset-paginated on (error_count, id)
+        Index("ix_user_errors_user_error_count", "user_id", "error_count", "id"),
+        Index("ix_user_errors_user_book_error_count", "user_id", "book_id", "error_count", "id"),
+    )
+
+
+class UserErrorStats(Base):
+    """Per-user, per-book error counters, kept in step with user_errors."""
+    __tablename__ = "user_error_stats"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    book_id = Column(Integer, nullable=False)
+
+    error_count = Column(Integer, nullable=False, default=0)      # error records
+    mastered_count = Column(Integer, nullable=False, default=0)   # records with a long review interval
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Relationship
+    user = relationship("User", back_populates="error_stats")
+
+    __table_args__ = (
+        Index("ix_user_error_stats_user_book", "user_id", "book_id", unique=True),
+    )
+
+
+class QuestionAttempt(Base):
+    """One answered question of a submitted test."""
+    __tablename__ = "question_attempts"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    test_result_id = Column(Integer, ForeignKey("test_results.id"), nullable=False, index=True)
+
+    # Question location (from content; the test's book/module if unknown)
+    question_id = Column(String(50), nullable=False)
+    book_id = Column(Integer, nullable=False)
+    module_id = Column(Integer, nullable=False)
+    los_id = Column(String(20), nullable=True)
+
+    # Answer
+    user_answer = Column(String(50), nullable=True)
+    correct = Column(Boolean, nullable=False)
+    time_spent_seconds = Column(Integer, nullable=True)
+
+    # Timestamp (same as the test result)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    # Relationships
+    user = relationship("User", back_populates="question_attempts")
+    test_result = relationship("TestResult", back_populates="attempts")
+
+    __table_args__ = (
+        # Answer history of a user per question
+        Index("ix_question_attempts_user_question", "user_id", "question_id"),
+        # Per-module / per-LOS accuracy of a user
+        Index("ix_question_attempts_user_book_module", "user_id", "book_id", "module_id"),
+        # Accuracy across all users per question and per LOS
+        Index("ix_question_attempts_question", "question_id"),
+        Index("ix_question_attempts_book_los", "book_id", "los_id"),
+    )
+
 
 class CalculatorSession(Base):
     """Tracks calculator practice sessions."""
@@ -144,3 +225,60 @@ class CalculatorSession(Base):
 
     # Relationship
     user = relationship("User", back_populates="calculator_sessions")
+
+    __table_args__ = (
+        # Recent sessions of a user
+        Index("ix_calculator_sessions_user_created", "user_id", "created_at", "id"),
+    )
+
+
+class UserCalculatorStats(Base):
+    """Per-user, per-worksheet calculator counters, kept in step with calculator_sessions."""
+    __tablename__ = "user_calculator_stats"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    worksheet_type = Column(String(20), nullable=False)
+
+    attempts = Column(Integer, nullable=False, default=0)
+    correct = Column(Integer, nullable=False, default=0)
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Relationship
+    user = relationship("User", back_populates="calculator_stats")
+
+    __table_args__ = (
+        Index("ix_user_calculator_stats_user_worksheet", "user_id", "worksheet_type", unique=True),
+    )
+
+
+class ExamSession(Base):
+    """Server-side exam session: a generated question list delivered in pages."""
+    __tablename__ = "exam_sessions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+
+    # Generation parameters (same mode + seed regenerate the same paper)
+    mode = Column(String(20), nullable=False)       # "adaptive", "weighted"
+    seed = Column(Integer, nullable=False)
+    test_type = Column(String(20), nullable=False, default="mock_exam")
+    test_mode = Column(String(20), nullable=False, default="standard")
+
+    # Ordered question IDs; questions themselves are resolved from content
+    question_ids = Column(JSON, nullable=False)
+
+    # Answers recorded so far
+    # Format: {"QM-1-Q013": {"user_answer": "opt3", "time_spent": 45}}
+    answers = Column(JSON, nullable=False, default=dict)
+
+    status = Column(String(20), nullable=False, default="in_progress")  # "in_progress", "completed"
+    test_result_id = Column(Integer, ForeignKey("test_results.id"), nullable=True)
+
+    # Timestamps
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Relationship
+    user = relationship("User", back_populates="exam_sessions")
@@ -0,0 +1,57 @@
+"""
+Opaque cursors for keyset pagination.
+
+A cursor carries the sort key of the last row of a page, so the next page
+is a range scan on an index that starts right after it: page 1000 costs
+the same as page 1. Cursors are base64url-encoded JSON tagged with the
+list they belong to; clients pass them back unchanged.
+"""
+
+from typing import Any, Tuple
+from datetime import datetime
+import base64
+import json
+
+from fastapi import HTTPException, status
+
+# Response header with the cursor of the next page (absent on the last page)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# Largest page a keyset-paginated endpoint returns
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(kind: str, *key: Any) -> str:
+    """Encode a sort key (ints, strings, datetimes) as a cursor for `kind`."""
+    values = [{"dt": v.isoformat()} if isinstance(v, datetime) else v for v in key]
+    raw = json.dumps([kind, values], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def _decode_value(value: Any, kind: type) -> Any:
+    if kind is datetime:
+        return datetime.fromisoformat(value["dt"])
+    # bool is an int subclass; sort keys here are counts, ids and positions
+    if not isinstance(value, kind) or isinstance(value, bool) or (kind is int and value < 0):
+        raise ValueError(value)
+    return value
+
+
+def decode_cursor(cursor: str, kind: str, *types: type) -> Tuple[Any, ...]:
+    """
+    Decode a cursor made by encode_cursor(kind, ...), or raise 400.
+
+    `types` gives the type of each key value (int, str or datetime); ints
+    must be non-negative. Anything else is rejected as an invalid cursor.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_kind, values = json.loads(raw)
+        if cursor_kind != kind or not isinstance(values, list) or len(values) != len(types):
+            raise ValueError(cursor_kind)
+        return tuple(_decode_value(v, t) for v, t in zip(values, types))
+    except (ValueError, TypeError, KeyError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
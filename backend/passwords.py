@@ -0,0 +1,168 @@
+"""
+Password hashing.
+
+Hashes are stored as "<algorithm>$<parameters>$<salt>$<hash>", so the
+algorithm and its cost can change without invalidating existing
+passwords: every known format verifies, and `needs_rehash` tells login to
+re-hash a password whose stored format is not the current one. Hashes
+from before the prefix existed ("salt$hash", 100,000 rounds of SHA-256
+in Python) still verify and are upgraded on the next login.
+
+PBKDF2 and scrypt run inside OpenSSL and release the GIL, so the async
+helpers run them on a small dedicated thread pool: a burst of logins uses
+at most HASH_WORKERS threads and never blocks the event loop.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+import asyncio
+import hashlib
+import hmac
+import os
+import secrets
+
+# Hasher for new passwords: "pbkdf2_sha256" or "scrypt"
+PASSWORD_HASHER = os.getenv("PASSWORD_HASHER", "pbkdf2_sha256")
+
+# PBKDF2-HMAC-SHA256 iterations (each costs two SHA-256 compressions)
+PBKDF2_ITERATIONS = int(os.getenv("PBKDF2_ITERATIONS", "600000"))
+
+# scrypt cost parameters (memory use is 128 * n * r bytes)
+SCRYPT_N = int(os.getenv("SCRYPT_N", str(2 ** 14)))
+SCRYPT_R = int(os.getenv("SCRYPT_R", "8"))
+SCRYPT_P = int(os.getenv("SCRYPT_P", "1"))
+
+# Threads that run password hashing
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+SALT_BYTES = 16
+
+# Rounds of the pre-prefix "salt$hash" format
+LEGACY_ITERATIONS = 100000
+
+
+class PBKDF2Hasher:
+    """pbkdf2_sha256$<iterations>$<salt>$<hash>"""
+    algorithm = "pbkdf2_sha256"
+
+    def __init__(self, iterations: int = PBKDF2_ITERATIONS):
+        self.iterations = iterations
+
+    def _derive(self, password: str, salt: str, iterations: int) -> str:
+        return hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt.encode("utf-8"), iterations).hex()
+
+    def hash(self, password: str) -> str:
+        salt = secrets.token_hex(SALT_BYTES)
+        return f"{self.algorithm}${self.iterations}${salt}${self._derive(password, salt, self.iterations)}"
+
+    def verify(self, password: str, encoded: str) -> bool:
+        _, iterations, salt, stored_hash = encoded.split("$")
+        return hmac.compare_digest(self._derive(password, salt, int(iterations)), stored_hash)
+
+    def needs_update(self, encoded: str) -> bool:
+        return int(encoded.split("$")[1]) < self.iterations
+
+
+class ScryptHasher:
+    """scrypt$<n>,<r>,<p>$<salt>$<hash>"""
+    algorithm = "scrypt"
+
+    def __init__(self, n: int = SCRYPT_N, r: int = SCRYPT_R, p: int = SCRYPT_P):
+        self.params = (n, r, p)
+
+    def _derive(self, password: str, salt: str, n: int, r: int, p: int) -> str:
+        return hashlib.scrypt(
+            password.encode("utf-8"), salt=salt.encode("utf-8"),
+            n=n, r=r, p=p, maxmem=256 * n * r * p, dklen=32
+        ).hex()
+
+    def hash(self, password: str) -> str:
+        salt = secrets.token_hex(SALT_BYTES)
+        params = ",".join(str(v) for v in self.params)
+        return f"{self.algorithm}${params}${salt}${self._derive(password, salt, *self.params)}"
+
+    def verify(self, password: str, encoded: str) -> bool:
+        _, params, salt, stored_hash = encoded.split("$")
+        n, r, p = (int(v) for v in params.split(","))
+        return hmac.compare_digest(self._derive(password, salt, n, r, p), stored_hash)
+
+    def needs_update(self, encoded: str) -> bool:
+        return tuple(int(v) for v in encoded.split("$")[1].split(",")) != self.params
+
+
+class LegacySHA256Hasher:
+    """salt$hash: iterated hex SHA-256, verify only."""
+    algorithm = "legacy_sha256"
+
+    def verify(self, password: str, encoded: str) -> bool:
+        salt, stored_hash = encoded.split("$")
+        result = password + salt
+        for _ in range(LEGACY_ITERATIONS):
+            result = hashlib.sha256(result.encode("utf-8")).hexdigest()
+        return hmac.compare_digest(result, stored_hash)
+
+    def needs_update(self, encoded: str) -> bool:
+        return True
+
+
+HASHERS: Dict[str, object] = {
+    hasher.algorithm: hasher
+    for hasher in (PBKDF2Hasher(), ScryptHasher(), LegacySHA256Hasher())
+}
+
+if PASSWORD_HASHER not in (PBKDF2Hasher.algorithm, ScryptHasher.algorithm):
+    raise ValueError(f"Unknown PASSWORD_HASHER {PASSWORD_HASHER!r}, expected one of "
+                     f"{[PBKDF2Hasher.algorithm, ScryptHasher.algorithm]}")
+
+
+def _identify(encoded: str):
+    """Hasher that produced a stored hash, or None for an unknown format."""
+    prefix, _, rest = encoded.partition("$")
+    if prefix in HASHERS:
+        return HASHERS[prefix]
+    if rest and "$" not in rest:
+        return HASHERS[LegacySHA256Hasher.algorithm]
+    return None
+
+
+def hash_password(password: str) -> str:
+    """Hash a password with the configured hasher."""
+    return HASHERS[PASSWORD_HASHER].hash(password)
+
+
+def verify_password(password: str, encoded: str) -> bool:
+    """Check a password against a stored hash of any known format."""
+    hasher = _identify(encoded)
+    try:
+        return hasher is not None and hasher.verify(password, encoded)
+    except ValueError:
+        return False
+
+
+def needs_rehash(encoded: str) -> bool:
+    """Whether a stored hash is not in the configured format and cost."""
+    hasher = _identify(encoded)
+    try:
+        return hasher is None or hasher.algorithm != PASSWORD_HASHER or hasher.needs_update(encoded)
+    except ValueError:
+        return True
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _run_in_pool(fn: Callable, *args):
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix="password-hash")
+    return asyncio.get_running_loop().run_in_executor(_executor, fn, *args)
+
+
+async def hash_password_async(password: str) -> str:
+    """hash_password on the hashing pool."""
+    return await _run_in_pool(hash_password, password)
+
+
+async def verify_password_async(password: str, encoded: str) -> bool:
+    """verify_password on the hashing pool."""
+    return await _run_in_pool(verify_password, password, encoded)
@@ -0,0 +1,202 @@
+"""
+Field and language projections of content.
+
+Test endpoints can send questions in two shapes: the full question, or the
+"delivery" projection (stem, options and table) with explanations fetched
+later in one batch. Questions, glossary terms and book structures can also
+be reduced to one language (lang=en|ru) instead of carrying both.
+
+Projected dicts are built once per item, shape and content version and
+shared between requests, so they must be treated as read-only.
+"""
+
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Sequence, Tuple
+import os
+import threading
+
+from fastapi import HTTPException, status
+
+from .content import ContentCatalog, get_catalog
+from .schemas import QuestionDeliveryResponse, QuestionExplanationResponse
+
+# Values of the `fields` query parameter
+FIELDS_FULL = "full"
+FIELDS_DELIVERY = "delivery"
+FIELDS_EXPLANATION = "explanation"
+FIELD_SETS = (FIELDS_FULL, FIELDS_DELIVERY)
+
+# Keys kept by each projection (taken from the response schemas)
+PROJECTION_KEYS = {
+    FIELDS_DELIVERY: tuple(QuestionDeliveryResponse.model_fields),
+    FIELDS_EXPLANATION: tuple(QuestionExplanationResponse.model_fields),
+}
+
+# Values of the `lang` query parameter
+LANG_EN = "en"
+LANG_RU = "ru"
+LANG_BOTH = "both"
+LANGUAGES = (LANG_EN, LANG_RU, LANG_BOTH)
+
+# (English key, Russian key) pairs per kind of content
+QUESTION_TRANSLATIONS = (("question_text", "question_text_ru"), ("explanation", "explanation_ru"))
+EXPLANATION_WRONG_TRANSLATIONS = (("text", "text_ru"),)
+TERM_TRANSLATIONS = (("term_en", "term_ru"), ("definition_en", "definition_ru"))
+BOOK_TRANSLATIONS = (("book_name", "book_name_ru"), ("module_name", "module_name_ru"))
+
+# Largest number of question IDs one explanations request may ask for
+MAX_EXPLANATION_IDS = 200
+
+# Single question/term projections kept per content version (least recently
+# used are dropped); list and book projections are few and always kept
+PROJECTION_CACHE_MAX_ENTRIES = int(os.getenv("PROJECTION_CACHE_MAX_ENTRIES", "10000"))
+
+
+def check_fields(fields: str):
+    """Validate the `fields` query parameter."""
+    if fields not in FIELD_SETS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid fields. Must be one of: {list(FIELD_SETS)}"
+        )
+
+
+def check_lang(lang: str):
+    """Validate the `lang` query parameter."""
+    if lang not in LANGUAGES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid lang. Must be one of: {list(LANGUAGES)}"
+        )
+
+
+def translate(item: dict, pairs: Sequence[Tuple[str, str]], lang: str) -> dict:
+    """
+    Keep one language of each (English, Russian) key pair.
+
+    en drops the Russian keys. ru drops the English keys, except where the
+    Russian text is empty; then the English text is kept as a fallback.
+    """
+    if lang == LANG_BOTH:
+        return item
+
+    projected = dict(item)
+    for en_key, ru_key in pairs:
+        if lang == LANG_RU and projected.get(ru_key):
+            projected.pop(en_key, None)
+        else:
+            projected.pop(ru_key, None)
+    return projected
+
+
+class ContentProjector:
+    """
+    Memoized projections for one content version.
+
+    A projector is made per content version (see get_projector), so its
+    entries are keyed by item ID and shape alone. Projections are built
+    lazily, the first time an item is requested in a given shape. Term
+    lists and books are kept for the life of the version; single questions
+    and terms go through a bounded LRU, so a large (bundle) corpus is not
+    pinned in memory.
+    """
+
+    def __init__(self, version: int = 0, max_items: int = PROJECTION_CACHE_MAX_ENTRIES):
+        self.version = version
+        self.max_items = max_items
+        self._views: Dict[Hashable, Any] = {}
+        self._items: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_catalog(cls, catalog: ContentCatalog) -> "ContentProjector":
+        return cls(catalog.version)
+
+    def _view(self, key: Hashable, build: Callable[[], Any]) -> Any:
+        value = self._views.get(key)
+        if value is None:
+            value = self._views.setdefault(key, build())
+        return value
+
+    def _item(self, key: Hashable, build: Callable[[], Any]) -> Any:
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+                return value
+
+        value = build()
+        with self._lock:
+            self._items[key] = value
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+        return value
+
+    def question(self, question: dict, fields: str = FIELDS_FULL, lang: str = LANG_BOTH) -> dict:
+        """Project one question; full/both returns it unchanged."""
+        if fields == FIELDS_FULL and lang == LANG_BOTH:
+            return question
+
+        question_id = question.get("question_id")
+        if question_id is None:
+            return self._project_question(question, fields, lang)
+        return self._item(("question", question_id, fields, lang),
+                          lambda: self._project_question(question, fields, lang))
+
+    def questions(self, questions: Iterable[dict], fields: str = FIELDS_FULL,
+                  lang: str = LANG_BOTH) -> List[dict]:
+        return [self.question(q, fields, lang) for q in questions]
+
+    @staticmethod
+    def _project_question(question: dict, fields: str, lang: str) -> dict:
+        if fields != FIELDS_FULL:
+            question = {k: question[k] for k in PROJECTION_KEYS[fields] if k in question}
+
+        projected = translate(question, QUESTION_TRANSLATIONS, lang)
+        if lang != LANG_BOTH and projected.get("explanation_wrong"):
+            projected["explanation_wrong"] = {
+                option_id: translate(item, EXPLANATION_WRONG_TRANSLATIONS, lang)
+                for option_id, item in projected["explanation_wrong"].items()
+            }
+        return projected
+
+    def term(self, term: dict, lang: str = LANG_BOTH) -> dict:
+        """Project one glossary term."""
+        if lang == LANG_BOTH:
+            return term
+        return self._item(("term", term.get("term_id"), lang),
+                          lambda: translate(term, TERM_TRANSLATIONS, lang))
+
+    def terms(self, key: Hashable, terms: Sequence[dict], lang: str = LANG_BOTH) -> Tuple[dict, ...]:
+        """
+        Project a whole term list, cached under `key` (e.g. ("book", 1)),
+        so list endpoints slice a ready tuple.
+        """
+        if lang == LANG_BOTH:
+            return tuple(terms)
+        return self._view(("terms", key, lang),
+                          lambda: tuple(translate(t, TERM_TRANSLATIONS, lang) for t in terms))
+
+    def book(self, book: dict, lang: str = LANG_BOTH) -> dict:
+        """Project a book structure (names, modules and their questions)."""
+        if lang == LANG_BOTH:
+            return book
+
+        def build():
+            projected = translate(book, BOOK_TRANSLATIONS, lang)
+            modules = []
+            for module in book.get("learning_modules", ()):
+                module = translate(module, BOOK_TRANSLATIONS, lang)
+                module["questions"] = tuple(
+                    self._project_question(q, FIELDS_FULL, lang) for q in module.get("questions", ())
+                )
+                modules.append(module)
+            projected["learning_modules"] = tuple(modules)
+            return projected
+
+        return self._view(("book", book.get("book_id"), lang), build)
+
+
+def get_projector() -> ContentProjector:
+    """Get the content projector for the current content version."""
+    return get_catalog().view("content_projector", ContentProjector.from_catalog)
@@ -8,5 +8,6 @@ from . import tests
 from . import errors
 from . import glossary
 from . import calculator
+from . import assets
 
-__all__ = ["users", "progress", "tests", "errors", "glossary", "calculator"]
+__all__ = ["users", "progress", "tests", "errors", "glossary", "calculator", "assets"]
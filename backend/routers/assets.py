@@ -0,0 +1,110 @@
+"""
+Assets router - fingerprinted frontend files and their manifest.
+
+Only files the asset registry publishes (web assets and data/v2) are
+served; the rest of frontend/ (legacy question banks, source material)
+is not reachable over HTTP.
+"""
+
+from fastapi import APIRouter, HTTPException, status, Request, Response
+
+from ..http_cache import encode_body, etag_matches, negotiate_encoding
+from ..static_assets import ENTRY_POINT, IMMUTABLE_CACHE_CONTROL, Asset, get_static_assets
+
+router = APIRouter(
+    tags=["assets"]
+)
+
+# Plain (unhashed) paths of published files; include after every other router
+fallback_router = APIRouter(
+    tags=["assets"]
+)
+
+
+async def _asset_response(asset: Asset, request: Request, cache_control: str) -> Response:
+    headers = {
+        "ETag": asset.etag,
+        "Cache-Control": cache_control,
+        "Vary": "Accept-Encoding",
+    }
+
+    if etag_matches(request, asset.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    body = asset.data
+    if asset.compressible:
+        encoding = negotiate_encoding(request)
+        if encoding is not None:
+            body = await encode_body(asset, encoding)
+            headers["Content-Encoding"] = encoding
+
+    return Response(content=body, media_type=asset.media_type, headers=headers)
+
+
+@router.get("/api/assets/manifest")
+async def get_asset_manifest(request: Request, response: Response):
+    """
+    Map logical asset names (e.g. "data/v2/formulas_master.json") to their
+    content-hashed URLs.
+    """
+    manifest, etag = get_static_assets().manifest()
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    if etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    response.headers.update(headers)
+    return {"assets": manifest}
+
+
+@router.get("/static/{hashed_name:path}", include_in_schema=False)
+async def get_static_asset(hashed_name: str, request: Request):
+    """Serve a fingerprinted asset with immutable caching."""
+    asset = get_static_assets().find(hashed_name)
+
+    if asset is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Asset {hashed_name} not found"
+        )
+
+    return await _asset_response(asset, request, IMMUTABLE_CACHE_CONTROL)
+
+
+@router.get("/app", include_in_schema=False)
+async def get_app(request: Request):
+    """Frontend entry point, referencing hashed asset URLs (always revalidated)."""
+    index = get_static_assets().index_html()
+
+    if index is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Frontend not found"
+        )
+
+    body, etag = index
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    if etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    return Response(content=body, media_type="text/html; charset=utf-8", headers=headers)
+
+
+@fallback_router.get("/{name:path}", include_in_schema=False)
+async def get_published_file(name: str, request: Request):
+    """
+    A published frontend file at its plain path (e.g. /js/app.js), always
+    revalidated. index.html is the entry point served at /app.
+    """
+    if name == ENTRY_POINT:
+        return await get_app(request)
+
+    asset = get_static_assets().current(name)
+    if asset is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Not Found"
+        )
+
+    return await _asset_response(asset, request, "no-cache")
@@ -3,27 +3,24 @@ Calculator router - BA II Plus practice problems.
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, desc
+from sqlalchemy import and_, desc, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
-import json
-import os
 import random
 from datetime import datetime
 
-from ..database import get_db
-from ..models import User, CalculatorSession
+from ..database import get_async_db
+from ..models import User, CalculatorSession, UserCalculatorStats
 from ..schemas import CalculatorProblemResponse, CalculatorCheckRequest, CalculatorStatsResponse
 from ..auth import get_current_user
+from ..content import get_catalog
+from ..stats import add_calculator_attempt
 
 router = APIRouter(
     prefix="/api/calculator",
     tags=["calculator"]
 )
 
-# Path to calculator problems data
-DATA_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "frontend", "data")
-
 # Built-in sample problems based on BA II Plus Professional Guidebook
 SAMPLE_PROBLEMS = {
     "TVM": [
@@ -235,11 +232,10 @@ SAMPLE_PROBLEMS = {
 
 def load_calculator_problems(worksheet_type: str) -> List[dict]:
     """Load calculator problems from JSON or use samples."""
-    filepath = os.path.join(DATA_PATH, "calculator", f"{worksheet_type.lower()}_problems.json")
+    problems = get_catalog().calculator_problems(worksheet_type)
 
-    if os.path.exists(filepath):
-        with open(filepath, 'r', encoding='utf-8') as f:
-            return json.load(f).get("problems", [])
+    if problems is not None:
+        return problems
 
     # Return sample problems
     return SAMPLE_PROBLEMS.get(worksheet_type, [])
@@ -299,7 +295,7 @@ async def get_problem(
 async def check_answer(
     request: CalculatorCheckRequest,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Check user's calculator answer and record session."""
     # Find the problem
@@ -345,8 +341,9 @@ async def check_answer(
         time_spent_seconds=request.time_spent_seconds
     )
     db.add(session)
-    db.commit()
-    db.refresh(session)
+    await add_calculator_attempt(current_user.id, session.worksheet_type, is_correct, db)
+    await db.commit()
+    await db.refresh(session)
 
     return {
         "is_correct": is_correct,
@@ -361,42 +358,52 @@ async def check_answer(
 @router.get("/stats", response_model=CalculatorStatsResponse)
 async def get_calculator_stats(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get calculator practice statistics."""
-    sessions = db.query(CalculatorSession).filter(
-        CalculatorSession.user_id == current_user.id
-    ).all()
-
-    # Group by worksheet type
-    by_type = {}
-    total_correct = 0
-    total_attempts = 0
-
-    for session in sessions:
-        ws_type = session.worksheet_type
-        if ws_type not in by_type:
-            by_type[ws_type] = {"attempts": 0, "correct": 0}
-
-        by_type[ws_type]["attempts"] += 1
-        total_attempts += 1
-
-        if session.is_correct:
-            by_type[ws_type]["correct"] += 1
-            total_correct += 1
-
-    # Calculate accuracy per type
-    for ws_type in by_type:
-        attempts = by_type[ws_type]["attempts"]
-        correct = by_type[ws_type]["correct"]
-        by_type[ws_type]["accuracy"] = (correct / attempts * 100) if attempts > 0 else 0
+    """
+    Get calculator practice statistics.
+
+    Counts come from the per-worksheet counters in user_calculator_stats;
+    recent_sessions are the 10 latest sessions, newest first.
+    """
+    worksheet_stats = (await db.execute(
+        select(UserCalculatorStats.worksheet_type, UserCalculatorStats.attempts, UserCalculatorStats.correct).where(
+            UserCalculatorStats.user_id == current_user.id
+        ).order_by(UserCalculatorStats.worksheet_type)
+    )).all()
+
+    recent_sessions = (await db.execute(
+        select(
+            CalculatorSession.id,
+            CalculatorSession.worksheet_type,
+            CalculatorSession.problem_id,
+            CalculatorSession.user_answer,
+            CalculatorSession.is_correct,
+            CalculatorSession.time_spent_seconds,
+            CalculatorSession.created_at
+        ).where(
+            CalculatorSession.user_id == current_user.id
+        ).order_by(desc(CalculatorSession.created_at), desc(CalculatorSession.id)).limit(10)
+    )).all()
+
+    # Accuracy per type
+    by_type = {
+        ws.worksheet_type: {
+            "attempts": ws.attempts,
+            "correct": ws.correct,
+            "accuracy": (ws.correct / ws.attempts * 100) if ws.attempts > 0 else 0
+        }
+        for ws in worksheet_stats
+    }
+    total_attempts = sum(ws.attempts for ws in worksheet_stats)
+    total_correct = sum(ws.correct for ws in worksheet_stats)
 
     return {
         "total_attempts": total_attempts,
         "total_correct": total_correct,
         "overall_accuracy": (total_correct / total_attempts * 100) if total_attempts > 0 else 0,
         "by_worksheet_type": by_type,
-        "recent_sessions": sessions[-10:] if sessions else []
+        "recent_sessions": recent_sessions
     }
 
 
@@ -2,87 +2,103 @@
 Errors router - handles user errors and spaced repetition.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, desc
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from sqlalchemy import and_, desc, func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
-from datetime import datetime, timedelta
-import json
-import os
+from datetime import datetime
 
-from ..database import get_db
-from ..models import User, UserError
+from ..database import get_async_db
+from ..models import User, UserError, UserErrorStats
 from ..schemas import UserErrorResponse, ErrorReviewRequest
 from ..auth import get_current_user
+from ..content import get_question_index
+from ..projections import FIELDS_FULL, LANG_BOTH, check_lang, get_projector
+from ..stats import apply_error_stats, count_error_change
+from ..scheduler import PASSING_QUALITY, apply_answer, quality_for
+from ..pagination import MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
 
 router = APIRouter(
     prefix="/api/errors",
     tags=["errors"]
 )
 
-# Path to questions data
-DATA_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "frontend", "data", "books")
-
 
 def load_question_by_id(question_id: str) -> Optional[dict]:
     """Load a specific question by ID."""
-    # Question ID format: Q-{book_id}-{number} or QM-{module}-{number}
-    for book_id in range(1, 11):
-        try:
-            filepath = os.path.join(DATA_PATH, f"book{book_id}.json")
-            if os.path.exists(filepath):
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    book_data = json.load(f)
-                    for module in book_data.get("learning_modules", []):
-                        for q in module.get("questions", []):
-                            if q.get("question_id") == question_id:
-                                return q
-        except Exception:
-            continue
-    return None
+    return get_question_index().get(question_id)
 
 
 @router.get("", response_model=List[UserErrorResponse])
 async def get_all_errors(
-    limit: int = Query(100, description="Maximum errors to return"),
+    response: Response,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE, description="Maximum errors to return"),
     book_id: Optional[int] = Query(None, description="Filter by book"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get all errors for current user."""
-    query = db.query(UserError).filter(
+    """
+    Get all errors for current user, most frequent first.
+
+    Keyset-paginated on (error_count, id): the cursor for the next page is
+    returned in the X-Next-Cursor header.
+    """
+    query = select(UserError).where(
         UserError.user_id == current_user.id
     )
 
     if book_id:
-        query = query.filter(UserError.book_id == book_id)
+        query = query.where(UserError.book_id == book_id)
+
+    if cursor:
+        error_count, error_id = decode_cursor(cursor, "errors", int, int)
+        query = query.where(tuple_(UserError.error_count, UserError.id) < tuple_(error_count, error_id))
 
-    errors = query.order_by(desc(UserError.error_count)).limit(limit).all()
+    errors = (await db.scalars(
+        query.order_by(desc(UserError.error_count), desc(UserError.id)).limit(limit + 1)
+    )).all()
+
+    if len(errors) > limit:
+        errors = errors[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor("errors", errors[-1].error_count, errors[-1].id)
 
     return errors
 
 
 @router.get("/review")
 async def get_review_questions(
-    limit: int = Query(20, description="Maximum questions to review"),
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE, description="Maximum questions to review"),
+    lang: str = Query(LANG_BOTH, description="en, ru or both"),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get questions due for review today (spaced repetition)."""
+    """
+    Get questions due for review today (spaced repetition).
+
+    Due errors are read oldest-due first straight from the
+    (user_id, next_review_at) index.
+    """
+    check_lang(lang)
     today = datetime.utcnow()
 
     # Get errors due for review
-    due_errors = db.query(UserError).filter(
-        and_(
-            UserError.user_id == current_user.id,
-            UserError.next_review_at <= today
-        )
-    ).order_by(UserError.next_review_at).limit(limit).all()
+    due_errors = (await db.scalars(
+        select(UserError).where(
+            and_(
+                UserError.user_id == current_user.id,
+                UserError.next_review_at <= today
+            )
+        ).order_by(UserError.next_review_at).limit(limit)
+    )).all()
+
+    # Resolve full question data in one pass
+    questions = get_question_index().get_many(e.question_id for e in due_errors)
+    projector = get_projector()
 
-    # Load full question data
     review_questions = []
     for error in due_errors:
-        question = load_question_by_id(error.question_id)
+        question = questions.get(error.question_id)
         if question:
             review_questions.append({
                 "error_id": error.id,
@@ -91,7 +107,8 @@ async def get_review_questions(
                 "module_id": error.module_id,
                 "error_count": error.error_count,
                 "review_interval_days": error.review_interval_days,
-                "question": question
+                "ease_factor": error.ease_factor,
+                "question": projector.question(question, FIELDS_FULL, lang)
             })
 
     return {
@@ -103,46 +120,43 @@ async def get_review_questions(
 @router.get("/stats")
 async def get_error_stats(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get error statistics for current user."""
-    all_errors = db.query(UserError).filter(
-        UserError.user_id == current_user.id
-    ).all()
-
-    today = datetime.utcnow()
-
-    # Group by book
-    by_book = {}
-    total_errors = 0
-    due_today = 0
-    mastered = 0  # Errors with interval >= 30 days
-
-    for error in all_errors:
-        book_id = error.book_id
-        if book_id not in by_book:
-            by_book[book_id] = {"count": 0, "questions": []}
-        by_book[book_id]["count"] += 1
-        by_book[book_id]["questions"].append(error.question_id)
-
-        total_errors += 1
-
-        if error.next_review_at and error.next_review_at <= today:
-            due_today += 1
+    """
+    Get error statistics for current user.
+
+    Totals come from the per-book counters in user_error_stats; due_today
+    and most_problematic are indexed queries on user_errors. by_book only
+    carries counts: the errors of a book are listed, paginated, by
+    GET /api/errors?book_id=.
+    """
+    book_stats = (await db.execute(
+        select(UserErrorStats.book_id, UserErrorStats.error_count, UserErrorStats.mastered_count).where(
+            UserErrorStats.user_id == current_user.id
+        ).order_by(UserErrorStats.book_id)
+    )).all()
+
+    due_today = await db.scalar(
+        select(func.count()).select_from(UserError).where(
+            and_(
+                UserError.user_id == current_user.id,
+                UserError.next_review_at <= datetime.utcnow()
+            )
+        )
+    )
 
-        if error.review_interval_days >= 30:
-            mastered += 1
+    most_problematic = (await db.scalars(
+        select(UserError).where(
+            UserError.user_id == current_user.id
+        ).order_by(desc(UserError.error_count), desc(UserError.id)).limit(10)
+    )).all()
 
     return {
-        "total_errors": total_errors,
+        "total_errors": sum(b.error_count for b in book_stats),
         "due_today": due_today,
-        "mastered": mastered,
-        "by_book": by_book,
-        "most_problematic": sorted(
-            all_errors,
-            key=lambda e: e.error_count,
-            reverse=True
-        )[:10]
+        "mastered": sum(b.mastered_count for b in book_stats),
+        "by_book": {b.book_id: {"count": b.error_count} for b in book_stats if b.error_count},
+        "most_problematic": most_problematic
     }
 
 
@@ -150,15 +164,17 @@ async def get_error_stats(
 async def mark_reviewed(
     request: ErrorReviewRequest,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Mark an error as reviewed and update spaced repetition schedule."""
-    error = db.query(UserError).filter(
-        and_(
-            UserError.user_id == current_user.id,
-            UserError.question_id == request.question_id
+    error = await db.scalar(
+        select(UserError).where(
+            and_(
+                UserError.user_id == current_user.id,
+                UserError.question_id == request.question_id
+            )
         )
-    ).first()
+    )
 
     if not error:
         raise HTTPException(
@@ -166,30 +182,32 @@ async def mark_reviewed(
             detail="Error record not found"
         )
 
-    # SM-2 intervals
-    intervals = [1, 3, 7, 14, 30, 60]
+    interval_before = error.review_interval_days
+    now = datetime.utcnow()
 
-    if request.was_correct:
-        # Increase interval
-        current_idx = intervals.index(error.review_interval_days) if error.review_interval_days in intervals else 0
-        next_idx = min(current_idx + 1, len(intervals) - 1)
-        error.review_interval_days = intervals[next_idx]
-        error.last_correct_at = datetime.utcnow()
+    quality = request.quality if request.quality is not None else quality_for(request.was_correct)
+    error.ease_factor, error.repetitions, error.review_interval_days, error.next_review_at = apply_answer(
+        error.ease_factor, error.repetitions, error.review_interval_days, quality, now
+    )
+    if quality >= PASSING_QUALITY:
+        error.last_correct_at = now
     else:
-        # Reset to beginning
-        error.review_interval_days = intervals[0]
         error.error_count += 1
-        error.last_error_at = datetime.utcnow()
+        error.last_error_at = now
 
-    # Set next review date
-    error.next_review_at = datetime.utcnow() + timedelta(days=error.review_interval_days)
+    deltas = {}
+    count_error_change(deltas, error.book_id, interval_before, error.review_interval_days,
+                       existed=True, exists=True)
+    await apply_error_stats(current_user.id, deltas, db)
 
-    db.commit()
-    db.refresh(error)
+    await db.commit()
+    await db.refresh(error)
 
     return {
         "question_id": error.question_id,
         "new_interval_days": error.review_interval_days,
+        "ease_factor": error.ease_factor,
+        "repetitions": error.repetitions,
         "next_review_at": error.next_review_at,
         "total_errors": error.error_count
     }
@@ -199,15 +217,17 @@ async def mark_reviewed(
 async def delete_error(
     question_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete an error record (mark as fully mastered)."""
-    error = db.query(UserError).filter(
-        and_(
-            UserError.user_id == current_user.id,
-            UserError.question_id == question_id
+    error = await db.scalar(
+        select(UserError).where(
+            and_(
+                UserError.user_id == current_user.id,
+                UserError.question_id == question_id
+            )
         )
-    ).first()
+    )
 
     if not error:
         raise HTTPException(
@@ -215,7 +235,12 @@ async def delete_error(
             detail="Error record not found"
         )
 
-    db.delete(error)
-    db.commit()
+    deltas = {}
+    count_error_change(deltas, error.book_id, error.review_interval_days, None,
+                       existed=True, exists=False)
+    await apply_error_stats(current_user.id, deltas, db)
+
+    await db.delete(error)
+    await db.commit()
 
     return {"message": f"Error record for {question_id} deleted"}
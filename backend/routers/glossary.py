@@ -2,41 +2,32 @@
 Glossary router - handles terms and definitions.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
 from typing import List, Optional
-import json
-import os
 
-from ..database import get_db
 from ..models import User
 from ..auth import get_current_user
+from ..content import BOOK_FOLDERS, get_catalog
+from ..http_cache import cached_json_response, ndjson_response
+from ..pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+from ..glossary_index import SUGGEST_MAX_LIMIT, get_glossary_index, get_suggest_index
+from ..projections import (
+    BOOK_TRANSLATIONS,
+    LANG_BOTH,
+    TERM_TRANSLATIONS,
+    check_lang,
+    get_projector,
+    translate
+)
 
 router = APIRouter(
     prefix="/api/glossary",
     tags=["glossary"]
 )
 
-# Path to glossary data (v2 structure)
-DATA_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "frontend", "data", "v2")
-
-# Mapping book_id to folder name
-BOOK_FOLDERS = {
-    1: "book1_quants",
-    2: "book2_economics",
-    3: "book3_corporate",
-    4: "book4_fsa",
-    5: "book5_equity",
-    6: "book6_fixed_income",
-    7: "book7_derivatives",
-    8: "book8_alternatives",
-    9: "book9_portfolio",
-    10: "book10_ethics"
-}
-
 
 def load_glossary_data(book_id: int) -> dict:
-    """Load glossary JSON data for a book from v2 structure.
+    """Load glossary data for a book from v2 structure.
 
     Aggregates terms from all modules in the book:
     frontend/data/v2/book{N}_{name}/module{M}/glossary.json
@@ -44,112 +35,119 @@ def load_glossary_data(book_id: int) -> dict:
     if book_id not in BOOK_FOLDERS:
         return {"book_id": book_id, "terms": [], "modules": []}
 
-    book_folder = BOOK_FOLDERS[book_id]
-    book_path = os.path.join(DATA_PATH, book_folder)
+    return get_catalog().book_glossary(book_id)
 
-    if not os.path.exists(book_path):
-        return {"book_id": book_id, "terms": [], "modules": []}
 
-    # Find all module directories
-    all_terms = []
-    module_info = []
-    book_name = None
-    book_name_ru = None
-
-    # Scan for module1, module2, module3, etc.
-    module_dirs = sorted([
-        d for d in os.listdir(book_path)
-        if os.path.isdir(os.path.join(book_path, d)) and d.startswith("module")
-    ], key=lambda x: int(x.replace("module", "")))
-
-    for module_dir in module_dirs:
-        glossary_file = os.path.join(book_path, module_dir, "glossary.json")
-
-        if os.path.exists(glossary_file):
-            try:
-                with open(glossary_file, 'r', encoding='utf-8') as f:
-                    module_data = json.load(f)
-
-                # Extract book metadata from first module
-                if book_name is None:
-                    book_name = module_data.get("book_name")
-                    book_name_ru = module_data.get("book_name_ru")
-
-                # Add module info
-                module_info.append({
-                    "module_id": module_data.get("module_id"),
-                    "module_name": module_data.get("module_name"),
-                    "module_name_ru": module_data.get("module_name_ru"),
-                    "term_count": len(module_data.get("terms", []))
-                })
-
-                # Add all terms from this module
-                for term in module_data.get("terms", []):
-                    # Ensure module_id is set
-                    if "module_id" not in term:
-                        term["module_id"] = module_data.get("module_id")
-                    all_terms.append(term)
-
-            except Exception as e:
-                print(f"Error loading {glossary_file}: {e}")
-                continue
+def load_all_glossary() -> List[dict]:
+    """Load all glossary data from all books."""
+    return get_catalog().all_terms()
 
-    return {
-        "book_id": book_id,
-        "book_name": book_name or f"Book {book_id}",
-        "book_name_ru": book_name_ru or f"Книга {book_id}",
-        "total_modules": len(module_info),
-        "modules": module_info,
-        "terms": all_terms
-    }
 
+def _term_ids() -> List[str]:
+    """term_id of every term in load_all_glossary() order, per content version."""
+    return get_catalog().view("term_ids", lambda c: [term.get("term_id") for term in c.all_terms()])
 
-def load_all_glossary() -> List[dict]:
-    """Load all glossary data from all books."""
-    all_terms = []
 
-    for book_id in range(1, 11):
-        try:
-            data = load_glossary_data(book_id)
-            for term in data.get("terms", []):
-                term["book_id"] = book_id
-                term["book_name"] = data.get("book_name", f"Book {book_id}")
-                all_terms.append(term)
-        except Exception:
-            continue
+def _term_positions() -> dict:
+    """term_id -> position in load_all_glossary(), per content version."""
+    return get_catalog().view("term_positions", lambda c: {
+        term.get("term_id"): position for position, term in enumerate(c.all_terms())
+    })
+
 
-    return all_terms
+def _cursor_start(cursor: str) -> int:
+    """Position of the first term after the one a cursor points at."""
+    term_id, position = decode_cursor(cursor, "glossary", str, int)
+    # Content reloads may move the term; an unknown term keeps its old position
+    return _term_positions().get(term_id, position) + 1
 
 
 @router.get("")
 async def get_all_terms(
-    limit: int = Query(100, description="Maximum terms to return"),
-    offset: int = Query(0, description="Offset for pagination"),
+    request: Request,
+    limit: int = Query(100, ge=0, description="Maximum terms to return"),
+    offset: int = Query(0, ge=0, description="Offset for pagination (ignored with cursor)"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
+    lang: str = Query(LANG_BOTH, description="en, ru or both"),
     current_user: User = Depends(get_current_user)
 ):
-    """Get all glossary terms across all books."""
-    all_terms = load_all_glossary()
+    """
+    Get all glossary terms across all books (cached, with ETag).
 
-    return {
-        "total": len(all_terms),
-        "terms": all_terms[offset:offset + limit]
-    }
+    Terms are in catalog order. Like the other paginated lists, the cursor
+    of the next page is returned in the X-Next-Cursor header (absent on
+    the last page); it resumes after the page's last term even if content
+    is reloaded in between.
+    """
+    check_lang(lang)
+    start = _cursor_start(cursor) if cursor else offset
+
+    def build():
+        all_terms = get_projector().terms("all", load_all_glossary(), lang)
+        return {
+            "total": len(all_terms),
+            "terms": all_terms[start:start + limit]
+        }
+
+    response = await cached_json_response(request, ("glossary", limit, start, lang), build)
+    term_ids = _term_ids()
+    last = min(start + limit, len(term_ids)) - 1
+    if last >= start and last + 1 < len(term_ids):
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor("glossary", term_ids[last], last)
+    return response
 
 
 @router.get("/book/{book_id}")
 async def get_book_terms(
     book_id: int,
+    request: Request,
+    lang: str = Query(LANG_BOTH, description="en, ru or both"),
     current_user: User = Depends(get_current_user)
 ):
-    """Get glossary terms for a specific book."""
-    data = load_glossary_data(book_id)
+    """Get glossary terms for a specific book (cached, with ETag)."""
+    check_lang(lang)
 
-    return {
-        "book_id": book_id,
-        "book_name": data.get("book_name", f"Book {book_id}"),
-        "total": len(data.get("terms", [])),
-        "terms": data.get("terms", [])
-    }
+    def build():
+        data = load_glossary_data(book_id)
+        terms = get_projector().terms(("book", book_id), data.get("terms", []), lang)
+        return {
+            "book_id": book_id,
+            "book_name": data.get("book_name", f"Book {book_id}"),
+            "total": len(terms),
+            "terms": terms
+        }
+
+    return await cached_json_response(request, ("glossary-book", book_id, lang), build)
+
+
+@router.get("/stream")
+async def stream_terms(
+    book_id: Optional[int] = Query(None, description="Only terms of this book"),
+    lang: str = Query(LANG_BOTH, description="en, ru or both"),
+    current_user: User = Depends(get_current_user)
+):
+    """Export glossary terms as NDJSON, one term per line."""
+    check_lang(lang)
+    if book_id is not None and book_id not in BOOK_FOLDERS:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Book {book_id} not found"
+        )
+
+    catalog = get_catalog()
+    projector = get_projector()
+    book_ids = [book_id] if book_id is not None else list(BOOK_FOLDERS)
+
+    def records():
+        for b in book_ids:
+            for module_id in catalog.module_ids(b):
+                module_data = catalog.module_glossary(b, module_id)
+                if module_data is None:
+                    continue
+                for term in module_data["terms"]:
+                    yield projector.term(term, lang)
+
+    return ndjson_response(records())
 
 
 @router.get("/search")
@@ -157,32 +155,17 @@ async def search_terms(
     q: str = Query(..., min_length=2, description="Search query"),
     book_id: Optional[int] = Query(None, description="Filter by book"),
     limit: int = Query(50, description="Maximum results"),
+    lang: str = Query(LANG_BOTH, description="en, ru or both"),
     current_user: User = Depends(get_current_user)
 ):
-    """Search glossary terms by keyword."""
-    query = q.lower()
-
-    if book_id:
-        data = load_glossary_data(book_id)
-        all_terms = data.get("terms", [])
-        for term in all_terms:
-            term["book_id"] = book_id
-    else:
-        all_terms = load_all_glossary()
-
-    # Search in term names and definitions
-    results = []
-    for term in all_terms:
-        term_en = term.get("term_en", "").lower()
-        term_ru = term.get("term_ru", "").lower()
-        def_en = term.get("definition_en", "").lower()
-        def_ru = term.get("definition_ru", "").lower()
-
-        if query in term_en or query in term_ru or query in def_en or query in def_ru:
-            results.append(term)
+    """
+    Search glossary terms by keyword, ranked by relevance (BM25F).
 
-        if len(results) >= limit:
-            break
+    Both languages are always searched; lang only shapes the results.
+    """
+    check_lang(lang)
+    projector = get_projector()
+    results = [projector.term(t, lang) for t in get_glossary_index().search(q, limit=limit, book_id=book_id)]
 
     return {
         "query": q,
@@ -191,17 +174,50 @@ async def search_terms(
     }
 
 
+@router.get("/suggest")
+async def suggest_terms(
+    prefix: str = Query(..., min_length=1, description="Beginning of a term name or abbreviation"),
+    book_id: Optional[int] = Query(None, description="Filter by book"),
+    limit: int = Query(10, ge=1, le=SUGGEST_MAX_LIMIT, description="Maximum suggestions"),
+    full: bool = Query(False, description="Return the full terms instead of summaries"),
+    lang: str = Query(LANG_BOTH, description="en, ru or both"),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Autocomplete glossary terms by EN/RU name, abbreviation (HPR, EAR,
+    MWRR...) or LOS id.
+
+    With full=true each suggestion is the whole term, for showing results
+    of a query too short to search.
+    """
+    check_lang(lang)
+    matches = get_suggest_index().suggest(prefix, limit=limit, book_id=book_id)
+    if full:
+        catalog = get_catalog()
+        projector = get_projector()
+        suggestions = [projector.term(catalog.term(s["term_id"]), lang) for s in matches]
+    else:
+        suggestions = [translate(s, TERM_TRANSLATIONS, lang) for s in matches]
+
+    return {
+        "prefix": prefix,
+        "total": len(suggestions),
+        "suggestions": suggestions
+    }
+
+
 @router.get("/term/{term_id}")
 async def get_term(
     term_id: str,
+    lang: str = Query(LANG_BOTH, description="en, ru or both"),
     current_user: User = Depends(get_current_user)
 ):
     """Get a specific term by ID."""
-    all_terms = load_all_glossary()
+    check_lang(lang)
+    term = get_catalog().term(term_id)
 
-    for term in all_terms:
-        if term.get("term_id") == term_id:
-            return term
+    if term is not None:
+        return get_projector().term(term, lang)
 
     raise HTTPException(
         status_code=status.HTTP_404_NOT_FOUND,
@@ -213,67 +229,58 @@ async def get_term(
 async def get_module_terms(
     book_id: int,
     module_id: int,
+    lang: str = Query(LANG_BOTH, description="en, ru or both"),
     current_user: User = Depends(get_current_user)
 ):
     """Get glossary terms for a specific module (v2 structure)."""
+    check_lang(lang)
     if book_id not in BOOK_FOLDERS:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Book {book_id} not found"
         )
 
-    book_folder = BOOK_FOLDERS[book_id]
-    module_path = os.path.join(DATA_PATH, book_folder, f"module{module_id}")
-    glossary_file = os.path.join(module_path, "glossary.json")
+    module_data = get_catalog().module_glossary(book_id, module_id)
 
-    if not os.path.exists(glossary_file):
+    if module_data is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Module {module_id} glossary not found for book {book_id}"
         )
 
-    try:
-        with open(glossary_file, 'r', encoding='utf-8') as f:
-            module_data = json.load(f)
-
-        # Ensure all terms have module_id
-        for term in module_data.get("terms", []):
-            if "module_id" not in term:
-                term["module_id"] = module_data.get("module_id")
-
-        return {
-            "book_id": book_id,
-            "book_name": module_data.get("book_name"),
-            "module_id": module_id,
-            "module_name": module_data.get("module_name"),
-            "module_name_ru": module_data.get("module_name_ru"),
-            "los_list": module_data.get("los_list", []),
-            "total": len(module_data.get("terms", [])),
-            "terms": module_data.get("terms", [])
-        }
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error loading module glossary: {str(e)}"
-        )
+    module_info = translate({
+        "book_id": book_id,
+        "book_name": module_data.get("book_name"),
+        "module_id": module_id,
+        "module_name": module_data.get("module_name"),
+        "module_name_ru": module_data.get("module_name_ru"),
+        "los_list": module_data.get("los_list", [])
+    }, BOOK_TRANSLATIONS, lang)
+
+    terms = get_projector().terms(("module", book_id, module_id), module_data["terms"], lang)
+    return {
+        **module_info,
+        "total": len(terms),
+        "terms": terms
+    }
 
 
 @router.get("/random")
 async def get_random_terms(
     count: int = Query(10, description="Number of random terms"),
     book_id: Optional[int] = Query(None, description="Filter by book"),
+    lang: str = Query(LANG_BOTH, description="en, ru or both"),
     current_user: User = Depends(get_current_user)
 ):
     """Get random terms for flashcard practice."""
     import random
 
+    check_lang(lang)
+    projector = get_projector()
     if book_id:
-        data = load_glossary_data(book_id)
-        all_terms = data.get("terms", [])
-        for term in all_terms:
-            term["book_id"] = book_id
+        all_terms = projector.terms(("book", book_id), load_glossary_data(book_id).get("terms", []), lang)
     else:
-        all_terms = load_all_glossary()
+        all_terms = projector.terms("all", load_all_glossary(), lang)
 
     if not all_terms:
         return {"terms": []}
@@ -3,11 +3,12 @@ Progress router - tracks user progress per book/module.
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
-from typing import List, Optional
+from sqlalchemy import and_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime
 
-from ..database import get_db
+from ..database import get_async_db, dialect_insert
 from ..models import User, UserProgress
 from ..schemas import (
     UserProgressCreate,
@@ -17,22 +18,26 @@ from ..schemas import (
     OverallProgressResponse
 )
 from ..auth import get_current_user
+from ..content import get_catalog
 
 router = APIRouter(
     prefix="/api/progress",
     tags=["progress"]
 )
 
+# Mastery needed to complete a module and unlock the next one
+UNLOCK_MASTERY_PERCENT = 80
+
 
 @router.get("", response_model=OverallProgressResponse)
 async def get_overall_progress(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get overall progress for current user across all books."""
-    progress_records = db.query(UserProgress).filter(
-        UserProgress.user_id == current_user.id
-    ).all()
+    progress_records = (await db.scalars(
+        select(UserProgress).where(UserProgress.user_id == current_user.id)
+    )).all()
 
     # Group by book
     books_progress = {}
@@ -74,15 +79,17 @@ async def get_overall_progress(
 async def get_book_progress(
     book_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get progress for a specific book."""
-    progress_records = db.query(UserProgress).filter(
-        and_(
-            UserProgress.user_id == current_user.id,
-            UserProgress.book_id == book_id
-        )
-    ).order_by(UserProgress.module_id).all()
+    progress_records = (await db.scalars(
+        select(UserProgress).where(
+            and_(
+                UserProgress.user_id == current_user.id,
+                UserProgress.book_id == book_id
+            )
+        ).order_by(UserProgress.module_id)
+    )).all()
 
     total_seen = sum(r.questions_seen for r in progress_records)
     total_correct = sum(r.questions_correct for r in progress_records)
@@ -111,16 +118,18 @@ async def get_module_progress(
     book_id: int,
     module_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get progress for a specific module."""
-    progress = db.query(UserProgress).filter(
-        and_(
-            UserProgress.user_id == current_user.id,
-            UserProgress.book_id == book_id,
-            UserProgress.module_id == module_id
+    progress = await db.scalar(
+        select(UserProgress).where(
+            and_(
+                UserProgress.user_id == current_user.id,
+                UserProgress.book_id == book_id,
+                UserProgress.module_id == module_id
+            )
         )
-    ).first()
+    )
 
     if not progress:
         # Return empty progress
@@ -143,77 +152,75 @@ async def get_module_progress(
 async def sync_progress(
     progress_data: List[UserProgressCreate],
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Sync progress from localStorage to backend.
     Creates or updates progress records.
+
+    Runs as one transaction with a constant number of queries: the user's
+    progress is read once, merged in memory (including unlocks of the next
+    modules), written back with one upsert and read back for the response.
     """
-    results = []
+    progress = await _load_progress(current_user.id, db)
+    now = datetime.utcnow()
+    changed = set()
 
     for data in progress_data:
-        # Find existing record
-        existing = db.query(UserProgress).filter(
-            and_(
-                UserProgress.user_id == current_user.id,
-                UserProgress.book_id == data.book_id,
-                UserProgress.module_id == data.module_id
-            )
-        ).first()
+        key = (data.book_id, data.module_id)
+        record = progress.get(key)
 
-        if existing:
+        if record:
             # Update existing
-            existing.questions_seen = max(existing.questions_seen, data.questions_seen)
-            existing.questions_correct = max(existing.questions_correct, data.questions_correct)
-            existing.mastery_percent = (existing.questions_correct / existing.questions_seen * 100) if existing.questions_seen > 0 else 0
-
-            # Check 80% unlock rule
-            if existing.mastery_percent >= 80 and not existing.completed_at:
-                from datetime import datetime
-                existing.completed_at = datetime.utcnow()
-
-            results.append(existing)
+            record["questions_seen"] = max(record["questions_seen"], data.questions_seen)
+            record["questions_correct"] = max(record["questions_correct"], data.questions_correct)
         else:
             # Create new
-            mastery = (data.questions_correct / data.questions_seen * 100) if data.questions_seen > 0 else 0
-            new_progress = UserProgress(
-                user_id=current_user.id,
-                book_id=data.book_id,
-                module_id=data.module_id,
-                questions_seen=data.questions_seen,
-                questions_correct=data.questions_correct,
-                mastery_percent=mastery,
-                is_unlocked=True
-            )
-            db.add(new_progress)
-            results.append(new_progress)
+            record = progress[key] = {
+                "book_id": data.book_id,
+                "module_id": data.module_id,
+                "questions_seen": data.questions_seen,
+                "questions_correct": data.questions_correct,
+                "is_unlocked": True,
+                "completed_at": None
+            }
+        record["mastery_percent"] = (record["questions_correct"] / record["questions_seen"] * 100) if record["questions_seen"] > 0 else 0
 
-    db.commit()
+        # Check 80% unlock rule
+        if record["mastery_percent"] >= UNLOCK_MASTERY_PERCENT and not record["completed_at"]:
+            record["completed_at"] = now
+        changed.add(key)
 
-    # Refresh to get IDs
-    for r in results:
-        db.refresh(r)
+    changed |= _propagate_unlocks(progress)
 
-    # Check and unlock next modules
-    _check_unlock_next_modules(current_user.id, db)
+    if changed:
+        await _upsert_progress(current_user.id, [progress[key] for key in changed], now, db)
+        await db.commit()
 
-    return results
+    records = {
+        (r.book_id, r.module_id): r
+        for r in await db.scalars(select(UserProgress).where(UserProgress.user_id == current_user.id))
+    }
+
+    return [records[key] for key in dict.fromkeys((d.book_id, d.module_id) for d in progress_data)]
 
 
 @router.put("/update", response_model=UserProgressResponse)
 async def update_progress(
     update_data: UserProgressUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update progress after answering a question."""
-    progress = db.query(UserProgress).filter(
-        and_(
-            UserProgress.user_id == current_user.id,
-            UserProgress.book_id == update_data.book_id,
-            UserProgress.module_id == update_data.module_id
+    progress = await db.scalar(
+        select(UserProgress).where(
+            and_(
+                UserProgress.user_id == current_user.id,
+                UserProgress.book_id == update_data.book_id,
+                UserProgress.module_id == update_data.module_id
+            )
         )
-    ).first()
+    )
 
     if not progress:
         # Create new progress record
@@ -237,30 +244,42 @@ async def update_progress(
     progress.mastery_percent = (progress.questions_correct / progress.questions_seen * 100)
 
     # Check 80% completion
-    if progress.mastery_percent >= 80 and not progress.completed_at:
-        from datetime import datetime
+    if progress.mastery_percent >= UNLOCK_MASTERY_PERCENT and not progress.completed_at:
         progress.completed_at = datetime.utcnow()
         # Unlock next module
-        _unlock_next_module(current_user.id, update_data.book_id, update_data.module_id, db)
+        await _unlock_next_module(current_user.id, update_data.book_id, update_data.module_id, db)
 
-    db.commit()
-    db.refresh(progress)
+    await db.commit()
+    await db.refresh(progress)
 
     return progress
 
 
-def _unlock_next_module(user_id: int, book_id: int, current_module_id: int, db: Session):
+def _next_module_id(book_id: int, module_id: int) -> Optional[int]:
+    """Module unlocked by mastering a module (per meta.json), if any."""
+    graph = get_catalog().next_modules()
+    if (book_id, module_id) in graph:
+        return graph[(book_id, module_id)]
+    # Unknown module: assume sequential numbering
+    return module_id + 1
+
+
+async def _unlock_next_module(user_id: int, book_id: int, current_module_id: int, db: AsyncSession):
     """Unlock the next module after achieving 80% mastery."""
-    next_module_id = current_module_id + 1
+    next_module_id = _next_module_id(book_id, current_module_id)
+    if next_module_id is None:
+        return
 
     # Check if next module progress exists
-    next_progress = db.query(UserProgress).filter(
-        and_(
-            UserProgress.user_id == user_id,
-            UserProgress.book_id == book_id,
-            UserProgress.module_id == next_module_id
+    next_progress = await db.scalar(
+        select(UserProgress).where(
+            and_(
+                UserProgress.user_id == user_id,
+                UserProgress.book_id == book_id,
+                UserProgress.module_id == next_module_id
+            )
         )
-    ).first()
+    )
 
     if next_progress:
         next_progress.is_unlocked = True
@@ -278,14 +297,71 @@ def _unlock_next_module(user_id: int, book_id: int, current_module_id: int, db:
         db.add(new_progress)
 
 
-def _check_unlock_next_modules(user_id: int, db: Session):
-    """Check all progress and unlock next modules where applicable."""
-    all_progress = db.query(UserProgress).filter(
-        UserProgress.user_id == user_id
-    ).all()
+async def _load_progress(user_id: int, db: AsyncSession) -> Dict[Tuple[int, int], dict]:
+    """All progress of a user as plain dicts keyed by (book_id, module_id)."""
+    rows = (await db.execute(
+        select(
+            UserProgress.book_id,
+            UserProgress.module_id,
+            UserProgress.questions_seen,
+            UserProgress.questions_correct,
+            UserProgress.mastery_percent,
+            UserProgress.is_unlocked,
+            UserProgress.completed_at
+        ).where(UserProgress.user_id == user_id)
+    )).all()
+
+    return {(row.book_id, row.module_id): row._asdict() for row in rows}
 
-    for progress in all_progress:
-        if progress.mastery_percent >= 80:
-            _unlock_next_module(user_id, progress.book_id, progress.module_id, db)
 
-    db.commit()
+def _propagate_unlocks(progress: Dict[Tuple[int, int], dict]) -> set:
+    """
+    Unlock the next module of every mastered module, adding placeholder
+    records where needed. Returns the keys of records that changed.
+    """
+    changed = set()
+
+    for (book_id, module_id), record in list(progress.items()):
+        if record["mastery_percent"] < UNLOCK_MASTERY_PERCENT:
+            continue
+        next_module_id = _next_module_id(book_id, module_id)
+        if next_module_id is None:
+            continue
+
+        key = (book_id, next_module_id)
+        next_record = progress.get(key)
+        if next_record is None:
+            # Create placeholder for unlocked module
+            progress[key] = {
+                "book_id": book_id,
+                "module_id": next_module_id,
+                "questions_seen": 0,
+                "questions_correct": 0,
+                "mastery_percent": 0.0,
+                "is_unlocked": True,
+                "completed_at": None
+            }
+            changed.add(key)
+        elif not next_record["is_unlocked"]:
+            next_record["is_unlocked"] = True
+            changed.add(key)
+
+    return changed
+
+
+async def _upsert_progress(user_id: int, records: List[dict], now: datetime, db: AsyncSession):
+    """Insert or update progress records in one statement."""
+    upsert = dialect_insert(db, UserProgress.__table__)
+    await db.execute(
+        upsert.values([
+            {**record, "user_id": user_id, "created_at": now, "updated_at": now}
+            for record in records
+        ]).on_conflict_do_update(
+            index_elements=["user_id", "book_id", "module_id"],
+            set_={
+                column: upsert.excluded[column]
+                for column in ("questions_seen", "questions_correct", "mastery_percent",
+                               "is_unlocked", "completed_at", "updated_at")
+            }
+        )
+    )
@@ -2,48 +2,61 @@
 Tests router - handles test sessions and results.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, desc
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from fastapi.responses import JSONResponse
+from sqlalchemy import and_, desc, insert, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
-import json
-import os
 import random
+import secrets
 from datetime import datetime
 
-from ..database import get_db
-from ..models import User, TestResult, UserProgress, UserError
+from ..database import get_async_db, dialect_insert
+from ..models import User, TestResult, UserProgress, UserError, ExamSession, QuestionAttempt
 from ..schemas import (
     TestResultResponse,
     TestHistoryResponse,
     QuestionResponse,
-    TestSubmitRequest
+    QuestionExplanationResponse,
+    TestSubmitRequest,
+    ExamSessionCreate,
+    ExamSessionResponse,
+    ExamSessionPageResponse,
+    ExamAnswersRequest
 )
 from ..auth import get_current_user
+from ..content import BOOK_FOLDERS, get_catalog, get_question_index
+from ..http_cache import cached_json_response, ndjson_response
+from ..stats import apply_error_stats, count_error_change
+from ..scheduler import INITIAL_EASE, QUALITY_CORRECT, QUALITY_WRONG, apply_answer
+from ..pagination import MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+from ..exam import (
+    EXAM_MODE_ADAPTIVE,
+    EXAM_MODE_WEIGHTED,
+    EXAM_MODES,
+    MOCK_EXAM_QUESTIONS,
+    MOCK_EXAM_ERROR_SHARE,
+    WEAK_MASTERY_PERCENT,
+    assemble_mock_exam,
+    assemble_weighted_exam,
+    get_question_pool
+)
+from ..projections import (
+    FIELDS_FULL,
+    FIELDS_DELIVERY,
+    FIELDS_EXPLANATION,
+    LANG_BOTH,
+    MAX_EXPLANATION_IDS,
+    check_fields,
+    check_lang,
+    get_projector
+)
 
 router = APIRouter(
     prefix="/api/tests",
     tags=["tests"]
 )
 
-# Path to questions data (v2 structure)
-DATA_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "frontend", "data", "v2")
-
-# Mapping of book_id to folder name
-BOOK_FOLDERS = {
-    1: "book1_quants",
-    2: "book2_economics",
-    3: "book3_corporate",
-    4: "book4_fsa",
-    5: "book5_equity",
-    6: "book6_fixed_income",
-    7: "book7_derivatives",
-    8: "book8_alternatives",
-    9: "book9_portfolio",
-    10: "book10_ethics"
-}
-
-
 def load_book_data(book_id: int) -> dict:
     """Load book data from v2 structure (aggregates all modules)."""
     if book_id not in BOOK_FOLDERS:
@@ -52,68 +65,22 @@ def load_book_data(book_id: int) -> dict:
             detail=f"Book {book_id} not found"
         )
 
-    book_folder = BOOK_FOLDERS[book_id]
-    book_path = os.path.join(DATA_PATH, book_folder)
+    catalog = get_catalog()
+    book_data = catalog.book(book_id)
 
-    if not os.path.exists(book_path):
+    if book_data is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Book {book_id} data not found"
         )
 
-    # Find all module directories (module1, module2, module3, ...)
-    module_dirs = sorted([
-        d for d in os.listdir(book_path)
-        if os.path.isdir(os.path.join(book_path, d)) and d.startswith("module")
-    ])
-
-    if not module_dirs:
+    if not catalog.module_ids(book_id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"No modules found for book {book_id}"
         )
 
-    # Load questions from each module
-    learning_modules = []
-    book_name = None
-    book_name_ru = None
-    book_code = None
-
-    for module_dir in module_dirs:
-        questions_file = os.path.join(book_path, module_dir, "questions.json")
-
-        if not os.path.exists(questions_file):
-            continue
-
-        try:
-            with open(questions_file, 'r', encoding='utf-8') as f:
-                module_data = json.load(f)
-
-            # Extract book info from first module
-            if book_name is None:
-                book_name = module_data.get("book_name", "")
-                book_name_ru = module_data.get("book_name_ru", "")
-                book_code = module_data.get("book_code", "")
-
-            # Build module structure compatible with old API
-            learning_modules.append({
-                "module_id": module_data.get("module_id"),
-                "module_name": module_data.get("module_name", ""),
-                "module_name_ru": module_data.get("module_name_ru", ""),
-                "questions": module_data.get("questions", [])
-            })
-        except Exception as e:
-            print(f"Warning: Failed to load {questions_file}: {e}")
-            continue
-
-    # Return structure compatible with old API
-    return {
-        "book_id": book_id,
-        "book_name": book_name or f"Book {book_id}",
-        "book_name_ru": book_name_ru or "",
-        "book_code": book_code or "",
-        "learning_modules": learning_modules
-    }
+    return book_data
 
 
 def get_module_questions(book_id: int, module_id: int) -> List[dict]:
@@ -124,33 +91,48 @@ def get_module_questions(book_id: int, module_id: int) -> List[dict]:
             detail=f"Book {book_id} not found"
         )
 
-    book_folder = BOOK_FOLDERS[book_id]
-    questions_file = os.path.join(DATA_PATH, book_folder, f"module{module_id}", "questions.json")
+    module_data = get_catalog().module_questions(book_id, module_id)
 
-    if not os.path.exists(questions_file):
+    if module_data is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Questions not found for book {book_id}, module {module_id}"
         )
 
-    try:
-        with open(questions_file, 'r', encoding='utf-8') as f:
-            module_data = json.load(f)
-        return module_data.get("questions", [])
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to load questions: {str(e)}"
-        )
+    return module_data.get("questions", [])
+
+
+def project_questions(questions: List[dict], fields: str, lang: str, headers: Optional[dict] = None):
+    """
+    Shape questions for a response.
+
+    Full questions go through the route's response_model. Projections are
+    already in their final shape and are sent as-is, since validating them
+    against QuestionResponse would fail.
+    """
+    if fields == FIELDS_FULL and lang == LANG_BOTH:
+        return questions
+    return JSONResponse(get_projector().questions(questions, fields, lang), headers=headers)
 
 @router.get("/book-info/{book_id}")
 async def get_book_info(
     book_id: int,
+    request: Request,
+    lang: str = Query(LANG_BOTH, description="en, ru or both"),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get book structure with modules and questions for frontend."""
-    return load_book_data(book_id)
+    """
+    Get book structure with modules and questions for frontend.
+
+    Served from the response cache with an ETag (304 on If-None-Match).
+    """
+    check_lang(lang)
+    return await cached_json_response(
+        request,
+        ("book-info", book_id, lang),
+        lambda: get_projector().book(load_book_data(book_id), lang)
+    )
     
 @router.get("/module/{book_id}/{module_id}", response_model=List[QuestionResponse])
 async def get_module_test(
@@ -158,10 +140,21 @@ async def get_module_test(
     module_id: int,
     shuffle: bool = Query(True, description="Shuffle questions"),
     limit: Optional[int] = Query(None, description="Limit number of questions"),
+    fields: str = Query(FIELDS_FULL, description="full, or delivery (stem, options and table only)"),
+    lang: str = Query(LANG_BOTH, description="en, ru or both"),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get questions for a module test."""
+    """
+    Get questions for a module test.
+
+    With fields=delivery, answers and explanations are left out; fetch them
+    from /api/tests/explanations once the questions are answered. With
+    lang=en or lang=ru, only that language's text is sent (ru falls back to
+    English where a translation is missing).
+    """
+    check_fields(fields)
+    check_lang(lang)
     questions = get_module_questions(book_id, module_id)
 
     if not questions:
@@ -176,17 +169,21 @@ async def get_module_test(
     if limit and limit < len(questions):
         questions = questions[:limit]
 
-    return questions
+    return project_questions(questions, fields, lang)
 
 
 @router.get("/book/{book_id}", response_model=List[QuestionResponse])
 async def get_book_test(
     book_id: int,
     num_questions: int = Query(50, description="Number of questions"),
+    fields: str = Query(FIELDS_FULL, description="full, or delivery (stem, options and table only)"),
+    lang: str = Query(LANG_BOTH, description="en, ru or both"),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get random questions from all modules of a book."""
+    """Get random questions from all modules of a book (see get_module_test for fields and lang)."""
+    check_fields(fields)
+    check_lang(lang)
     book_data = load_book_data(book_id)
 
     all_questions = []
@@ -203,107 +200,269 @@ async def get_book_test(
     num_questions = min(num_questions, len(all_questions))
     selected = random.sample(all_questions, num_questions)
 
-    return selected
+    return project_questions(selected, fields, lang)
+
+
+@router.get("/book/{book_id}/stream")
+async def stream_book_questions(
+    book_id: int,
+    fields: str = Query(FIELDS_FULL, description="full, or delivery (stem, options and table only)"),
+    lang: str = Query(LANG_BOTH, description="en, ru or both"),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Export all questions of a book as NDJSON, one question per line, in
+    module order (see get_module_test for fields and lang).
+    """
+    check_fields(fields)
+    check_lang(lang)
+    if book_id not in BOOK_FOLDERS:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Book {book_id} not found"
+        )
+
+    catalog = get_catalog()
+    projector = get_projector()
+    module_ids = catalog.module_ids(book_id)
+
+    def records():
+        for module_id in module_ids:
+            module_data = catalog.module_questions(book_id, module_id)
+            if module_data is None:
+                continue
+            for question in module_data.get("questions", []):
+                yield projector.question(question, fields, lang)
+
+    return ndjson_response(records())
+
+
+@router.get("/explanations", response_model=List[QuestionExplanationResponse])
+async def get_explanations(
+    ids: List[str] = Query(..., description="Question IDs (repeated or comma-separated)"),
+    lang: str = Query(LANG_BOTH, description="en, ru or both"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get correct answers and explanations for a batch of questions.
+
+    Companion to fields=delivery. Unknown IDs are skipped; results keep
+    the requested order.
+    """
+    check_lang(lang)
+    question_ids = list(dict.fromkeys(
+        qid.strip() for value in ids for qid in value.split(",") if qid.strip()
+    ))
+
+    if len(question_ids) > MAX_EXPLANATION_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Too many question IDs (max {MAX_EXPLANATION_IDS})"
+        )
+
+    questions = get_question_index().get_many(question_ids)
+    projector = get_projector()
+    explanations = [projector.question(questions[qid], FIELDS_EXPLANATION, lang)
+                    for qid in question_ids if qid in questions]
+
+    # Already shaped (lang may drop keys the schema requires)
+    return JSONResponse(explanations)
 
 
 @router.get("/mock-exam", response_model=List[QuestionResponse])
 async def get_mock_exam(
+    response: Response,
+    mode: str = Query(EXAM_MODE_ADAPTIVE, description="adaptive (errors/weak/random) or weighted (CFA topic weights)"),
+    seed: Optional[int] = Query(None, description="Seed to reproduce a generated exam"),
+    fields: str = Query(FIELDS_FULL, description="full, or delivery (stem, options and table only)"),
+    lang: str = Query(LANG_BOTH, description="en, ru or both"),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Generate a mock exam with 180 questions.
-    30% from errors, 30% from weak modules, 40% random.
+
+    - adaptive: 30% from errors, 30% from weak modules, 40% random
+    - weighted: per-book CFA topic weights with LOS coverage,
+      favouring the user's errors and weak modules inside each topic
+
+    The seed used is returned in the X-Exam-Seed header. See get_module_test
+    for fields and lang.
     """
-    TOTAL_QUESTIONS = 180
+    check_fields(fields)
+    check_lang(lang)
+    if mode not in EXAM_MODES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid exam mode. Must be one of: {list(EXAM_MODES)}"
+        )
+
+    if seed is None:
+        seed = secrets.randbits(32)
+    headers = {"X-Exam-Seed": str(seed)}
+    response.headers.update(headers)
+
+    questions = await _generate_mock_exam(current_user.id, mode, seed, db)
+    return project_questions(questions, fields, lang, headers=headers)
 
-    all_questions = []
-    question_ids_used = set()
-
-    # Load all available books
-    for book_id in range(1, 11):
-        try:
-            book_data = load_book_data(book_id)
-            for module in book_data.get("learning_modules", []):
-                for q in module.get("questions", []):
-                    q["_book_id"] = book_id
-                    q["_module_id"] = module.get("module_id")
-                    all_questions.append(q)
-        except HTTPException:
-            continue
 
-    if len(all_questions) < TOTAL_QUESTIONS:
-        # Not enough questions, return all shuffled
-        random.shuffle(all_questions)
-        return all_questions
-
-    selected = []
-
-    # 1. Get 30% from user's errors
-    error_count = int(TOTAL_QUESTIONS * 0.3)
-    user_errors = db.query(UserError).filter(
-        UserError.user_id == current_user.id
-    ).order_by(desc(UserError.error_count)).limit(error_count * 2).all()
-
-    error_question_ids = {e.question_id for e in user_errors}
-    error_questions = [q for q in all_questions if q.get("question_id") in error_question_ids]
-
-    if error_questions:
-        sample_size = min(error_count, len(error_questions))
-        error_sample = random.sample(error_questions, sample_size)
-        selected.extend(error_sample)
-        question_ids_used.update(q.get("question_id") for q in error_sample)
-
-    # 2. Get 30% from weak modules (mastery < 70%)
-    weak_count = int(TOTAL_QUESTIONS * 0.3)
-    weak_modules = db.query(UserProgress).filter(
-        and_(
-            UserProgress.user_id == current_user.id,
-            UserProgress.mastery_percent < 70
+@router.post("/sessions", response_model=ExamSessionResponse, status_code=status.HTTP_201_CREATED)
+async def create_exam_session(
+    request: ExamSessionCreate,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Start a mock exam session.
+
+    Only the ordered question IDs are stored; questions are fetched
+    page by page and answers recorded as the user goes.
+    """
+    if request.mode not in EXAM_MODES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid exam mode. Must be one of: {list(EXAM_MODES)}"
         )
-    ).all()
 
-    weak_questions = []
-    for progress in weak_modules:
-        module_qs = [q for q in all_questions
-                    if q.get("_book_id") == progress.book_id
-                    and q.get("_module_id") == progress.module_id
-                    and q.get("question_id") not in question_ids_used]
-        weak_questions.extend(module_qs)
+    seed = request.seed if request.seed is not None else secrets.randbits(32)
+    questions = await _generate_mock_exam(current_user.id, request.mode, seed, db)
 
-    if weak_questions:
-        sample_size = min(weak_count, len(weak_questions))
-        weak_sample = random.sample(weak_questions, sample_size)
-        selected.extend(weak_sample)
-        question_ids_used.update(q.get("question_id") for q in weak_sample)
+    exam_session = ExamSession(
+        user_id=current_user.id,
+        mode=request.mode,
+        seed=seed,
+        test_type="mock_exam",
+        test_mode=request.test_mode,
+        question_ids=[q["question_id"] for q in questions],
+        answers={}
+    )
+    db.add(exam_session)
+    await db.commit()
+    await db.refresh(exam_session)
 
-    # 3. Fill rest with random questions
-    remaining = TOTAL_QUESTIONS - len(selected)
-    available = [q for q in all_questions if q.get("question_id") not in question_ids_used]
+    return _session_response(exam_session)
 
-    if available and remaining > 0:
-        sample_size = min(remaining, len(available))
-        random_sample = random.sample(available, sample_size)
-        selected.extend(random_sample)
 
-    # Shuffle final selection
-    random.shuffle(selected)
+@router.get("/sessions/{session_id}", response_model=ExamSessionResponse)
+async def get_exam_session(
+    session_id: int,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get exam session state (used to resume a session)."""
+    return _session_response(await _get_exam_session(session_id, current_user.id, db))
 
-    # Clean up internal fields
-    for q in selected:
-        q.pop("_book_id", None)
-        q.pop("_module_id", None)
 
-    return selected
+@router.get("/sessions/{session_id}/questions", response_model=ExamSessionPageResponse)
+async def get_exam_session_questions(
+    session_id: int,
+    page: int = Query(1, ge=1, description="Page number (1-based)"),
+    page_size: int = Query(20, ge=1, le=100, description="Questions per page"),
+    lang: str = Query(LANG_BOTH, description="en, ru or both"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get one page of session questions (without answers or explanations)."""
+    check_lang(lang)
+    exam_session = await _get_exam_session(session_id, current_user.id, db)
+
+    question_ids = exam_session.question_ids
+    page_ids = question_ids[(page - 1) * page_size:page * page_size]
+    questions = get_question_index().get_many(page_ids)
+    projector = get_projector()
+    answers = exam_session.answers or {}
+
+    page_data = {
+        "session_id": exam_session.id,
+        "page": page,
+        "page_size": page_size,
+        "total_pages": (len(question_ids) + page_size - 1) // page_size,
+        "total_questions": len(question_ids),
+        "questions": [projector.question(questions[qid], FIELDS_DELIVERY, lang) for qid in page_ids if qid in questions],
+        "answers": {qid: answers[qid] for qid in page_ids if qid in answers}
+    }
+
+    if lang != LANG_BOTH:
+        # Single-language questions may lack keys the schema requires
+        return JSONResponse(page_data)
+    return page_data
+
+
+@router.post("/sessions/{session_id}/answers", response_model=ExamSessionResponse)
+async def record_exam_session_answers(
+    session_id: int,
+    request: ExamAnswersRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Record answers for questions of a session (e.g. one page at a time)."""
+    exam_session = await _get_exam_session(session_id, current_user.id, db)
+
+    if exam_session.status != "in_progress":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Exam session is already completed"
+        )
+
+    session_ids = set(exam_session.question_ids)
+    unknown = [a.question_id for a in request.answers if a.question_id not in session_ids]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Questions not in this session: {unknown[:5]}"
+        )
+
+    # Reassign (not mutate) so SQLAlchemy sees the JSON change
+    answers = dict(exam_session.answers or {})
+    for answer in request.answers:
+        answers[answer.question_id] = {
+            "user_answer": answer.user_answer,
+            "time_spent": answer.time_spent
+        }
+    exam_session.answers = answers
+
+    await db.commit()
+    await db.refresh(exam_session)
+
+    return _session_response(exam_session)
 
 
 @router.post("/submit", response_model=TestResultResponse)
 async def submit_test(
     result: TestSubmitRequest,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Submit test results and update progress."""
+    """
+    Submit test results and update progress.
+
+    With session_id, the session's stored answers are graded on the
+    server, and the result takes its type and mode from the session;
+    question_details, test_type, test_mode, book_id and module_id of the
+    request are ignored.
+    """
+    exam_session = None
+    if result.session_id is not None:
+        exam_session = await _get_exam_session(result.session_id, current_user.id, db)
+        # Conditional UPDATE: of two concurrent submits, only one moves the
+        # session out of in_progress and goes on to create a result
+        claimed = await db.execute(
+            update(ExamSession)
+            .where(and_(ExamSession.id == exam_session.id, ExamSession.status == "in_progress"))
+            .values(status="completed", updated_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        if claimed.rowcount != 1:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Exam session is already completed"
+            )
+        result.test_type = exam_session.test_type
+        result.test_mode = exam_session.test_mode
+        result.book_id = None
+        result.module_id = None
+        result.question_details = _grade_exam_session(exam_session)
 
     # Calculate score
     correct = sum(1 for q in result.question_details if q.get("correct", False))
@@ -320,32 +479,31 @@ async def submit_test(
         total_questions=total,
         correct_answers=correct,
         score_percent=score_percent,
-        time_spent_seconds=result.time_spent_seconds,
-        question_details=result.question_details
+        time_spent_seconds=result.time_spent_seconds
     )
     db.add(test_result)
+    await db.flush()
 
-    # Update user errors for incorrect answers
-    for q_detail in result.question_details:
-        if not q_detail.get("correct", False):
-            _record_error(
-                user_id=current_user.id,
-                question_id=q_detail.get("question_id"),
-                book_id=result.book_id or 0,
-                module_id=result.module_id or 0,
-                db=db
-            )
-        else:
-            # Mark as correct in error tracking
-            _mark_correct(
-                user_id=current_user.id,
-                question_id=q_detail.get("question_id"),
-                db=db
-            )
+    # Per-question answers, in one bulk insert
+    await _record_attempts(
+        user_id=current_user.id,
+        test_result=test_result,
+        question_details=result.question_details,
+        default_location=(result.book_id or 0, result.module_id or 0),
+        db=db
+    )
+
+    # Update error tracking (spaced repetition) for all answers at once
+    await _record_answers(
+        user_id=current_user.id,
+        question_details=result.question_details,
+        default_location=(result.book_id or 0, result.module_id or 0),
+        db=db
+    )
 
     # Update progress for module tests
     if result.test_type == "module" and result.book_id and result.module_id:
-        _update_module_progress(
+        await _update_module_progress(
             user_id=current_user.id,
             book_id=result.book_id,
             module_id=result.module_id,
@@ -354,90 +512,308 @@ async def submit_test(
             db=db
         )
 
-    db.commit()
-    db.refresh(test_result)
+    if exam_session is not None:
+        exam_session.status = "completed"
+        exam_session.test_result_id = test_result.id
 
-    return test_result
+    await db.commit()
+    await db.refresh(test_result)
+
+    return TestResultResponse.model_validate(test_result).model_copy(
+        update={"question_details": result.question_details}
+    )
 
 
 @router.get("/history", response_model=List[TestHistoryResponse])
 async def get_test_history(
-    limit: int = Query(20, description="Number of results to return"),
+    response: Response,
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE, description="Number of results to return"),
     test_type: Optional[str] = Query(None, description="Filter by test type"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get user's test history."""
-    query = db.query(TestResult).filter(
+    """
+    Get user's test history, newest first.
+
+    Keyset-paginated on (created_at, id): the cursor for the next page is
+    returned in the X-Next-Cursor header.
+    """
+    query = select(TestResult).where(
         TestResult.user_id == current_user.id
     )
 
     if test_type:
-        query = query.filter(TestResult.test_type == test_type)
+        query = query.where(TestResult.test_type == test_type)
+
+    if cursor:
+        created_at, result_id = decode_cursor(cursor, "history", datetime, int)
+        query = query.where(tuple_(TestResult.created_at, TestResult.id) < tuple_(created_at, result_id))
+
+    results = (await db.scalars(
+        query.order_by(desc(TestResult.created_at), desc(TestResult.id)).limit(limit + 1)
+    )).all()
 
-    results = query.order_by(desc(TestResult.created_at)).limit(limit).all()
+    if len(results) > limit:
+        results = results[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor("history", results[-1].created_at, results[-1].id)
 
     return results
 
 
-def _record_error(user_id: int, question_id: str, book_id: int, module_id: int, db: Session):
-    """Record or update an error for spaced repetition."""
-    existing = db.query(UserError).filter(
-        and_(
-            UserError.user_id == user_id,
-            UserError.question_id == question_id
+async def _generate_mock_exam(user_id: int, mode: str, seed: int, db: AsyncSession) -> List[dict]:
+    """Select mock exam questions for a user (see get_mock_exam)."""
+    pool = get_question_pool()
+
+    if mode == EXAM_MODE_WEIGHTED:
+        user_errors = (await db.execute(
+            select(UserError.question_id, UserError.error_count).where(UserError.user_id == user_id)
+        )).all()
+
+        progress = (await db.execute(
+            select(UserProgress.book_id, UserProgress.module_id, UserProgress.mastery_percent).where(
+                UserProgress.user_id == user_id
+            )
+        )).all()
+
+        positions = assemble_weighted_exam(
+            pool,
+            error_counts={e.question_id: e.error_count for e in user_errors},
+            module_mastery={(p.book_id, p.module_id): p.mastery_percent for p in progress},
+            seed=seed
         )
-    ).first()
-
-    if existing:
-        existing.error_count += 1
-        existing.last_error_at = datetime.utcnow()
-        # Reset spaced repetition
-        existing.review_interval_days = 1
-        existing.next_review_at = datetime.utcnow()
-    else:
-        new_error = UserError(
-            user_id=user_id,
-            question_id=question_id,
-            book_id=book_id,
-            module_id=module_id,
-            error_count=1,
-            next_review_at=datetime.utcnow(),
-            review_interval_days=1
+        return pool.take(positions)
+
+    user_errors = (await db.execute(
+        select(UserError.question_id).where(
+            UserError.user_id == user_id
+        ).order_by(desc(UserError.error_count), UserError.id).limit(int(MOCK_EXAM_QUESTIONS * MOCK_EXAM_ERROR_SHARE) * 2)
+    )).all()
+
+    weak_modules = (await db.execute(
+        select(UserProgress.book_id, UserProgress.module_id).where(
+            and_(
+                UserProgress.user_id == user_id,
+                UserProgress.mastery_percent < WEAK_MASTERY_PERCENT
+            )
+        ).order_by(UserProgress.book_id, UserProgress.module_id)
+    )).all()
+
+    positions = assemble_mock_exam(
+        pool,
+        error_question_ids=[e.question_id for e in user_errors],
+        weak_modules=[(m.book_id, m.module_id) for m in weak_modules],
+        rng=random.Random(seed)
+    )
+    return pool.take(positions)
+
+
+async def _get_exam_session(session_id: int, user_id: int, db: AsyncSession) -> ExamSession:
+    """Load a user's exam session or raise 404."""
+    exam_session = await db.scalar(
+        select(ExamSession).where(
+            and_(
+                ExamSession.id == session_id,
+                ExamSession.user_id == user_id
+            )
         )
-        db.add(new_error)
+    )
+
+    if not exam_session:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Exam session {session_id} not found"
+        )
+
+    return exam_session
+
+
+def _session_response(exam_session: ExamSession) -> dict:
+    return {
+        "id": exam_session.id,
+        "mode": exam_session.mode,
+        "seed": exam_session.seed,
+        "test_type": exam_session.test_type,
+        "test_mode": exam_session.test_mode,
+        "status": exam_session.status,
+        "total_questions": len(exam_session.question_ids),
+        "answered": len(exam_session.answers or {}),
+        "test_result_id": exam_session.test_result_id,
+        "created_at": exam_session.created_at
+    }
 
 
-def _mark_correct(user_id: int, question_id: str, db: Session):
-    """Update error record when answered correctly."""
-    existing = db.query(UserError).filter(
-        and_(
-            UserError.user_id == user_id,
-            UserError.question_id == question_id
+def _grade_exam_session(exam_session: ExamSession) -> List[dict]:
+    """Build question_details from stored answers; unanswered count as wrong."""
+    questions = get_question_index().get_many(exam_session.question_ids)
+    answers = exam_session.answers or {}
+
+    details = []
+    for qid in exam_session.question_ids:
+        answer = answers.get(qid, {})
+        correct_answer = questions.get(qid, {}).get("correct_option_id")
+        user_answer = answer.get("user_answer")
+        details.append({
+            "question_id": qid,
+            "user_answer": user_answer,
+            "correct_answer": correct_answer,
+            "correct": user_answer is not None and user_answer == correct_answer,
+            "time_spent": answer.get("time_spent") or 0
+        })
+    return details
+
+
+async def _record_attempts(user_id: int, test_result: TestResult, question_details: List[dict],
+                           default_location: tuple, db: AsyncSession):
+    """Store each answered question of a test result as a question_attempts row."""
+    question_index = get_question_index()
+    rows = []
+
+    for q_detail in question_details:
+        question_id = q_detail.get("question_id")
+        if not question_id:
+            continue
+        question = question_index.get(question_id) or {}
+        book_id, module_id = question_index.location(question_id) or default_location
+        user_answer = q_detail.get("user_answer")
+        time_spent = q_detail.get("time_spent")
+        rows.append({
+            "user_id": user_id,
+            "test_result_id": test_result.id,
+            "question_id": question_id,
+            "book_id": book_id,
+            "module_id": module_id,
+            "los_id": question.get("los_id"),
+            "user_answer": None if user_answer is None else str(user_answer)[:50],
+            "correct": bool(q_detail.get("correct", False)),
+            "time_spent_seconds": int(time_spent) if isinstance(time_spent, (int, float)) else None,
+            "created_at": test_result.created_at,
+        })
+
+    if rows:
+        await db.execute(insert(QuestionAttempt), rows)
+
+
+async def _record_answers(user_id: int, question_details: List[dict],
+                          default_location: tuple, db: AsyncSession):
+    """
+    Update error records for a batch of answers.
+
+    Wrong answers record an error (or lapse an existing one) and make it
+    due now; correct answers are a successful review of an existing error
+    and schedule it by its own SM-2 state. All affected rows are read
+    with one query, updated in memory in answer order and written back with
+    one upsert; the user's error counters are adjusted in the same
+    transaction.
+    """
+    question_ids = list(dict.fromkeys(
+        q.get("question_id") for q in question_details if q.get("question_id")
+    ))
+    if not question_ids:
+        return
+
+    columns = (
+        UserError.question_id,
+        UserError.book_id,
+        UserError.module_id,
+        UserError.error_count,
+        UserError.last_error_at,
+        UserError.last_correct_at,
+        UserError.review_interval_days,
+        UserError.ease_factor,
+        UserError.repetitions,
+        UserError.next_review_at,
+    )
+    rows = (await db.execute(
+        select(*columns).where(
+            and_(
+                UserError.user_id == user_id,
+                UserError.question_id.in_(question_ids)
+            )
+        )
+    )).all()
+    errors = {row.question_id: row._asdict() for row in rows}
+    intervals_before = {row.question_id: row.review_interval_days for row in rows}
+
+    now = datetime.utcnow()
+    question_index = get_question_index()
+    changed = set()
+
+    for q_detail in question_details:
+        question_id = q_detail.get("question_id")
+        if not question_id:
+            continue
+        error = errors.get(question_id)
+
+        if not q_detail.get("correct", False):
+            if error is None:
+                book_id, module_id = question_index.location(question_id) or default_location
+                error = errors[question_id] = {
+                    "question_id": question_id,
+                    "book_id": book_id,
+                    "module_id": module_id,
+                    "error_count": 0,
+                    "last_correct_at": None,
+                    "review_interval_days": None,
+                    "ease_factor": INITIAL_EASE,
+                    "repetitions": 0,
+                }
+            error["error_count"] += 1
+            error["last_error_at"] = now
+            quality = QUALITY_WRONG
+        elif error is not None:
+            error["last_correct_at"] = now
+            quality = QUALITY_CORRECT
+        else:
+            continue
+        (error["ease_factor"], error["repetitions"], error["review_interval_days"],
+         error["next_review_at"]) = apply_answer(
+            error["ease_factor"], error["repetitions"], error["review_interval_days"], quality, now
+        )
+        changed.add(question_id)
+
+    if not changed:
+        return
+
+    values = [
+        {**errors[qid], "user_id": user_id, "created_at": now, "updated_at": now}
+        for qid in question_ids if qid in changed
+    ]
+    upsert = dialect_insert(db, UserError.__table__)
+    await db.execute(
+        upsert.values(values).on_conflict_do_update(
+            index_elements=["user_id", "question_id"],
+            set_={
+                column: upsert.excluded[column]
+                for column in ("error_count", "last_error_at", "last_correct_at",
+                               "review_interval_days", "ease_factor", "repetitions",
+                               "next_review_at", "updated_at")
+            }
         )
-    ).first()
+    )
 
-    if existing:
-        from datetime import timedelta
-        existing.last_correct_at = datetime.utcnow()
-        # Increase spaced repetition interval
-        intervals = [1, 3, 7, 14, 30, 60]
-        current_idx = intervals.index(existing.review_interval_days) if existing.review_interval_days in intervals else 0
-        next_idx = min(current_idx + 1, len(intervals) - 1)
-        existing.review_interval_days = intervals[next_idx]
-        existing.next_review_at = datetime.utcnow() + timedelta(days=intervals[next_idx])
+    deltas = {}
+    for qid in changed:
+        error = errors[qid]
+        count_error_change(
+            deltas, error["book_id"], intervals_before.get(qid), error["review_interval_days"],
+            existed=qid in intervals_before, exists=True
+        )
+    await apply_error_stats(user_id, deltas, db)
 
 
-def _update_module_progress(user_id: int, book_id: int, module_id: int,
-                           questions_seen: int, questions_correct: int, db: Session):
+async def _update_module_progress(user_id: int, book_id: int, module_id: int,
+                                 questions_seen: int, questions_correct: int, db: AsyncSession):
     """Update module progress after test completion."""
-    progress = db.query(UserProgress).filter(
-        and_(
-            UserProgress.user_id == user_id,
-            UserProgress.book_id == book_id,
-            UserProgress.module_id == module_id
+    progress = await db.scalar(
+        select(UserProgress).where(
+            and_(
+                UserProgress.user_id == user_id,
+                UserProgress.book_id == book_id,
+                UserProgress.module_id == module_id
+            )
         )
-    ).first()
+    )
 
     if progress:
         progress.questions_seen = max(progress.questions_seen, questions_seen)
@@ -3,20 +3,22 @@ User authentication and management endpoints.
 """
 
 from datetime import timedelta
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..database import get_db
+from ..database import get_async_db
 from .. import schemas, auth
+from ..admission import get_auth_admission
 
 router = APIRouter(prefix="/api/auth", tags=["Authentication"])
 
 
 @router.post("/register", response_model=schemas.UserResponse, status_code=status.HTTP_201_CREATED)
 async def register(
+    request: Request,
     user_data: schemas.UserCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Register a new user.
@@ -24,9 +26,12 @@ async def register(
     - **username**: 3-50 characters, must be unique
     - **email**: Valid email format, must be unique
     - **password**: Minimum 6 characters
+
+    Subject to login admission control (429 when overloaded or rate limited).
     """
     try:
-        user = auth.create_user(db, user_data)
+        async with get_auth_admission().admit(request, user_data.username):
+            user = await auth.create_user(db, user_data)
         return user
     except ValueError as e:
         raise HTTPException(
@@ -37,16 +42,19 @@ async def register(
 
 @router.post("/login", response_model=schemas.Token)
 async def login(
+    request: Request,
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Authenticate user and return JWT token.
 
     Use username and password to get an access token.
-    Token expires in 24 hours by default.
+    Token expires in 24 hours by default. Subject to admission control
+    (429 when overloaded or rate limited).
     """
-    user = auth.authenticate_user(db, form_data.username, form_data.password)
+    async with get_auth_admission().admit(request, form_data.username):
+        user = await auth.authenticate_user(db, form_data.username, form_data.password)
 
     if not user:
         raise HTTPException(
@@ -66,15 +74,17 @@ async def login(
 
 @router.post("/login/json", response_model=schemas.Token)
 async def login_json(
+    request: Request,
     credentials: schemas.UserLogin,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Authenticate user with JSON body (alternative to form data).
 
     Useful for frontend JavaScript fetch calls.
     """
-    user = auth.authenticate_user(db, credentials.username, credentials.password)
+    async with get_auth_admission().admit(request, credentials.username):
+        user = await auth.authenticate_user(db, credentials.username, credentials.password)
 
     if not user:
         raise HTTPException(
@@ -121,3 +131,16 @@ async def get_current_user_info(
     Requires valid JWT token in Authorization header.
     """
     return current_user
+
+
+@router.get("/metrics")
+async def get_admission_metrics(
+    current_user: auth.Principal = Depends(auth.get_ops_user)
+):
+    """
+    Admission control metrics for login and registration (this worker):
+    in-flight and queued password checks, rejections and queue wait times.
+
+    Only for users listed in OPS_USERNAMES.
+    """
+    return get_auth_admission().metrics()
@@ -0,0 +1,160 @@
+"""
+Spaced-repetition scheduling (SM-2).
+
+Every UserError carries its own memory state: ease_factor (how fast its
+interval grows), repetitions (successful recalls in a row) and
+review_interval_days. `review` applies one graded answer to that state
+and `apply_answer` also gives the new due date; the test submit path and
+/api/errors/mark-reviewed both use it, so an answer counts the same
+wherever it is given.
+
+`reschedule_errors` rescales the stored schedule of many items at once
+under the current parameters (e.g. after lowering SRS_MAX_INTERVAL_DAYS,
+or scaled down to compress schedules before the exam). It does not
+replay answer history: the test submit path is the only one logged in
+question_attempts, so a replay would lose reviews. It works column-wise
+on keyset-ordered batches and writes each batch with one executemany
+UPDATE.
+"""
+
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+import os
+
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.engine import Connection
+
+from .models import UserError
+from .stats import rebuild_error_stats
+
+# SM-2 parameters
+INITIAL_EASE = 2.5
+MIN_EASE = 1.3
+FIRST_INTERVALS = (1, 6)    # days after the 1st and 2nd successful recall in a row
+
+# Longest interval between reviews
+SRS_MAX_INTERVAL_DAYS = int(os.getenv("SRS_MAX_INTERVAL_DAYS", "60"))
+
+# Answer grades (SM-2 quality 0-5); PASSING_QUALITY and above is a recall
+PASSING_QUALITY = 3
+QUALITY_CORRECT = 4
+QUALITY_WRONG = 2
+
+# Error records rescheduled per batch
+RESCHEDULE_BATCH_SIZE = 5000
+
+
+def quality_for(correct: bool) -> int:
+    """SM-2 grade of a right/wrong answer."""
+    return QUALITY_CORRECT if correct else QUALITY_WRONG
+
+
+def review(ease_factor: Optional[float], repetitions: Optional[int],
+           interval_days: Optional[int], quality: int) -> Tuple[float, int, int]:
+    """
+    Apply one graded answer to an item's state.
+
+    Returns the new (ease_factor, repetitions, interval_days). A recall
+    moves through FIRST_INTERVALS, then multiplies the interval by the
+    ease; a lapse restarts the item. The ease is adjusted by the SM-2
+    formula on every answer and never drops below MIN_EASE.
+    """
+    ease = ease_factor or INITIAL_EASE
+    repetitions = repetitions or 0
+    interval = interval_days or FIRST_INTERVALS[0]
+
+    if quality >= PASSING_QUALITY:
+        if repetitions < len(FIRST_INTERVALS):
+            interval = FIRST_INTERVALS[repetitions]
+        else:
+            interval = round(interval * ease)
+        repetitions += 1
+    else:
+        repetitions = 0
+        interval = FIRST_INTERVALS[0]
+
+    miss = 5 - quality
+    ease = max(MIN_EASE, ease + 0.1 - miss * (0.08 + miss * 0.02))
+    return ease, repetitions, max(1, min(interval, SRS_MAX_INTERVAL_DAYS))
+
+
+def apply_answer(ease_factor: Optional[float], repetitions: Optional[int],
+                 interval_days: Optional[int], quality: int,
+                 now: datetime) -> Tuple[float, int, int, datetime]:
+    """
+    Apply one graded answer answered at `now`.
+
+    Returns the new (ease_factor, repetitions, interval_days,
+    next_review_at): a recall is due after its new interval, a lapse is
+    due again right away.
+    """
+    ease_factor, repetitions, interval_days = review(ease_factor, repetitions, interval_days, quality)
+    next_review_at = now + timedelta(days=interval_days) if quality >= PASSING_QUALITY else now
+    return ease_factor, repetitions, interval_days, next_review_at
+
+
+def _last_answered(last_error_at: Optional[datetime], last_correct_at: Optional[datetime],
+                   now: datetime) -> datetime:
+    answered = [t for t in (last_error_at, last_correct_at) if t is not None]
+    return max(answered) if answered else now
+
+
+def reschedule_errors(conn: Connection, scale: float = 1.0, user_id: Optional[int] = None,
+                      batch_size: int = RESCHEDULE_BATCH_SIZE) -> int:
+    """
+    Rescale the schedule of error records from their stored state.
+
+    Intervals are multiplied by `scale` and clamped to
+    [1, SRS_MAX_INTERVAL_DAYS], and ease factors are clamped to MIN_EASE.
+    Only records whose interval changes get a new due date, the last
+    answer plus the new interval; an item that is already due is never
+    moved later. Error counters (mastered) are rebuilt afterwards.
+    Returns the number of records changed.
+    """
+    table = UserError.__table__
+    now = datetime.utcnow()
+    write = (
+        update(table)
+        .where(table.c.id == bindparam("b_id"))
+        .values(
+            ease_factor=bindparam("b_ease"),
+            review_interval_days=bindparam("b_interval"),
+            next_review_at=bindparam("b_next_review_at"),
+        )
+    )
+
+    updated = 0
+    last_id = 0
+    while True:
+        query = select(
+            table.c.id, table.c.ease_factor, table.c.review_interval_days,
+            table.c.next_review_at, table.c.last_error_at, table.c.last_correct_at
+        ).where(table.c.id > last_id).order_by(table.c.id).limit(batch_size)
+        if user_id is not None:
+            query = query.where(table.c.user_id == user_id)
+
+        rows = conn.execute(query).all()
+        if not rows:
+            break
+        ids, old_eases, old_intervals, old_due, last_errors, last_corrects = (list(column) for column in zip(*rows))
+        last_id = ids[-1]
+
+        eases = [max(MIN_EASE, e or INITIAL_EASE) for e in old_eases]
+        intervals = [max(1, min(SRS_MAX_INTERVAL_DAYS, round((i or FIRST_INTERVALS[0]) * scale))) for i in old_intervals]
+        due: List[Optional[datetime]] = [
+            _last_answered(e, c, now) + timedelta(days=n) if n != i or d is None else d
+            for e, c, n, i, d in zip(last_errors, last_corrects, intervals, old_intervals, old_due)
+        ]
+        due = [min(d, old) if old is not None and old <= now else d for d, old in zip(due, old_due)]
+
+        changes = [
+            {"b_id": i, "b_ease": e, "b_interval": n, "b_next_review_at": d}
+            for i, e, n, d, old in zip(ids, eases, intervals, due, zip(old_eases, old_intervals, old_due))
+            if (e, n, d) != old
+        ]
+        if changes:
+            conn.execute(write, changes)
+        updated += len(changes)
+
+    rebuild_error_stats(conn, user_id)
+    return updated
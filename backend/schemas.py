@@ -2,7 +2,7 @@
 Pydantic schemas for request/response validation.
 """
 
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, EmailStr, Field, model_validator
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 
@@ -129,6 +129,35 @@ class QuestionResponse(BaseModel):
     topic_tags: Optional[List[str]] = None
 
 
+class QuestionDeliveryResponse(BaseModel):
+    """Question as shown while answering: stem, options and table only"""
+    question_id: str
+    question_number: Optional[int] = None
+    los_id: Optional[str] = None
+    question_text: str
+    question_text_ru: Optional[str] = None
+    question_text_formula: Optional[str] = None
+    question_continuation: Optional[str] = None
+    has_table: bool = False
+    table_data: Optional[Any] = None
+    options: List[OptionSchema]
+
+
+class QuestionExplanationResponse(BaseModel):
+    """Answer, explanations and metadata fetched after a question is answered"""
+    question_id: str
+    term_id: Optional[str] = None
+    correct_option_id: str
+    explanation: str
+    explanation_ru: Optional[str] = None
+    explanation_formula: Optional[str] = None
+    explanation_wrong: Optional[Dict[str, ExplanationWrongItemSchema]] = None
+    requires_calculation: Optional[bool] = None
+    calculator_steps: Optional[List[str]] = None
+    difficulty: Optional[str] = None
+    topic_tags: Optional[List[str]] = None
+
+
 class TestStartRequest(BaseModel):
     test_type: str
     test_mode: str
@@ -142,7 +171,15 @@ class TestSubmitRequest(BaseModel):
     book_id: Optional[int] = None
     module_id: Optional[int] = None
     time_spent_seconds: int
-    question_details: List[Dict[str, Any]]
+    # Either the full details, or an exam session whose stored answers are graded
+    question_details: List[Dict[str, Any]] = []
+    session_id: Optional[int] = None
+
+    @model_validator(mode="after")
+    def check_answers_source(self):
+        if (self.session_id is None) == (not self.question_details):
+            raise ValueError("Provide either session_id or a non-empty question_details")
+        return self
 
 
 class TestResultResponse(BaseModel):
@@ -178,6 +215,48 @@ class TestHistoryResponse(BaseModel):
         from_attributes = True
 
 
+# ============== Exam Session Schemas ==============
+
+class ExamSessionCreate(BaseModel):
+    mode: str = "adaptive"
+    seed: Optional[int] = None
+    test_mode: str = "standard"
+
+
+class ExamSessionResponse(BaseModel):
+    id: int
+    mode: str
+    seed: int
+    test_type: str
+    test_mode: str
+    status: str
+    total_questions: int
+    answered: int
+    test_result_id: Optional[int] = None
+    created_at: datetime
+
+
+class ExamAnswer(BaseModel):
+    question_id: str
+    user_answer: Optional[str] = None
+    time_spent: Optional[int] = None
+
+
+class ExamAnswersRequest(BaseModel):
+    answers: List[ExamAnswer]
+
+
+class ExamSessionPageResponse(BaseModel):
+    session_id: int
+    page: int
+    page_size: int
+    total_pages: int
+    total_questions: int
+    questions: List[QuestionDeliveryResponse]
+    # Answers already recorded for the questions on this page
+    answers: Dict[str, Dict[str, Any]]
+
+
 # ============== Error/Review Schemas ==============
 
 class UserErrorResponse(BaseModel):
@@ -189,6 +268,8 @@ class UserErrorResponse(BaseModel):
     last_error_at: datetime
     next_review_at: Optional[datetime]
     review_interval_days: int
+    ease_factor: float
+    repetitions: int
 
     class Config:
         from_attributes = True
@@ -206,6 +287,8 @@ class ReviewQuestionResponse(BaseModel):
 class ErrorReviewRequest(BaseModel):
     question_id: str
     was_correct: bool
+    # SM-2 grade 0-5 (3+ is a recall); derived from was_correct when omitted
+    quality: Optional[int] = Field(None, ge=0, le=5)
 
 
 # ============== Glossary Schemas ==============
@@ -249,12 +332,25 @@ class CalculatorCheckRequest(BaseModel):
     user_steps: Optional[List[str]] = None
 
 
+class CalculatorSessionSummary(BaseModel):
+    id: int
+    worksheet_type: str
+    problem_id: Optional[str]
+    user_answer: Optional[float]
+    is_correct: Optional[bool]
+    time_spent_seconds: Optional[int]
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
 class CalculatorStatsResponse(BaseModel):
     total_attempts: int
     total_correct: int
     overall_accuracy: float
     by_worksheet_type: Dict[str, Dict[str, Any]]
-    recent_sessions: List[Any]
+    recent_sessions: List[CalculatorSessionSummary]
 
 
 # ============== Sync Schemas ==============
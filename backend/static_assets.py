@@ -0,0 +1,215 @@
+"""
+Fingerprinted static assets for the frontend.
+
+Every web asset in frontend/ and every JSON file in frontend/data/v2 is
+served under a content-hashed URL (js/app.js -> /static/js/app.<hash>.js)
+with far-future immutable caching. The manifest maps logical names to those
+URLs, and index.html is rewritten to reference them. gzip/brotli copies are
+compressed once per asset version and kept in memory.
+"""
+
+from typing import Dict, List, Optional, Tuple
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import re
+import threading
+import time
+
+from .content import CONTENT_CHECK_INTERVAL, _file_signature
+from .http_cache import ENCODERS, MIN_COMPRESS_SIZE
+
+logger = logging.getLogger(__name__)
+
+# Frontend root (index.html, css/, js/, data/)
+FRONTEND_ROOT = os.path.join(os.path.dirname(__file__), "..", "frontend")
+
+# Entry point, served (rewritten) at /app instead of a hashed URL
+ENTRY_POINT = "index.html"
+
+# URL prefix of fingerprinted assets
+STATIC_URL_PREFIX = "/static/"
+
+# File types that get fingerprinted
+STATIC_EXTENSIONS = {".css", ".js", ".json", ".svg", ".png", ".jpg", ".jpeg", ".gif", ".ico", ".woff", ".woff2"}
+
+# Only data/v2 is published from data/ (the rest is legacy or source material)
+PUBLISHED_DATA_DIR = os.path.join("data", "v2")
+
+# Hex digits of the content hash kept in file names
+HASH_LENGTH = 12
+
+# Hashed URLs never change content, so browsers may keep them for a year
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Types worth compressing
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/javascript", "image/svg+xml")
+
+# href="..." / src="..." references in the entry point
+ASSET_REFERENCE_RE = re.compile(r'(\b(?:href|src)=")([^"#?]+)(")')
+
+
+class Asset:
+    """One version of a static file, with its fingerprint and encodings."""
+
+    def __init__(self, name: str, path: str):
+        self.name = name
+        self.signature = _file_signature(path)
+        with open(path, "rb") as f:
+            self.data = f.read()
+
+        self.digest = hashlib.sha256(self.data).hexdigest()[:HASH_LENGTH]
+        stem, ext = os.path.splitext(name)
+        self.hashed_name = f"{stem}.{self.digest}{ext}"
+        self.url = STATIC_URL_PREFIX + self.hashed_name
+        self.etag = f'"{self.digest}"'
+        self.media_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        self._encoded: Dict[str, bytes] = {}
+        self._encode_lock = threading.Lock()
+
+    @property
+    def compressible(self) -> bool:
+        return len(self.data) >= MIN_COMPRESS_SIZE and self.media_type.startswith(COMPRESSIBLE_TYPES)
+
+    def ready(self, encoding: str) -> Optional[bytes]:
+        return self._encoded.get(encoding)
+
+    def encoded(self, encoding: str) -> bytes:
+        data = self._encoded.get(encoding)
+        if data is None:
+            with self._encode_lock:
+                data = self._encoded.get(encoding)
+                if data is None:
+                    data = ENCODERS[encoding](self.data)
+                    self._encoded[encoding] = data
+        return data
+
+
+class StaticAssets:
+    """
+    Registry of fingerprinted frontend assets.
+
+    The tree is rescanned at most every `check_interval` seconds; only files
+    whose mtime/size changed are re-read and re-hashed. Hashed URLs of the
+    previous generation keep working until the next change, so a page
+    loaded before an update can still fetch what it references; older
+    versions are dropped with their data.
+    """
+
+    def __init__(self, root: str = FRONTEND_ROOT, check_interval: float = CONTENT_CHECK_INTERVAL):
+        self.root = root
+        self.check_interval = check_interval
+        self._assets: Dict[str, Asset] = {}
+        self._by_hashed_name: Dict[str, Asset] = {}
+        self._previous_by_hashed_name: Dict[str, Asset] = {}
+        self._manifest: Dict[str, str] = {}
+        self._manifest_etag = '""'
+        self._index: Optional[Tuple[tuple, bytes, str]] = None
+        self._last_check = None
+        self._lock = threading.Lock()
+
+    def _scan(self) -> List[Tuple[str, str]]:
+        """(logical name, path) of every publishable file, sorted by name."""
+        found = []
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            rel_dir = os.path.relpath(dirpath, self.root)
+            if rel_dir == ".":
+                rel_dir = ""
+            elif rel_dir == "data":
+                dirnames[:] = [d for d in dirnames if os.path.join("data", d) == PUBLISHED_DATA_DIR]
+            dirnames.sort()
+
+            for filename in filenames:
+                name = os.path.join(rel_dir, filename).replace(os.sep, "/")
+                if name == ENTRY_POINT or os.path.splitext(filename)[1].lower() not in STATIC_EXTENSIONS:
+                    continue
+                if rel_dir == "data":
+                    continue
+                found.append((name, os.path.join(dirpath, filename)))
+        found.sort()
+        return found
+
+    def refresh(self, force: bool = False):
+        """Pick up added, changed and removed files."""
+        now = time.monotonic()
+        if not force and self._last_check is not None and now - self._last_check < self.check_interval:
+            return
+
+        with self._lock:
+            self._last_check = now
+            assets = {}
+            for name, path in self._scan():
+                asset = self._assets.get(name)
+                if asset is None or asset.signature != _file_signature(path):
+                    try:
+                        asset = Asset(name, path)
+                    except OSError as e:
+                        logger.warning("Could not read static asset %s: %s", name, e)
+                        continue
+                assets[name] = asset
+
+            if assets.keys() != self._assets.keys() or any(assets[n] is not self._assets[n] for n in assets):
+                by_hashed_name = {asset.hashed_name: asset for asset in assets.values()}
+                self._previous_by_hashed_name = {
+                    hashed_name: asset for hashed_name, asset in self._by_hashed_name.items()
+                    if hashed_name not in by_hashed_name
+                }
+                self._by_hashed_name = by_hashed_name
+                self._assets = assets
+                self._manifest = {name: asset.url for name, asset in assets.items()}
+                manifest_digest = hashlib.sha256(json.dumps(self._manifest, sort_keys=True).encode()).hexdigest()
+                self._manifest_etag = f'"{manifest_digest[:HASH_LENGTH]}"'
+
+    def manifest(self) -> Tuple[Dict[str, str], str]:
+        """Logical name -> hashed URL, and an ETag for the mapping."""
+        self.refresh()
+        return self._manifest, self._manifest_etag
+
+    def find(self, hashed_name: str) -> Optional[Asset]:
+        """Asset served at a hashed name (current or previous generation)."""
+        self.refresh()
+        return self._by_hashed_name.get(hashed_name) or self._previous_by_hashed_name.get(hashed_name)
+
+    def current(self, name: str) -> Optional[Asset]:
+        """Current version of a published file, by logical name (e.g. "js/app.js")."""
+        self.refresh()
+        return self._assets.get(name)
+
+    def index_html(self) -> Optional[Tuple[bytes, str]]:
+        """Entry point with asset references rewritten to hashed URLs, and its ETag."""
+        manifest, manifest_etag = self.manifest()
+        path = os.path.join(self.root, ENTRY_POINT)
+        key = (_file_signature(path), manifest_etag)
+        if key[0] is None:
+            return None
+
+        index = self._index
+        if index is None or index[0] != key:
+            with open(path, "r", encoding="utf-8") as f:
+                html = f.read()
+
+            def rewrite(match):
+                url = manifest.get(match.group(2).removeprefix("./"))
+                return match.group(1) + url + match.group(3) if url else match.group(0)
+
+            body = ASSET_REFERENCE_RE.sub(rewrite, html).encode("utf-8")
+            index = (key, body, f'"{hashlib.sha256(body).hexdigest()[:HASH_LENGTH]}"')
+            self._index = index
+
+        return index[1], index[2]
+
+
+_static_assets: Optional[StaticAssets] = None
+_static_assets_lock = threading.Lock()
+
+
+def get_static_assets() -> StaticAssets:
+    """Get the process-wide static asset registry."""
+    global _static_assets
+    if _static_assets is None:
+        with _static_assets_lock:
+            if _static_assets is None:
+                _static_assets = StaticAssets()
+    return _static_assets
@@ -0,0 +1,107 @@
+"""
+Materialized per-user statistics.
+
+user_error_stats and user_calculator_stats hold counters for the rows in
+user_errors and calculator_sessions. Every write path updates them in the
+same transaction with an additive upsert, so the stats endpoints read a
+few counter rows instead of scanning the user's history.
+"""
+
+from typing import Dict, Optional, Tuple
+from datetime import datetime
+
+from sqlalchemy import case, delete, func, insert, literal, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .database import dialect_insert
+from .models import UserError, UserErrorStats, UserCalculatorStats
+
+# Errors reviewed at this interval or longer count as mastered
+MASTERED_INTERVAL_DAYS = 30
+
+
+def is_mastered(review_interval_days: Optional[int]) -> bool:
+    return (review_interval_days or 0) >= MASTERED_INTERVAL_DAYS
+
+
+def count_error_change(deltas: Dict[int, Tuple[int, int]], book_id: int,
+                       before: Optional[int], after: Optional[int], existed: bool, exists: bool):
+    """
+    Add the change of one error record to per-book (errors, mastered) deltas.
+
+    `before`/`after` are the record's review intervals; `existed`/`exists`
+    tell whether the record was there before and after the change.
+    """
+    errors = int(exists) - int(existed)
+    mastered = int(exists and is_mastered(after)) - int(existed and is_mastered(before))
+    if errors or mastered:
+        current = deltas.get(book_id, (0, 0))
+        deltas[book_id] = (current[0] + errors, current[1] + mastered)
+
+
+async def apply_error_stats(user_id: int, deltas: Dict[int, Tuple[int, int]], db: AsyncSession):
+    """Add per-book (errors, mastered) deltas to a user's error counters."""
+    deltas = {book_id: d for book_id, d in deltas.items() if d != (0, 0)}
+    if not deltas:
+        return
+
+    table = UserErrorStats.__table__
+    upsert = dialect_insert(db, table)
+    now = datetime.utcnow()
+    await db.execute(
+        upsert.values([
+            {"user_id": user_id, "book_id": book_id, "error_count": errors,
+             "mastered_count": mastered, "updated_at": now}
+            for book_id, (errors, mastered) in sorted(deltas.items())
+        ]).on_conflict_do_update(
+            index_elements=["user_id", "book_id"],
+            set_={
+                "error_count": table.c.error_count + upsert.excluded.error_count,
+                "mastered_count": table.c.mastered_count + upsert.excluded.mastered_count,
+                "updated_at": upsert.excluded.updated_at,
+            }
+        )
+    )
+
+
+def rebuild_error_stats(conn: Connection, user_id: Optional[int] = None):
+    """Recount error counters from user_errors (for one user, or everyone)."""
+    errors = UserError.__table__
+    table = UserErrorStats.__table__
+    counts = select(
+        errors.c.user_id, errors.c.book_id, func.count(),
+        func.sum(case((errors.c.review_interval_days >= MASTERED_INTERVAL_DAYS, 1), else_=0)),
+        literal(datetime.utcnow())
+    ).group_by(errors.c.user_id, errors.c.book_id)
+    clear = delete(table)
+    if user_id is not None:
+        counts = counts.where(errors.c.user_id == user_id)
+        clear = clear.where(table.c.user_id == user_id)
+
+    conn.execute(clear)
+    conn.execute(insert(table).from_select(
+        ["user_id", "book_id", "error_count", "mastered_count", "updated_at"], counts
+    ))
+
+
+async def add_calculator_attempt(user_id: int, worksheet_type: str, is_correct: bool, db: AsyncSession):
+    """Count one calculator attempt in a user's worksheet counters."""
+    table = UserCalculatorStats.__table__
+    upsert = dialect_insert(db, table)
+    await db.execute(
+        upsert.values(
+            user_id=user_id,
+            worksheet_type=worksheet_type,
+            attempts=1,
+            correct=int(bool(is_correct)),
+            updated_at=datetime.utcnow()
+        ).on_conflict_do_update(
+            index_elements=["user_id", "worksheet_type"],
+            set_={
+                "attempts": table.c.attempts + upsert.excluded.attempts,
+                "correct": table.c.correct + upsert.excluded.correct,
+                "updated_at": upsert.excluded.updated_at,
+            }
+        )
+    )
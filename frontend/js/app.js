@@ -190,6 +190,19 @@ async function apiGet(endpoint) {
     return response.json();
 }
 
+// GET one page of a paginated list: the body plus the X-Next-Cursor header
+// (null on the last page)
+async function apiGetPage(endpoint) {
+    const response = await fetch(`${API_URL}${endpoint}`, {
+        headers: { 'Authorization': `Bearer ${state.token}` }
+    });
+    if (!response.ok) {
+        const error = await response.json();
+        throw new Error(error.detail || 'API Error');
+    }
+    return { data: await response.json(), nextCursor: response.headers.get('X-Next-Cursor') };
+}
+
 async function apiPost(endpoint, data) {
     const response = await fetch(`${API_URL}${endpoint}`, {
         method: 'POST',
@@ -206,6 +219,26 @@ async function apiPost(endpoint, data) {
     return response.json();
 }
 
+// ============== Static Assets ==============
+// Fingerprinted URLs from the backend manifest; falls back to the plain
+// relative path when the manifest is unavailable (e.g. frontend served alone)
+let assetManifestPromise = null;
+
+function loadAssetManifest() {
+    if (!assetManifestPromise) {
+        assetManifestPromise = fetch(`${API_URL}/assets/manifest`)
+            .then(response => response.ok ? response.json() : {})
+            .then(data => data.assets || {})
+            .catch(() => ({}));
+    }
+    return assetManifestPromise;
+}
+
+async function assetUrl(name) {
+    const manifest = await loadAssetManifest();
+    return manifest[name] ? new URL(manifest[name], API_URL).href : name;
+}
+
 // ============== Dashboard ==============
 async function loadDashboard() {
     try {
@@ -1033,23 +1066,128 @@ async function answerReview(questionId, userAnswer, correctAnswer) {
 }
 
 // ============== Glossary ==============
+// Terms are fetched on demand: one page (or one book/module) while browsing,
+// ranked server-side results while searching, autocomplete from /suggest.
+const GLOSSARY_PAGE_SIZE = 100;
+const GLOSSARY_SEARCH_LIMIT = 100;
+const GLOSSARY_INPUT_DELAY_MS = 200;
+const GLOSSARY_SUGGEST_LIMIT = 20;      // /glossary/suggest maximum
+
 let glossaryTerms = [];
+let glossaryTotal = 0;
+let glossaryNextCursor = null;
+let glossarySuggestions = {};   // suggested term name -> term_id
+let glossaryInputTimer = null;
+let glossaryRequestSeq = 0;
 let calculatorTemplates = {};
 
 async function loadGlossary() {
+    await refreshGlossary();
+}
+
+// Fetch and show the terms for the current search box and filters.
+// Responses that arrive after a newer request started are dropped.
+async function refreshGlossary() {
+    const seq = ++glossaryRequestSeq;
+    const query = document.getElementById('glossary-search').value.trim();
+    const bookId = document.getElementById('glossary-book-filter').value;
+    const moduleId = document.getElementById('glossary-module-filter').value;
+
     try {
-        const data = await apiGet('/glossary?limit=10000');
-        glossaryTerms = data.terms || [];
+        let terms;
+        let total;
+        let nextCursor = null;
+
+        if (glossarySuggestions[query]) {
+            terms = [await apiGet(`/glossary/term/${encodeURIComponent(glossarySuggestions[query])}`)];
+        } else if (query.length >= 2) {
+            const params = new URLSearchParams({ q: query, limit: GLOSSARY_SEARCH_LIMIT });
+            if (bookId) params.set('book_id', bookId);
+            terms = (await apiGet(`/glossary/search?${params}`)).terms || [];
+            if (moduleId) terms = terms.filter(t => t.module_id == moduleId);
+        } else if (query) {
+            // Too short to search: show the best prefix matches
+            const params = new URLSearchParams({ prefix: query, limit: GLOSSARY_SUGGEST_LIMIT, full: true });
+            if (bookId) params.set('book_id', bookId);
+            terms = (await apiGet(`/glossary/suggest?${params}`)).suggestions || [];
+            if (moduleId) terms = terms.filter(t => t.module_id == moduleId);
+        } else if (bookId && moduleId) {
+            terms = (await apiGet(`/glossary/module/${bookId}/${moduleId}`)).terms || [];
+        } else if (bookId) {
+            terms = (await apiGet(`/glossary/book/${bookId}`)).terms || [];
+        } else {
+            const page = await apiGetPage(`/glossary?limit=${GLOSSARY_PAGE_SIZE}`);
+            terms = page.data.terms || [];
+            total = page.data.total;
+            nextCursor = page.nextCursor;
+        }
+
+        if (seq !== glossaryRequestSeq) return;
+        glossaryTerms = terms;
+        glossaryTotal = total ?? terms.length;
+        glossaryNextCursor = nextCursor;
         displayGlossary(glossaryTerms);
     } catch (error) {
+        if (seq !== glossaryRequestSeq) return;
+        glossaryNextCursor = null;
+        updateGlossaryMoreButton();
         document.getElementById('glossary-list').innerHTML =
             '<p class="text-center text-muted">Ошибка загрузки глоссария</p>';
     }
 }
 
+async function loadMoreGlossary() {
+    if (!glossaryNextCursor) return;
+    const seq = glossaryRequestSeq;
+    try {
+        const page = await apiGetPage(`/glossary?limit=${GLOSSARY_PAGE_SIZE}&cursor=${encodeURIComponent(glossaryNextCursor)}`);
+        if (seq !== glossaryRequestSeq) return;
+        glossaryTerms = glossaryTerms.concat(page.data.terms || []);
+        glossaryNextCursor = page.nextCursor;
+        displayGlossary(glossaryTerms);
+    } catch (error) {
+        showToast('Ошибка загрузки глоссария', 'error');
+    }
+}
+
+function updateGlossaryMoreButton() {
+    const button = document.getElementById('glossary-more');
+    if (button) button.classList.toggle('hidden', !glossaryNextCursor);
+}
+
+// Autocomplete: fill the datalist under the search box from /suggest
+async function suggestGlossary(prefix) {
+    const bookId = document.getElementById('glossary-book-filter').value;
+    const list = document.getElementById('glossary-suggestions');
+    if (!list) return;
+
+    if (!prefix) {
+        list.innerHTML = '';
+        return;
+    }
+
+    try {
+        const params = new URLSearchParams({ prefix, limit: 10 });
+        if (bookId) params.set('book_id', bookId);
+        const data = await apiGet(`/glossary/suggest?${params}`);
+        if (document.getElementById('glossary-search').value.trim() !== prefix) return;
+
+        data.suggestions.forEach(s => { glossarySuggestions[s.term_en] = s.term_id; });
+        list.innerHTML = data.suggestions.map(s => `
+            <option value="${escapeAttribute(s.term_en)}">${escapeAttribute(s.match !== s.term_en ? s.match : (s.term_ru || ''))}</option>
+        `).join('');
+    } catch (error) {
+        list.innerHTML = '';
+    }
+}
+
+function escapeAttribute(text) {
+    return String(text ?? '').replace(/&/g, '&amp;').replace(/"/g, '&quot;').replace(/</g, '&lt;');
+}
+
 async function loadCalculatorTemplates() {
     try {
-        const response = await fetch('data/v2/calculator_templates.json');
+        const response = await fetch(await assetUrl('data/v2/calculator_templates.json'));
         const data = await response.json();
         calculatorTemplates = data.templates || {};
     } catch (error) {
@@ -1108,7 +1246,12 @@ function displayGlossary(terms) {
     const container = document.getElementById('glossary-list');
     const countEl = document.getElementById('glossary-count');
 
-    if (countEl) countEl.textContent = `${terms.length} терминов`;
+    if (countEl) {
+        countEl.textContent = glossaryTotal > terms.length
+            ? `${terms.length} из ${glossaryTotal} терминов`
+            : `${terms.length} терминов`;
+    }
+    updateGlossaryMoreButton();
 
     container.innerHTML = terms.map(term => `
         <div class="glossary-item" data-term-id="${term.term_id}">
@@ -1160,24 +1303,18 @@ function collapseAllCalcBlocks() {
 }
 
 function searchGlossary() {
-    const query = document.getElementById('glossary-search').value.toLowerCase();
-    const bookId = document.getElementById('glossary-book-filter').value;
-    const moduleId = document.getElementById('glossary-module-filter').value;
-
-    let filtered = glossaryTerms;
+    const query = document.getElementById('glossary-search').value.trim();
 
-    if (bookId) filtered = filtered.filter(t => t.book_id == bookId);
-    if (moduleId) filtered = filtered.filter(t => t.module_id == moduleId);
-    if (query) {
-        filtered = filtered.filter(t =>
-            t.term_en.toLowerCase().includes(query) ||
-            (t.term_ru && t.term_ru.toLowerCase().includes(query)) ||
-            t.definition_en.toLowerCase().includes(query) ||
-            (t.los_id && t.los_id.toLowerCase().includes(query))
-        );
+    clearTimeout(glossaryInputTimer);
+    if (glossarySuggestions[query]) {
+        // A suggestion was picked: show that term right away
+        refreshGlossary();
+        return;
     }
-
-    displayGlossary(filtered);
+    glossaryInputTimer = setTimeout(() => {
+        suggestGlossary(query);
+        refreshGlossary();
+    }, GLOSSARY_INPUT_DELAY_MS);
 }
 
 function onBookFilterChange() {
@@ -1286,23 +1423,7 @@ function getModulesForBook(bookId) {
 }
 
 function filterGlossary() {
-    const bookId = document.getElementById('glossary-book-filter').value;
-    const moduleId = document.getElementById('glossary-module-filter').value;
-    const query = document.getElementById('glossary-search').value.toLowerCase();
-
-    let filtered = glossaryTerms;
-
-    if (bookId) filtered = filtered.filter(t => t.book_id == bookId);
-    if (moduleId) filtered = filtered.filter(t => t.module_id == moduleId);
-    if (query) {
-        filtered = filtered.filter(t =>
-            t.term_en.toLowerCase().includes(query) ||
-            (t.term_ru && t.term_ru.toLowerCase().includes(query)) ||
-            t.definition_en.toLowerCase().includes(query)
-        );
-    }
-
-    displayGlossary(filtered);
+    refreshGlossary();
 }
 
 // ============== Formulas ==============
@@ -1310,7 +1431,7 @@ let formulasData = [];
 
 async function loadFormulas() {
     try {
-        const response = await fetch('data/v2/formulas_master.json');
+        const response = await fetch(await assetUrl('data/v2/formulas_master.json'));
         const data = await response.json();
         formulasData = data.formulas || [];
         displayFormulas(formulasData);
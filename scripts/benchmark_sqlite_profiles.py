@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Benchmark concurrent /api/tests/submit throughput per SQLite profile.
+
+For each profile, starts the backend with uvicorn on a fresh temporary
+database, registers one user per client, and has all clients submit
+mock-exam results concurrently for a fixed time.
+
+Usage:
+    python scripts/benchmark_sqlite_profiles.py [--profiles default,tuned]
+        [--clients 16] [--workers 4] [--duration 15] [--port 8765]
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+def request(base_url, method, path, data=None, token=None, timeout=60):
+    headers = {"Content-Type": "application/json"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    body = json.dumps(data).encode() if data is not None else None
+    req = urllib.request.Request(base_url + path, data=body, headers=headers, method=method)
+    with urllib.request.urlopen(req, timeout=timeout) as response:
+        return json.loads(response.read() or b"null")
+
+
+def wait_for_server(base_url, process, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("Server exited during startup")
+        try:
+            request(base_url, "GET", "/health", timeout=2)
+            return
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.2)
+    raise RuntimeError("Server did not start")
+
+
+def register_users(base_url, count):
+    tokens = []
+    for i in range(count):
+        username = f"bench{i}"
+        request(base_url, "POST", "/api/auth/register",
+                {"username": username, "email": f"{username}@example.com", "password": "benchmark"})
+        login = request(base_url, "POST", "/api/auth/login/json", {"username": username, "password": "benchmark"})
+        tokens.append(login["access_token"])
+    return tokens
+
+
+def run_clients(base_url, tokens, question_ids, duration):
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    stop_at = time.time() + duration
+
+    def client(token, seed):
+        rng = random.Random(seed)
+        while time.time() < stop_at:
+            details = [
+                {"question_id": qid, "correct": rng.random() < 0.7, "user_answer": "opt1", "time_spent": 30}
+                for qid in question_ids
+            ]
+            payload = {"test_type": "mock_exam", "test_mode": "standard",
+                       "time_spent_seconds": 30 * len(details), "question_details": details}
+            started = time.perf_counter()
+            try:
+                request(base_url, "POST", "/api/tests/submit", payload, token)
+            except (urllib.error.URLError, ConnectionError, TimeoutError):
+                with lock:
+                    errors[0] += 1
+                continue
+            with lock:
+                latencies.append(time.perf_counter() - started)
+
+    threads = [threading.Thread(target=client, args=(token, i)) for i, token in enumerate(tokens)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return latencies, errors[0]
+
+
+def benchmark_profile(profile, args):
+    base_url = f"http://127.0.0.1:{args.port}"
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'bench.db')}", SQLITE_PROFILE=profile)
+
+        # Create the schema once, so workers don't race on startup
+        subprocess.run([sys.executable, "-c", "from backend.database import init_db; init_db()"],
+                       cwd=ROOT, env=env, check=True, stdout=subprocess.DEVNULL)
+
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "backend.main:app", "--port", str(args.port),
+             "--workers", str(args.workers), "--log-level", "warning"],
+            cwd=ROOT, env=env
+        )
+        try:
+            wait_for_server(base_url, server)
+            tokens = register_users(base_url, args.clients)
+            exam = request(base_url, "GET", "/api/tests/mock-exam?fields=delivery", token=tokens[0])
+            question_ids = [q["question_id"] for q in exam]
+
+            latencies, errors = run_clients(base_url, tokens, question_ids, args.duration)
+        finally:
+            server.terminate()
+            server.wait()
+
+    latencies.sort()
+    return {
+        "profile": profile,
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput": len(latencies) / args.duration,
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else 0,
+        "p95_ms": latencies[int(len(latencies) * 0.95)] * 1000 if latencies else 0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profiles", default="default,tuned", help="Comma-separated SQLITE_PROFILE values")
+    parser.add_argument("--clients", type=int, default=16, help="Concurrent clients (one user each)")
+    parser.add_argument("--workers", type=int, default=4, help="uvicorn worker processes")
+    parser.add_argument("--duration", type=float, default=15, help="Seconds of load per profile")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    print(f"📊 {args.clients} clients, {args.workers} workers, {args.duration:.0f}s per profile\n")
+    results = []
+    for profile in args.profiles.split(","):
+        print(f"   Running profile {profile}...")
+        results.append(benchmark_profile(profile.strip(), args))
+
+    print(f"\n{'profile':<10} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'errors':>7}")
+    for r in results:
+        print(f"{r['profile']:<10} {r['throughput']:>8.1f} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} {r['errors']:>7}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Build the compiled content bundle for the backend.
+
+Compiles every v2 questions.json, glossary.json, meta.json,
+calculator_templates.json, formulas_master.json and the calculator
+problem files into one versioned, memory-mappable bundle file. Questions
+found only in the legacy books/book{N}.json files are added to the
+question table so old IDs keep resolving.
+
+Usage:
+    python scripts/build_content_bundle.py [output_path]
+
+Then start the backend with CONTENT_BUNDLE=<output_path>.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from backend.bundle import build_bundle, ContentBundle  # noqa: E402
+from backend.content import DATA_ROOT, BOOK_FOLDERS  # noqa: E402
+
+DEFAULT_OUTPUT = os.path.join(DATA_ROOT, "content.bundle")
+
+
+def main():
+    output_path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_OUTPUT
+
+    print(f"📦 Building content bundle from {os.path.normpath(DATA_ROOT)}")
+    summary = build_bundle(DATA_ROOT, output_path, BOOK_FOLDERS)
+
+    # Sanity check: the bundle must open and resolve every question
+    bundle = ContentBundle(output_path)
+    missing = [qid for qid in bundle.question_ids() if bundle.question(qid) is None]
+    bundle.close()
+
+    if missing:
+        print(f"❌ {len(missing)} questions cannot be resolved, e.g. {missing[:5]}")
+        sys.exit(1)
+
+    print(f"   Files:     {summary['files']}")
+    print(f"   Modules:   {summary['modules']}")
+    print(f"   Questions: {summary['questions']} ({summary['legacy_questions']} from legacy books/)")
+    print(f"   Terms:     {summary['terms']}")
+    print(f"   Size:      {summary['size_bytes'] / 1024:.1f} KB")
+    print(f"   Hash:      {summary['content_hash'][:16]}")
+    print(f"\n✅ Written to {os.path.normpath(output_path)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Rescale the spaced-repetition schedule of stored errors.
+
+Re-applies the current scheduler limits (SRS_MAX_INTERVAL_DAYS, minimum
+ease) to every error record, optionally scaling all intervals, e.g. 0.5
+to pull reviews closer before the exam. Only rescales the stored state;
+answers are not replayed. Due dates move only where the interval changes
+(to the last answer plus the new interval), and items already due stay
+due; error counters are rebuilt.
+
+Usage:
+    python scripts/reschedule_reviews.py [--scale 1.0] [--user USER_ID]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from backend.database import engine, init_db  # noqa: E402
+from backend.scheduler import SRS_MAX_INTERVAL_DAYS, reschedule_errors  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply every interval by this factor")
+    parser.add_argument("--user", type=int, default=None, help="only reschedule this user id")
+    args = parser.parse_args()
+    if args.scale <= 0:
+        parser.error("--scale must be positive")
+
+    init_db()
+    started = time.perf_counter()
+    with engine.begin() as conn:
+        updated = reschedule_errors(conn, scale=args.scale, user_id=args.user)
+
+    print(f"✅ Rescheduled {updated} errors in {time.perf_counter() - started:.2f}s "
+          f"(scale {args.scale}, max interval {SRS_MAX_INTERVAL_DAYS} days)")
+
+
+if __name__ == '__main__':
+    main()
@@ -8,7 +8,8 @@ import os
 # Add project root to path
 sys.path.insert(0, os.path.dirname(__file__))
 
-from backend.routers.glossary import load_glossary_data, load_all_glossary, DATA_PATH
+from backend.content import DATA_PATH
+from backend.routers.glossary import load_glossary_data, load_all_glossary
 
 print("=" * 60)
 print("GLOSSARY LOADING TEST")
@@ -0,0 +1,67 @@
+"""
+Shared fixtures for the backend tests.
+
+The backend reads its settings from the environment at import time, so the
+test database and cheap test settings are set here, before anything from
+`backend` is imported. All tests share one temporary SQLite database;
+every `client` gets its own freshly registered user.
+"""
+
+import os
+import sys
+import tempfile
+import uuid
+
+_tmpdir = tempfile.mkdtemp(prefix="cfa-trainer-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmpdir, 'test.db')}"
+os.environ.setdefault("PBKDF2_ITERATIONS", "1000")
+os.environ.setdefault("AUTH_IP_BURST", "100000")
+os.environ.setdefault("AUTH_IP_RATE_PER_MINUTE", "100000")
+os.environ.setdefault("CONTENT_BUNDLE", "")
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from backend.main import app  # noqa: E402
+from backend.database import engine  # noqa: E402
+
+PASSWORD = "secret123"
+
+
+@pytest.fixture(scope="session")
+def app_client():
+    """TestClient with the application started (database initialized)."""
+    with TestClient(app) as client:
+        yield client
+
+
+def register(client: TestClient, username: str = None) -> dict:
+    """Register and log in a new user; returns the Authorization header."""
+    username = username or f"user_{uuid.uuid4().hex[:10]}"
+    response = client.post("/api/auth/register", json={
+        "username": username, "email": f"{username}@example.com", "password": PASSWORD
+    })
+    assert response.status_code == 201, response.text
+    response = client.post("/api/auth/login/json", json={"username": username, "password": PASSWORD})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture
+def client(app_client):
+    """Application client authenticated as a new user."""
+    return TestClient(app, headers=register(app_client))
+
+
+@pytest.fixture
+def user_id(client):
+    return client.get("/api/auth/me").json()["id"]
+
+
+@pytest.fixture
+def db_conn(app_client):
+    """Sync connection to the test database, in a committed transaction."""
+    with engine.begin() as conn:
+        yield conn
@@ -0,0 +1,105 @@
+import asyncio
+import uuid
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from starlette.requests import Request
+
+from backend import auth
+from backend.admission import AdmissionController, TokenBucketLimiter, parse_networks, resolve_client_ip
+from backend.main import app
+
+from conftest import register
+
+
+def make_request(peer="203.0.113.7", forwarded=None):
+    headers = [(b"x-forwarded-for", forwarded.encode())] if forwarded else []
+    return Request({"type": "http", "method": "POST", "path": "/", "headers": headers, "client": (peer, 50000)})
+
+
+def test_token_bucket_allows_a_burst_then_asks_to_wait():
+    limiter = TokenBucketLimiter(rate_per_minute=60, burst=2)
+    assert limiter.take("a") == 0
+    assert limiter.take("a") == 0
+    assert 0 < limiter.take("a") <= 1
+    assert limiter.take("b") == 0
+
+
+def test_forwarded_for_is_ignored_without_trusted_proxies():
+    request = make_request(forwarded="198.51.100.1")
+    assert resolve_client_ip(request, []) == "203.0.113.7"
+    assert resolve_client_ip(request, parse_networks("10.0.0.0/8")) == "203.0.113.7"
+
+
+def test_forwarded_for_is_read_behind_trusted_proxies():
+    trusted = parse_networks("10.0.0.0/8, 127.0.0.1")
+    # The leftmost entry is whatever the client sent; only the hops the proxies added count
+    request = make_request("127.0.0.1", forwarded="1.1.1.1, 198.51.100.1, 10.0.0.5")
+    assert resolve_client_ip(request, trusted) == "198.51.100.1"
+    assert resolve_client_ip(make_request("127.0.0.1"), trusted) == "127.0.0.1"
+
+
+def test_rate_limited_client_is_rejected_with_retry_after():
+    controller = AdmissionController(trusted_proxies="127.0.0.1")
+    controller.by_ip = TokenBucketLimiter(rate_per_minute=1, burst=1)
+
+    async def attempt(forwarded):
+        async with controller.admit(make_request("127.0.0.1", forwarded)):
+            pass
+
+    asyncio.run(attempt("198.51.100.1"))
+    asyncio.run(attempt("198.51.100.2"))
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(attempt("198.51.100.1"))
+    assert exc.value.status_code == 429
+    assert int(exc.value.headers["Retry-After"]) >= 1
+    assert controller.metrics()["rejected_rate_limited"] == 1
+
+
+def test_full_queue_is_rejected():
+    controller = AdmissionController(max_concurrent=1, max_queue=0)
+
+    async def run():
+        release = asyncio.Event()
+
+        async def hold():
+            async with controller.admit(make_request("198.51.100.1")):
+                await release.wait()
+
+        holder = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        try:
+            with pytest.raises(HTTPException) as exc:
+                async with controller.admit(make_request("198.51.100.2")):
+                    pass
+            assert exc.value.status_code == 429
+        finally:
+            release.set()
+            await holder
+
+    asyncio.run(run())
+    metrics = controller.metrics()
+    assert (metrics["admitted"], metrics["rejected_queue_full"], metrics["in_flight"]) == (1, 1, 0)
+
+
+def test_login_attempts_are_limited_per_username(app_client):
+    username = f"user_{uuid.uuid4().hex[:10]}"
+    register(app_client, username)
+    statuses = [
+        app_client.post("/api/auth/login/json", json={"username": username, "password": "wrong"}).status_code
+        for _ in range(10)
+    ]
+    assert 401 in statuses
+    assert statuses[-1] == 429
+
+
+def test_metrics_are_for_ops_users_only(app_client, monkeypatch):
+    username = f"user_{uuid.uuid4().hex[:10]}"
+    client = TestClient(app, headers=register(app_client, username))
+    assert client.get("/api/auth/metrics").status_code == 403
+
+    monkeypatch.setattr(auth, "OPS_USERNAMES", frozenset({username}))
+    response = client.get("/api/auth/metrics")
+    assert response.status_code == 200
+    assert "rejected_rate_limited" in response.json()
@@ -0,0 +1,43 @@
+import time
+from datetime import timedelta
+
+import pytest
+
+from backend import auth
+from backend.auth import _verified_tokens, create_access_token, decode_token
+
+
+@pytest.fixture
+def western_timezone(monkeypatch):
+    """Run with a local time zone behind UTC."""
+    monkeypatch.setenv("TZ", "America/New_York")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def test_token_expiry_is_a_utc_timestamp(western_timezone):
+    token = create_access_token({"sub": "alice"}, expires_delta=timedelta(minutes=5))
+    _verified_tokens.clear()
+    decode_token(token)
+    expires_at, _ = _verified_tokens._entries[token]
+    assert abs(expires_at - (time.time() + 300)) < 5
+
+
+def test_expired_token_is_rejected_after_a_cache_hit(monkeypatch):
+    token = create_access_token({"sub": "alice"}, expires_delta=timedelta(seconds=30))
+    assert decode_token(token).username == "alice"
+    assert decode_token(token).username == "alice"      # served from the cache
+
+    later = time.time() + 31
+    monkeypatch.setattr(auth.time, "time", lambda: later)
+    assert decode_token(token) is None
+
+
+def test_expired_and_tampered_tokens_are_rejected():
+    assert decode_token(create_access_token({"sub": "alice"}, expires_delta=timedelta(seconds=-1))) is None
+    token = create_access_token({"sub": "alice"})
+    assert decode_token(token[:-2] + ("AA" if not token.endswith("AA") else "BB")) is None
+    assert decode_token("not-a-token") is None
+
@@ -0,0 +1,78 @@
+import struct
+
+import pytest
+
+from backend.bundle import HEADER, BundleError, ContentBundle, build_bundle
+from backend.content import BOOK_FOLDERS, DATA_ROOT, ContentCatalog
+from backend.exam import QuestionPool
+
+
+@pytest.fixture(scope="module")
+def bundle_path(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("bundle") / "content.bundle")
+    build_bundle(DATA_ROOT, path, BOOK_FOLDERS)
+    return path
+
+
+@pytest.fixture
+def bundle_catalog(bundle_path):
+    catalog = ContentCatalog(bundle_path=bundle_path, check_interval=3600)
+    assert catalog.bundle is not None
+    yield catalog
+    catalog.bundle.close()
+
+
+def test_bundle_catalog_matches_json_catalog(bundle_catalog):
+    json_catalog = ContentCatalog(bundle_path=None)
+    assert bundle_catalog.book(1) == json_catalog.book(1)
+    assert list(bundle_catalog.all_terms()) == list(json_catalog.all_terms())
+    assert bundle_catalog.module_questions(1, 1) == json_catalog.module_questions(1, 1)
+
+
+def test_bundle_catalog_keeps_no_decoded_content(bundle_catalog):
+    assert bundle_catalog.book(1) is not bundle_catalog.book(1)
+    bundle_catalog.module_questions(1, 1)
+    bundle_catalog.module_glossary(1, 1)
+    bundle_catalog.all_terms()
+    assert bundle_catalog._files == {}
+    assert not any(isinstance(key, tuple) and key[0] in ("book", "module_glossary") or key == "all_terms"
+                   for key in bundle_catalog._views)
+
+
+def test_question_pool_holds_ids_only(bundle_catalog):
+    pool = QuestionPool.from_catalog(bundle_catalog)
+    assert len(pool) > 0
+    assert all(isinstance(qid, str) for qid in pool.question_ids)
+    assert [q["question_id"] for q in pool.take([0, 1])] == list(pool.question_ids[:2])
+
+
+def corrupt(bundle_path, tmp_path, toc: bytes):
+    with open(bundle_path, "rb") as f:
+        data = bytearray(f.read())
+    magic, version, flags, content_hash, toc_offset, _ = HEADER.unpack_from(data, 0)
+    data = data[:toc_offset] + toc
+    struct.pack_into(HEADER.format, data, 0, magic, version, flags, content_hash, toc_offset, len(toc))
+    path = tmp_path / "corrupt.bundle"
+    path.write_bytes(bytes(data))
+    return str(path)
+
+
+@pytest.mark.parametrize("toc", [b"{not json", b"[]", b'{"files": {}, "dirs": {}}',
+                                 b'{"files": {}, "dirs": {}, "tables": {"questions": 5}}'])
+def test_corrupt_toc_raises_bundle_error(bundle_path, tmp_path, toc):
+    with pytest.raises(BundleError):
+        ContentBundle(corrupt(bundle_path, tmp_path, toc))
+
+
+def test_truncated_bundle_raises_bundle_error(bundle_path, tmp_path):
+    path = tmp_path / "truncated.bundle"
+    with open(bundle_path, "rb") as f:
+        path.write_bytes(f.read()[:HEADER.size + 10])
+    with pytest.raises(BundleError):
+        ContentBundle(str(path))
+
+
+def test_catalog_falls_back_to_json_on_corrupt_bundle(bundle_path, tmp_path):
+    catalog = ContentCatalog(bundle_path=corrupt(bundle_path, tmp_path, b"{not json"))
+    assert catalog.bundle is None
+    assert catalog.book(1) is not None
@@ -0,0 +1,40 @@
+import json
+import os
+
+from backend.content import ContentCatalog
+
+
+def write_module(root, questions):
+    module_dir = os.path.join(root, "v2", "book1_quants", "module1")
+    os.makedirs(module_dir, exist_ok=True)
+    with open(os.path.join(module_dir, "questions.json"), "w", encoding="utf-8") as f:
+        json.dump({"module_id": 1, "book_name": "Quants", "questions": questions}, f)
+    return os.path.join(module_dir, "questions.json")
+
+
+def test_files_are_parsed_once_and_shared(tmp_path):
+    write_module(str(tmp_path), [{"question_id": "Q1"}])
+    catalog = ContentCatalog(data_root=str(tmp_path), check_interval=0, bundle_path=None)
+
+    assert catalog.module_questions(1, 1) is catalog.module_questions(1, 1)
+    assert catalog.book(1) is catalog.book(1)
+    assert [q["question_id"] for q in catalog.book(1)["learning_modules"][0]["questions"]] == ["Q1"]
+
+
+def test_changed_file_bumps_version_and_drops_views(tmp_path):
+    path = write_module(str(tmp_path), [{"question_id": "Q1"}])
+    catalog = ContentCatalog(data_root=str(tmp_path), check_interval=0, bundle_path=None)
+    catalog.book(1)
+    version = catalog.version
+
+    write_module(str(tmp_path), [{"question_id": "Q1"}, {"question_id": "Q2-longer"}])
+    os.utime(path, ns=(1, 1))
+
+    assert catalog.version == version + 1
+    assert len(catalog.book(1)["learning_modules"][0]["questions"]) == 2
+
+
+def test_missing_book_is_none(tmp_path):
+    catalog = ContentCatalog(data_root=str(tmp_path), check_interval=0, bundle_path=None)
+    assert catalog.book(1) is None
+    assert catalog.module_questions(99, 1) is None
@@ -0,0 +1,68 @@
+import asyncio
+
+import httpx
+from sqlalchemy import text
+
+from backend.main import app
+
+
+def create_session(client, **body):
+    response = client.post("/api/tests/sessions", json={"mode": "adaptive", "seed": 7, **body})
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def test_pages_answers_and_submit_from_stored_state(client):
+    session = create_session(client, test_mode="timed")
+    page = client.get(f"/api/tests/sessions/{session['id']}/questions", params={"page": 1}).json()
+    question = page["questions"][0]
+    response = client.post(f"/api/tests/sessions/{session['id']}/answers", json={
+        "answers": [{"question_id": question["question_id"], "user_answer": "opt1", "time_spent": 5}]
+    })
+    assert response.json()["answered"] == 1
+
+    result = client.post("/api/tests/submit", json={
+        "session_id": session["id"], "test_type": "module", "test_mode": "standard",
+        "book_id": 1, "module_id": 1, "time_spent_seconds": 60,
+    })
+    assert result.status_code == 200, result.text
+    body = result.json()
+    assert (body["test_type"], body["test_mode"]) == ("mock_exam", "timed")
+    assert body["book_id"] is None and body["module_id"] is None
+    assert body["total_questions"] == session["total_questions"]
+
+    again = client.post("/api/tests/submit", json={
+        "session_id": session["id"], "test_type": "mock_exam", "test_mode": "standard", "time_spent_seconds": 1,
+    })
+    assert again.status_code == 409
+
+
+def test_concurrent_submits_create_one_result(client, db_conn):
+    session = create_session(client)
+    submit = {"session_id": session["id"], "test_type": "mock_exam", "test_mode": "standard",
+              "time_spent_seconds": 60}
+
+    async def submit_twice():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test",
+                                     headers=dict(client.headers)) as async_client:
+            return await asyncio.gather(*(async_client.post("/api/tests/submit", json=submit) for _ in range(2)))
+
+    responses = asyncio.run(submit_twice())
+    assert sorted(r.status_code for r in responses) == [200, 409]
+
+    user_id = client.get("/api/auth/me").json()["id"]
+    results = db_conn.execute(text(
+        "SELECT COUNT(*) FROM test_results WHERE user_id = :user_id AND test_type = 'mock_exam'"
+    ), {"user_id": user_id}).scalar()
+    assert results == 1
+
+
+def test_submit_needs_exactly_one_source_of_answers(client):
+    base = {"test_type": "module", "test_mode": "standard", "book_id": 1, "module_id": 1, "time_spent_seconds": 1}
+    assert client.post("/api/tests/submit", json=base).status_code == 422
+    assert client.post("/api/tests/submit", json={**base, "question_details": []}).status_code == 422
+    both = {**base, "session_id": 1, "question_details": [{"question_id": "QM-1-Q001", "correct": True}]}
+    assert client.post("/api/tests/submit", json=both).status_code == 422
+    history = client.get("/api/tests/history").json()
+    assert history == []
@@ -0,0 +1,45 @@
+from backend.glossary_index import GlossaryIndex, tokenize
+
+TERMS = [
+    {"term_id": "T1", "book_id": 1, "term_en": "Holding period return", "definition_en": "Return over a holding period"},
+    {"term_id": "T2", "book_id": 1, "term_en": "Effective annual rate", "definition_en": "Annual rate with compounding"},
+    {"term_id": "T3", "book_id": 2, "term_en": "Inflation", "definition_en": "Rise of the price level, lowers the real return"},
+    {"term_id": "T4", "book_id": 2, "term_en": "Доходность", "term_ru": "Доходность за период владения"},
+]
+
+
+def ids(results):
+    return [t["term_id"] for t in results]
+
+
+def test_tokenize_drops_stopwords_and_folds_case():
+    assert tokenize("The Return of ЁЖ") == ["return", "еж"]
+
+
+def test_name_match_ranks_above_definition_match():
+    assert ids(GlossaryIndex(TERMS).search("return"))[:2] == ["T1", "T3"]
+
+
+def test_terms_matching_more_words_come_first():
+    assert ids(GlossaryIndex(TERMS).search("annual compounding return"))[0] == "T2"
+
+
+def test_prefix_and_book_filter():
+    index = GlossaryIndex(TERMS)
+    assert ids(index.search("infl")) == ["T3"]
+    assert ids(index.search("return", book_id=2)) == ["T3"]
+    assert ids(index.search("владения")) == ["T4"]
+    assert index.search("the") == []
+
+
+def test_search_endpoint(client):
+    response = client.get("/api/glossary/search", params={"q": "return"})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["total"] > 0
+    assert "return" in (body["terms"][0]["term_en"] + body["terms"][0].get("definition_en", "")).lower()
+
+
+def test_search_by_los_id(client):
+    terms = client.get("/api/glossary/search", params={"q": "LOS_1a", "limit": 100}).json()["terms"]
+    assert terms and all(t["los_id"] == "LOS_1a" for t in terms)
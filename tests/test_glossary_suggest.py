@@ -0,0 +1,59 @@
+from backend.glossary_index import SuggestIndex
+
+TERMS = [
+    {"term_id": "T1", "book_id": 1, "module_id": 1, "term_en": "Holding Period Return (HPR)", "term_ru": "Доходность за период владения"},
+    {"term_id": "T2", "book_id": 1, "module_id": 1, "term_en": "Effective Annual Rate (EAR)"},
+    {"term_id": "T3", "book_id": 1, "module_id": 2, "term_en": "Money-Weighted Return (MWRR)"},
+    {"term_id": "T4", "book_id": 2, "module_id": 1, "term_en": "Holding cost"},
+]
+
+
+def ids(results):
+    return [s["term_id"] for s in results]
+
+
+def test_name_prefix_beats_inner_word_prefix():
+    index = SuggestIndex(TERMS)
+    assert ids(index.suggest("hold")) == ["T4", "T1"]
+    assert ids(index.suggest("ret")) == ["T1", "T3"]
+
+
+def test_abbreviations_and_russian_names():
+    index = SuggestIndex(TERMS)
+    assert index.suggest("ea")[0]["match"] == "EAR"
+    assert ids(index.suggest("mwr")) == ["T3"]
+    assert ids(index.suggest("доход")) == ["T1"]
+
+
+def test_book_filter_and_limit():
+    index = SuggestIndex(TERMS)
+    assert ids(index.suggest("hold", book_id=1)) == ["T1"]
+    assert len(index.suggest("h", limit=1)) == 1
+    assert index.suggest("   ") == []
+
+
+def test_glossary_screen_endpoints(client):
+    suggestions = client.get("/api/glossary/suggest", params={"prefix": "ret"}).json()["suggestions"]
+    assert suggestions
+    term = client.get(f"/api/glossary/term/{suggestions[0]['term_id']}").json()
+    assert term["term_en"] == suggestions[0]["term_en"]
+
+    assert client.get("/api/glossary/search", params={"q": "return", "book_id": 1}).json()["total"] > 0
+    assert client.get("/api/glossary/book/1").json()["total"] > 0
+    assert client.get("/api/glossary/module/1/1").json()["total"] > 0
+
+    page = client.get("/api/glossary", params={"limit": 100}).json()
+    assert len(page["terms"]) == 100 < page["total"]
+
+
+def test_los_ids_are_suggested_after_names():
+    index = SuggestIndex([*TERMS, {"term_id": "T5", "book_id": 1, "module_id": 2, "term_en": "Lasso", "los_id": "LOS_2b"}])
+    assert ids(index.suggest("los_2")) == ["T5"]
+    assert index.suggest("LOS_2b")[0]["match"] == "LOS_2b"
+    assert ids(index.suggest("l")) == ["T5"]
+
+
+def test_one_character_prefix_returns_full_terms(client):
+    data = client.get("/api/glossary/suggest", params={"prefix": "i", "limit": 20, "full": True}).json()
+    assert 0 < data["total"] <= 20
+    assert all("definition_en" in t and "los_id" in t for t in data["suggestions"])
@@ -0,0 +1,60 @@
+import asyncio
+import gzip
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from backend import http_cache
+from backend.http_cache import CachedBody
+from backend.routers import glossary
+
+
+def test_concurrent_first_requests_compress_once(monkeypatch):
+    calls = []
+
+    def slow_gzip(body):
+        calls.append(body)
+        time.sleep(0.05)
+        return gzip.compress(body)
+
+    monkeypatch.setitem(http_cache.ENCODERS, "gzip", slow_gzip)
+    cached = CachedBody({"terms": ["x"] * 1000})
+    assert cached.ready("gzip") is None
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: cached.encoded("gzip"), range(8)))
+
+    assert len(calls) == 1
+    assert all(r is results[0] for r in results)
+    assert gzip.decompress(cached.ready("gzip")) == cached.body
+
+
+def on_event_loop():
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def test_cached_responses_are_built_and_compressed_off_the_event_loop(client, monkeypatch):
+    seen = {}
+    encode = http_cache.ENCODERS["gzip"]
+    all_terms = glossary.load_all_glossary
+
+    def recording_gzip(body):
+        seen["encode"] = on_event_loop()
+        return encode(body)
+
+    def recording_terms():
+        seen["build"] = on_event_loop()
+        return all_terms()
+
+    monkeypatch.setitem(http_cache.ENCODERS, "gzip", recording_gzip)
+    monkeypatch.setattr(glossary, "load_all_glossary", recording_terms)
+    http_cache._response_cache.clear()
+
+    response = client.get("/api/glossary", params={"limit": 300}, headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert len(response.json()["terms"]) == 300
+    assert seen == {"build": False, "encode": False}
@@ -0,0 +1,103 @@
+import logging
+
+from sqlalchemy import create_engine, inspect, text
+
+from backend.database import Base
+from backend.migrations import MIGRATIONS, run_migrations
+
+# Indexes added by migrations, dropped to get a database as create_all
+# made it before the migration runner existed
+MIGRATION_INDEXES = (
+    "ix_user_progress_user_book_module",
+    "ix_user_errors_user_question",
+    "ix_user_errors_user_next_review",
+    "ix_test_results_user_created",
+    "ix_user_errors_user_error_count",
+    "ix_user_errors_user_book_error_count",
+    "ix_calculator_sessions_user_created",
+)
+
+
+def new_engine(tmp_path):
+    return create_engine(f"sqlite:///{tmp_path / 'migrations.db'}")
+
+
+def legacy_engine(tmp_path):
+    """Database with the tables but none of the migrated indexes and columns."""
+    engine = new_engine(tmp_path)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        for name in MIGRATION_INDEXES:
+            conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+        conn.execute(text("ALTER TABLE user_errors DROP COLUMN ease_factor"))
+        conn.execute(text("ALTER TABLE user_errors DROP COLUMN repetitions"))
+        conn.execute(text("CREATE INDEX ix_calculator_sessions_user_id ON calculator_sessions (user_id)"))
+    return engine
+
+
+def insert(conn, table, **values):
+    columns = ", ".join(values)
+    params = ", ".join(f":{name}" for name in values)
+    conn.execute(text(f"INSERT INTO {table} ({columns}) VALUES ({params})"), values)
+
+
+def index_names(engine, table):
+    return {index["name"] for index in inspect(engine).get_indexes(table)}
+
+
+def test_fresh_database_applies_every_migration_once(tmp_path, caplog):
+    engine = new_engine(tmp_path)
+    Base.metadata.create_all(bind=engine)
+
+    with caplog.at_level(logging.INFO, logger="backend.migrations"):
+        applied = run_migrations(engine)
+    assert applied == [version for version, _, _ in MIGRATIONS]
+    assert [r.getMessage() for r in caplog.records][0] == f"Applied migration 001 {MIGRATIONS[0][1]}"
+
+    assert run_migrations(engine) == []
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM schema_migrations")).scalar() == len(MIGRATIONS)
+
+
+def test_existing_database_is_deduplicated_and_indexed(tmp_path):
+    engine = legacy_engine(tmp_path)
+    with engine.begin() as conn:
+        insert(conn, "user_progress", id=1, user_id=1, book_id=1, module_id=1, is_unlocked=True,
+               completed_at="2025-01-02 00:00:00")
+        insert(conn, "user_progress", id=2, user_id=1, book_id=1, module_id=1, is_unlocked=False)
+        insert(conn, "user_errors", id=1, user_id=1, question_id="Q1", book_id=1, module_id=1,
+               error_count=2, last_error_at="2025-01-01 00:00:00", next_review_at="2025-01-05 00:00:00")
+        insert(conn, "user_errors", id=2, user_id=1, question_id="Q1", book_id=1, module_id=1,
+               error_count=3, last_error_at="2025-01-03 00:00:00", next_review_at="2025-01-04 00:00:00")
+
+    run_migrations(engine)
+
+    with engine.connect() as conn:
+        assert conn.execute(text(
+            "SELECT id, is_unlocked, completed_at FROM user_progress"
+        )).all() == [(2, 1, "2025-01-02 00:00:00")]
+        assert conn.execute(text(
+            "SELECT id, error_count, last_error_at, next_review_at FROM user_errors"
+        )).all() == [(2, 5, "2025-01-03 00:00:00", "2025-01-04 00:00:00")]
+
+    assert {"ix_user_errors_user_question", "ix_user_errors_user_next_review"} <= index_names(engine, "user_errors")
+    assert "ix_user_progress_user_book_module" in index_names(engine, "user_progress")
+    assert "ix_test_results_user_created" in index_names(engine, "test_results")
+
+
+def test_duplicate_progress_keeps_the_best_counts(tmp_path):
+    engine = legacy_engine(tmp_path)
+    with engine.begin() as conn:
+        insert(conn, "user_progress", id=1, user_id=1, book_id=1, module_id=2, is_unlocked=True,
+               questions_seen=50, questions_correct=40, mastery_percent=80.0)
+        insert(conn, "user_progress", id=2, user_id=1, book_id=1, module_id=2, is_unlocked=True,
+               questions_seen=10, questions_correct=4, mastery_percent=40.0)
+        insert(conn, "user_progress", id=3, user_id=1, book_id=1, module_id=3, is_unlocked=False,
+               questions_seen=5, questions_correct=3, mastery_percent=60.0)
+
+    run_migrations(engine)
+
+    with engine.connect() as conn:
+        assert conn.execute(text(
+            "SELECT id, questions_seen, questions_correct, mastery_percent FROM user_progress ORDER BY id"
+        )).all() == [(2, 50, 40, 80.0), (3, 5, 3, 60.0)]
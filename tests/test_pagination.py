@@ -0,0 +1,71 @@
+import base64
+import json
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+
+from backend.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+
+
+def raw_cursor(value):
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).rstrip(b"=").decode()
+
+
+def test_cursor_round_trip():
+    created = datetime(2026, 3, 1, 12, 30, 5, 123456)
+    assert decode_cursor(encode_cursor("history", created, 7), "history", datetime, int) == (created, 7)
+    assert decode_cursor(encode_cursor("glossary", "QM-T-001", 0), "glossary", str, int) == ("QM-T-001", 0)
+
+
+@pytest.mark.parametrize("cursor", [
+    "not base64!",
+    raw_cursor("glossary"),
+    raw_cursor(["errors", ["QM-T-001", 3]]),
+    raw_cursor(["glossary", ["QM-T-001"]]),
+    raw_cursor(["glossary", {"a": 1, "b": 2}]),
+    raw_cursor(["glossary", [["nope"], "x"]]),
+    raw_cursor(["glossary", ["nope", -50]]),
+    raw_cursor(["glossary", ["nope", True]]),
+    raw_cursor(["glossary", ["nope", 1.5]]),
+])
+def test_invalid_cursor_is_rejected(cursor):
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor(cursor, "glossary", str, int)
+    assert exc.value.status_code == 400
+
+
+def test_invalid_datetime_is_rejected():
+    for values in ([{"dt": 5}, 1], [{"dt": "yesterday"}, 1], ["2026-03-01", 1]):
+        with pytest.raises(HTTPException):
+            decode_cursor(raw_cursor(["history", values]), "history", datetime, int)
+
+
+def test_glossary_pages_follow_the_header(client):
+    first = client.get("/api/glossary", params={"limit": 100})
+    total = first.json()["total"]
+    terms = first.json()["terms"]
+    cursor = first.headers[NEXT_CURSOR_HEADER]
+    assert "next_cursor" not in first.json()
+
+    while cursor:
+        page = client.get("/api/glossary", params={"limit": 100, "cursor": cursor})
+        terms += page.json()["terms"]
+        cursor = page.headers.get(NEXT_CURSOR_HEADER)
+
+    everything = client.get("/api/glossary", params={"limit": 10000})
+    assert everything.status_code == 200
+    assert NEXT_CURSOR_HEADER not in everything.headers
+    assert len(terms) == total == len(everything.json()["terms"])
+    assert [t["term_id"] for t in terms] == [t["term_id"] for t in everything.json()["terms"]]
+
+
+@pytest.mark.parametrize("values", [[["nope"], "x"], ["nope", -50]])
+def test_glossary_rejects_malformed_cursor(client, values):
+    response = client.get("/api/glossary", params={"cursor": raw_cursor(["glossary", values])})
+    assert response.status_code == 400
+
+
+def test_history_and_errors_reject_malformed_cursor(client):
+    assert client.get("/api/tests/history", params={"cursor": raw_cursor(["history", [1, 2]])}).status_code == 400
+    assert client.get("/api/errors", params={"cursor": raw_cursor(["errors", ["a", 2]])}).status_code == 400
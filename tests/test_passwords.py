@@ -0,0 +1,69 @@
+import hashlib
+
+import pytest
+from sqlalchemy import text
+
+from backend import passwords
+from backend.database import engine
+from backend.passwords import (
+    LEGACY_ITERATIONS,
+    PBKDF2Hasher,
+    ScryptHasher,
+    hash_password,
+    needs_rehash,
+    verify_password,
+)
+
+from conftest import PASSWORD, register
+
+
+def legacy_hash(password, salt="0123abcd"):
+    result = password + salt
+    for _ in range(LEGACY_ITERATIONS):
+        result = hashlib.sha256(result.encode("utf-8")).hexdigest()
+    return f"{salt}${result}"
+
+
+@pytest.mark.parametrize("hasher", [PBKDF2Hasher(iterations=1000), ScryptHasher(n=2 ** 10)])
+def test_hashers_verify_their_own_hashes(hasher):
+    encoded = hasher.hash(PASSWORD)
+    assert encoded.startswith(hasher.algorithm + "$")
+    assert encoded != hasher.hash(PASSWORD)     # salted
+    assert verify_password(PASSWORD, encoded)
+    assert not verify_password("wrong", encoded)
+
+
+def test_configured_hash_needs_no_rehash():
+    encoded = hash_password(PASSWORD)
+    assert verify_password(PASSWORD, encoded)
+    assert not needs_rehash(encoded)
+
+
+def test_cheaper_or_foreign_hashes_need_rehash():
+    assert needs_rehash(PBKDF2Hasher(iterations=passwords.PBKDF2_ITERATIONS - 1).hash(PASSWORD))
+    assert needs_rehash(ScryptHasher(n=2 ** 10).hash(PASSWORD))
+    assert needs_rehash(legacy_hash(PASSWORD))
+
+
+@pytest.mark.parametrize("encoded", ["", "plain", "a$b$c", "pbkdf2_sha256$x$salt$hash", "unknown$1$salt$hash"])
+def test_malformed_hashes_never_verify(encoded):
+    assert not verify_password(PASSWORD, encoded)
+    assert needs_rehash(encoded)
+
+
+def test_legacy_hash_verifies_and_is_upgraded_on_login(app_client):
+    username = "legacy_user"
+    register(app_client, username)
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE users SET hashed_password = :h WHERE username = :u"),
+                     {"h": legacy_hash(PASSWORD), "u": username})
+
+    response = app_client.post("/api/auth/login/json", json={"username": username, "password": PASSWORD})
+    assert response.status_code == 200
+
+    with engine.connect() as conn:
+        stored = conn.execute(text("SELECT hashed_password FROM users WHERE username = :u"), {"u": username}).scalar()
+    assert stored.startswith(passwords.PASSWORD_HASHER + "$")
+    assert not needs_rehash(stored)
+    assert app_client.post("/api/auth/login/json", json={"username": username, "password": PASSWORD}).status_code == 200
+    assert app_client.post("/api/auth/login/json", json={"username": username, "password": "wrong"}).status_code == 401
@@ -0,0 +1,41 @@
+import copy
+
+from backend.content import get_catalog
+from backend.projections import FIELDS_DELIVERY, LANG_EN, LANG_RU, ContentProjector, get_projector
+
+
+QUESTION = {
+    "question_id": "Q1", "question_text": "What?", "question_text_ru": "Что?",
+    "options": [], "explanation": "Because", "explanation_ru": "Потому что",
+}
+
+
+def test_projections_are_reused_for_re_decoded_items():
+    projector = ContentProjector()
+    first = projector.question(QUESTION, FIELDS_DELIVERY, LANG_EN)
+    # Bundle mode hands out a new dict each time the record is decoded
+    assert projector.question(copy.deepcopy(QUESTION), FIELDS_DELIVERY, LANG_EN) is first
+    assert first["question_text"] == "What?" and "question_text_ru" not in first
+    assert "explanation" not in first
+
+
+def test_single_item_projections_are_bounded():
+    projector = ContentProjector(max_items=3)
+    for i in range(10):
+        projector.question({**QUESTION, "question_id": f"Q{i}"}, lang=LANG_RU)
+    assert len(projector._items) == 3
+    assert [key[1] for key in projector._items] == ["Q7", "Q8", "Q9"]
+
+
+def test_term_lists_are_kept_per_key():
+    projector = ContentProjector(max_items=1)
+    terms = [{"term_id": f"T{i}", "term_en": "a", "term_ru": "б"} for i in range(5)]
+    projected = projector.terms(("book", 1), terms, LANG_RU)
+    assert projector.terms(("book", 1), copy.deepcopy(terms), LANG_RU) is projected
+    assert [t["term_ru"] for t in projected] == ["б"] * 5 and "term_en" not in projected[0]
+
+
+def test_projector_belongs_to_the_content_version():
+    projector = get_projector()
+    assert projector.version == get_catalog().version
+    assert get_projector() is projector
@@ -0,0 +1,61 @@
+import json
+
+from sqlalchemy import text
+
+from backend.content import get_catalog, get_question_index
+from backend.migrations import run_migrations
+
+from test_migrations import insert, legacy_engine
+
+
+def test_attempts_are_stored_per_question(client, db_conn):
+    a, b = [q["question_id"] for q in client.get("/api/tests/module/1/1").json()[:2]]
+    response = client.post("/api/tests/submit", json={
+        "test_type": "module", "test_mode": "standard", "book_id": 1, "module_id": 1,
+        "time_spent_seconds": 30,
+        "question_details": [
+            {"question_id": a, "correct": False, "user_answer": "opt2", "time_spent": 12},
+            {"question_id": b, "correct": True},
+        ],
+    })
+    assert response.status_code == 200, response.text
+    result = response.json()
+    assert [q["question_id"] for q in result["question_details"]] == [a, b]
+
+    attempts = db_conn.execute(text(
+        "SELECT question_id, correct, user_answer, time_spent_seconds FROM question_attempts "
+        "WHERE test_result_id = :id ORDER BY id"
+    ), {"id": result["id"]}).all()
+    assert attempts == [(a, 0, "opt2", 12), (b, 1, None, None)]
+    stored = db_conn.execute(text("SELECT question_details FROM test_results WHERE id = :id"),
+                             {"id": result["id"]}).scalar()
+    assert stored is None
+
+
+def test_backfill_copies_question_details_once(tmp_path):
+    question_id = get_catalog().module_questions(1, 1)["questions"][0]["question_id"]
+    engine = legacy_engine(tmp_path)
+    details = [
+        {"question_id": question_id, "correct": False, "user_answer": "opt1", "time_spent": "40"},
+        {"question_id": "UNKNOWN-1", "correct": True, "time_spent": "n/a"},
+        {"correct": True},
+    ]
+    with engine.begin() as conn:
+        insert(conn, "test_results", id=1, user_id=1, test_type="module", test_mode="standard",
+               book_id=3, module_id=4, total_questions=3, correct_answers=2, score_percent=66.7, time_spent_seconds=60,
+               question_details=json.dumps(details), created_at="2025-01-01 00:00:00")
+
+    run_migrations(engine)
+    run_migrations(engine)
+
+    with engine.connect() as conn:
+        rows = conn.execute(text(
+            "SELECT question_id, book_id, module_id, user_answer, correct, time_spent_seconds "
+            "FROM question_attempts ORDER BY id"
+        )).all()
+    book_id, module_id = get_question_index().location(question_id)
+    assert rows == [
+        (question_id, book_id, module_id, "opt1", 0, 40),
+        ("UNKNOWN-1", 3, 4, None, 1, None),
+    ]
+
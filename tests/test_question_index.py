@@ -0,0 +1,66 @@
+import json
+import os
+
+from backend.bundle import ContentBundle, build_bundle
+from backend.content import BOOK_FOLDERS, DATA_ROOT, ContentCatalog, QuestionIndex, get_question_index
+
+LEGACY_ID = "QM-1-013"   # only in books/book1.json
+
+
+def first_v2_question():
+    index = get_question_index()
+    book = ContentCatalog().book(1)
+    question = book["learning_modules"][0]["questions"][0]
+    return index, question
+
+
+def test_v2_questions_resolve_with_location():
+    index, question = first_v2_question()
+    assert index.get(question["question_id"]) == question
+    assert index.location(question["question_id"])[0] == 1
+
+
+def test_get_many_omits_unknown_ids():
+    index, question = first_v2_question()
+    found = index.get_many([question["question_id"], "NO-SUCH-ID"])
+    assert list(found) == [question["question_id"]]
+
+
+def test_legacy_only_ids_still_resolve():
+    with open(os.path.join(DATA_ROOT, "books", "book1.json"), encoding="utf-8") as f:
+        legacy = json.load(f)
+    module = legacy["learning_modules"][0]
+    expected = next(q for q in module["questions"] if q["question_id"] == LEGACY_ID)
+
+    index = QuestionIndex.from_catalog(ContentCatalog())
+    assert index.get(LEGACY_ID) == expected
+    assert index.location(LEGACY_ID) == (1, module["module_id"])
+
+
+def test_bundle_index_resolves_v2_and_legacy_ids(tmp_path):
+    path = str(tmp_path / "content.bundle")
+    summary = build_bundle(DATA_ROOT, path, BOOK_FOLDERS)
+    assert summary["legacy_questions"] > 0
+
+    index, question = first_v2_question()
+    catalog = ContentCatalog(bundle_path=path)
+    try:
+        bundle_index = QuestionIndex.from_catalog(catalog)
+        assert bundle_index.get(question["question_id"]) == question
+        assert bundle_index.get(LEGACY_ID) == index.get(LEGACY_ID)
+        assert bundle_index.location(LEGACY_ID) == index.location(LEGACY_ID)
+    finally:
+        catalog.bundle.close()
+
+
+def test_review_resolves_legacy_error_records(client):
+    response = client.post("/api/tests/submit", json={
+        "test_type": "module", "test_mode": "standard", "book_id": 1, "module_id": 1,
+        "time_spent_seconds": 10,
+        "question_details": [{"question_id": LEGACY_ID, "correct": False, "user_answer": "opt1"}],
+    })
+    assert response.status_code == 200, response.text
+
+    review = client.get("/api/errors/review").json()
+    assert [q["question_id"] for q in review["questions"]] == [LEGACY_ID]
+    assert review["questions"][0]["question"]["question_id"] == LEGACY_ID
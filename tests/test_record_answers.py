@@ -0,0 +1,40 @@
+from sqlalchemy import text
+
+from backend.content import get_question_index
+
+
+def module_question_ids(client, count):
+    return [q["question_id"] for q in client.get("/api/tests/module/1/1").json()[:count]]
+
+
+def submit(client, answers):
+    response = client.post("/api/tests/submit", json={
+        "test_type": "module", "test_mode": "standard", "book_id": 1, "module_id": 1,
+        "time_spent_seconds": 30,
+        "question_details": [{"question_id": qid, "correct": correct} for qid, correct in answers],
+    })
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def errors_of(db_conn, user_id):
+    rows = db_conn.execute(text(
+        "SELECT question_id, error_count, book_id, module_id, last_correct_at IS NOT NULL AS reviewed "
+        "FROM user_errors WHERE user_id = :user_id ORDER BY question_id"
+    ), {"user_id": user_id}).all()
+    return {row.question_id: row for row in rows}
+
+
+def test_wrong_answers_create_errors_and_correct_ones_only_touch_existing(client, user_id, db_conn):
+    a, b, c = module_question_ids(client, 3)
+    submit(client, [(a, False), (b, True)])
+    errors = errors_of(db_conn, user_id)
+    assert list(errors) == [a]
+    assert (errors[a].error_count, errors[a].reviewed) == (1, 0)
+    assert (errors[a].book_id, errors[a].module_id) == get_question_index().location(a)
+
+    submit(client, [(a, False), (a, True), (c, False)])
+    errors = errors_of(db_conn, user_id)
+    assert sorted(errors) == sorted([a, c])
+    assert (errors[a].error_count, errors[a].reviewed) == (2, 1)
+
@@ -0,0 +1,158 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select, text
+
+from backend.database import Base
+from backend.migrations import run_migrations
+from backend.models import UserError
+from backend.scheduler import (
+    FIRST_INTERVALS,
+    INITIAL_EASE,
+    MIN_EASE,
+    QUALITY_CORRECT,
+    QUALITY_WRONG,
+    SRS_MAX_INTERVAL_DAYS,
+    apply_answer,
+    reschedule_errors,
+    review,
+)
+
+from test_migrations import insert, legacy_engine, new_engine
+
+
+def test_recalls_climb_the_first_intervals_then_multiply_by_ease():
+    state = (None, None, None)
+    intervals = []
+    for _ in range(4):
+        state = review(*state, 5)
+        intervals.append(state[2])
+    assert intervals[:2] == list(FIRST_INTERVALS)
+    assert intervals[2] == round(FIRST_INTERVALS[1] * 2.6)
+    assert state[0] == pytest.approx(INITIAL_EASE + 0.4)
+    assert state[1] == 4
+
+
+def test_lapse_restarts_and_lowers_the_ease():
+    ease, repetitions, interval = review(2.5, 4, 40, QUALITY_WRONG)
+    assert (repetitions, interval) == (0, FIRST_INTERVALS[0])
+    assert ease == pytest.approx(2.18)
+    assert review(MIN_EASE, 0, 1, 0)[0] == MIN_EASE
+
+
+def test_interval_is_capped():
+    assert review(2.5, 5, SRS_MAX_INTERVAL_DAYS, QUALITY_CORRECT)[2] == SRS_MAX_INTERVAL_DAYS
+
+
+def test_apply_answer_due_dates():
+    now = datetime(2026, 1, 1)
+    *_, interval, due = apply_answer(2.5, 2, 6, QUALITY_CORRECT, now)
+    assert due == now + timedelta(days=interval) and interval == 15
+    assert apply_answer(2.5, 2, 6, QUALITY_WRONG, now)[3] == now
+
+
+def test_wrong_answer_is_due_now_on_submit_and_on_review(client, db_conn, user_id):
+    a, b = [q["question_id"] for q in client.get("/api/tests/module/1/1").json()[:2]]
+    client.post("/api/tests/submit", json={
+        "test_type": "module", "test_mode": "standard", "book_id": 1, "module_id": 1,
+        "time_spent_seconds": 30,
+        "question_details": [{"question_id": a, "correct": False}, {"question_id": b, "correct": False}],
+    })
+    client.post("/api/errors/mark-reviewed", json={"question_id": b, "was_correct": True})
+    client.post("/api/errors/mark-reviewed", json={"question_id": b, "was_correct": False})
+
+    rows = db_conn.execute(text(
+        "SELECT question_id, next_review_at = last_error_at FROM user_errors WHERE user_id = :u ORDER BY question_id"
+    ), {"u": user_id}).all()
+    assert dict(rows) == {a: 1, b: 1}
+
+
+@pytest.fixture
+def scheduled(tmp_path):
+    """Database with three error records: lapsed (due), not yet due, and long-term."""
+    engine = new_engine(tmp_path)
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        for question_id, answered_days_ago, interval, due_in_days, ease in (
+            ("DUE", 1, 1, -1, 2.18),
+            ("LATER", 1, 6, 5, 2.5),
+            ("LONG", 3, 40, 37, 1.0),
+        ):
+            conn.execute(UserError.__table__.insert(), {
+                "user_id": 1, "question_id": question_id, "book_id": 1, "module_id": 1,
+                "last_error_at": now - timedelta(days=answered_days_ago),
+                "review_interval_days": interval, "ease_factor": ease, "repetitions": 2,
+                "next_review_at": now + timedelta(days=due_in_days),
+            })
+    yield engine, now
+
+
+def schedule_of(engine):
+    table = UserError.__table__
+    with engine.connect() as conn:
+        return {
+            row.question_id: row
+            for row in conn.execute(select(
+                table.c.question_id, table.c.review_interval_days, table.c.ease_factor,
+                table.c.next_review_at, table.c.last_error_at
+            ))
+        }
+
+
+def test_reschedule_without_changes_keeps_due_dates(scheduled):
+    engine, _ = scheduled
+    before = schedule_of(engine)
+    with engine.begin() as conn:
+        # Only the ease below MIN_EASE needs fixing
+        assert reschedule_errors(conn) == 1
+        assert reschedule_errors(conn) == 0
+    after = schedule_of(engine)
+    assert after["LONG"].ease_factor == MIN_EASE
+    assert {q: r.next_review_at for q, r in after.items()} == {q: r.next_review_at for q, r in before.items()}
+
+
+def test_reschedule_scale_moves_only_changed_intervals(scheduled):
+    engine, _ = scheduled
+    before = schedule_of(engine)
+    with engine.begin() as conn:
+        assert reschedule_errors(conn, scale=0.5, batch_size=2) == 2
+        stats = conn.execute(text("SELECT error_count, mastered_count FROM user_error_stats")).one()
+    after = schedule_of(engine)
+
+    assert {q: r.review_interval_days for q, r in after.items()} == {"DUE": 1, "LATER": 3, "LONG": 20}
+    assert after["DUE"].next_review_at == before["DUE"].next_review_at
+    assert after["LATER"].next_review_at == before["LATER"].last_error_at + timedelta(days=3)
+    assert after["LONG"].next_review_at == before["LONG"].last_error_at + timedelta(days=20)
+    assert tuple(stats) == (3, 0)
+
+
+def test_reschedule_never_delays_due_items(scheduled):
+    engine, now = scheduled
+    before = schedule_of(engine)
+    with engine.begin() as conn:
+        reschedule_errors(conn, scale=4)
+    after = schedule_of(engine)
+
+    # Last answer + 4 days is in the future, but the lapsed item stays due
+    assert after["DUE"].review_interval_days == 4
+    assert after["DUE"].next_review_at == before["DUE"].next_review_at <= now
+    assert after["LATER"].next_review_at == before["LATER"].last_error_at + timedelta(days=24)
+
+
+def test_migration_recovers_repetitions_from_the_old_ladder(tmp_path):
+    engine = legacy_engine(tmp_path)
+    with engine.begin() as conn:
+        for i, interval in enumerate((1, 3, 7, 14, 30, 60)):
+            insert(conn, "user_errors", user_id=1, question_id=f"Q{i}", book_id=1, module_id=1,
+                   error_count=1, review_interval_days=interval)
+
+    run_migrations(engine)
+
+    with engine.connect() as conn:
+        rows = conn.execute(text(
+            "SELECT review_interval_days, repetitions, ease_factor FROM user_errors ORDER BY review_interval_days"
+        )).all()
+    assert [(i, r) for i, r, _ in rows] == [(1, 0), (3, 1), (7, 2), (14, 3), (30, 4), (60, 5)]
+    assert {e for _, _, e in rows} == {INITIAL_EASE}
@@ -0,0 +1,47 @@
+import pytest
+
+from backend.static_assets import StaticAssets
+
+
+@pytest.mark.parametrize("path", ["/js/app.js", "/css/styles.css", "/data/v2/formulas_master.json"])
+def test_published_files_are_served_at_plain_paths(app_client, path):
+    response = app_client.get(path)
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"] == "no-cache"
+
+
+def test_entry_point_is_served(app_client):
+    response = app_client.get("/index.html")
+    assert response.status_code == 200
+    assert "/static/js/app." in response.text
+
+
+@pytest.mark.parametrize("path", [
+    "/data/books/book1.json",
+    "/data/qbank/book1_ch2_questions.json",
+    "/data/v2/../books/book1.json",
+    "/missing.js",
+])
+def test_unpublished_files_are_not_served(app_client, path):
+    assert app_client.get(path).status_code == 404
+
+
+def test_api_routes_win_over_the_fallback(app_client):
+    assert app_client.get("/health").json() == {"status": "healthy"}
+    assert app_client.get("/api/auth/me").status_code == 401
+
+
+def test_only_the_previous_generation_of_hashed_names_is_kept(tmp_path):
+    path = tmp_path / "app.js"
+    assets = StaticAssets(root=str(tmp_path), check_interval=0)
+
+    hashed = []
+    for version in range(3):
+        path.write_text(f"console.log({version});" + " " * version)
+        assets.refresh(force=True)
+        hashed.append(assets.current("app.js").hashed_name)
+
+    assert len(set(hashed)) == 3
+    assert assets.find(hashed[2]) is assets.current("app.js")
+    assert assets.find(hashed[1]) is not None
+    assert assets.find(hashed[0]) is None
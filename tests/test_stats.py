@@ -0,0 +1,87 @@
+from sqlalchemy import text
+
+from backend.migrations import run_migrations
+
+from test_migrations import insert, legacy_engine
+
+
+def recount(db_conn, user_id):
+    return db_conn.execute(text(
+        "SELECT book_id, COUNT(*), SUM(review_interval_days >= 30) FROM user_errors "
+        "WHERE user_id = :user_id GROUP BY book_id ORDER BY book_id"
+    ), {"user_id": user_id}).all()
+
+
+def counters(db_conn, user_id):
+    return db_conn.execute(text(
+        "SELECT book_id, error_count, mastered_count FROM user_error_stats "
+        "WHERE user_id = :user_id AND (error_count > 0 OR mastered_count > 0) ORDER BY book_id"
+    ), {"user_id": user_id}).all()
+
+
+def submit(client, book_id, module_id, answers):
+    response = client.post("/api/tests/submit", json={
+        "test_type": "module", "test_mode": "standard", "book_id": book_id, "module_id": module_id,
+        "time_spent_seconds": 30,
+        "question_details": [{"question_id": qid, "correct": correct} for qid, correct in answers],
+    })
+    assert response.status_code == 200, response.text
+
+
+def test_error_counters_follow_submit_review_and_delete(client, user_id, db_conn):
+    questions = [q["question_id"] for q in client.get("/api/tests/module/1/1").json()[:4]]
+    submit(client, 1, 1, [(qid, False) for qid in questions])
+    submit(client, 1, 2, [("LEGACY-X", False)])
+    assert counters(db_conn, user_id) == recount(db_conn, user_id) == [(1, 5, 0)]
+
+    # Enough successful reviews push the interval past the mastered threshold
+    for _ in range(5):
+        client.post("/api/errors/mark-reviewed", json={"question_id": questions[0], "was_correct": True})
+    client.post("/api/errors/mark-reviewed", json={"question_id": questions[1], "was_correct": False})
+    assert client.delete(f"/api/errors/{questions[2]}").status_code == 200
+    submit(client, 1, 1, [(questions[3], True)])
+
+    assert counters(db_conn, user_id) == recount(db_conn, user_id) == [(1, 4, 1)]
+
+    stats = client.get("/api/errors/stats").json()
+    assert (stats["total_errors"], stats["mastered"]) == (4, 1)
+    assert stats["by_book"] == {"1": {"count": 4}}
+    listed = [e["question_id"] for e in client.get("/api/errors", params={"book_id": 1}).json()]
+    assert sorted(listed) == sorted([questions[0], questions[1], questions[3], "LEGACY-X"])
+    assert stats["most_problematic"][0]["question_id"] == questions[1]
+
+
+def test_calculator_counters(client):
+    problem = client.get("/api/calculator/problems/TVM").json()["problems"][0]
+    answer = problem["correct_answer"]
+    for user_answer in (answer, answer + abs(answer) * 10 + 1000.0, answer):
+        response = client.post("/api/calculator/check", json={
+            "problem_id": problem["problem_id"], "user_answer": user_answer, "time_spent_seconds": 5
+        })
+        assert response.status_code == 200
+
+    stats = client.get("/api/calculator/stats").json()
+    assert (stats["total_attempts"], stats["total_correct"]) == (3, 2)
+    assert stats["by_worksheet_type"][problem["worksheet"]]["attempts"] == 3
+    assert len(stats["recent_sessions"]) == 3
+
+
+def test_migration_fills_counters_from_existing_rows(tmp_path):
+    engine = legacy_engine(tmp_path)
+    with engine.begin() as conn:
+        for i, interval in enumerate((1, 30, 60)):
+            insert(conn, "user_errors", user_id=1, question_id=f"Q{i}", book_id=2, module_id=1,
+                   error_count=1, review_interval_days=interval)
+        for correct in (True, False):
+            insert(conn, "calculator_sessions", user_id=1, worksheet_type="TVM", problem_id="P",
+                   is_correct=correct, time_spent_seconds=1)
+
+    run_migrations(engine)
+
+    with engine.connect() as conn:
+        assert conn.execute(text(
+            "SELECT user_id, book_id, error_count, mastered_count FROM user_error_stats"
+        )).all() == [(1, 2, 3, 2)]
+        assert conn.execute(text(
+            "SELECT user_id, worksheet_type, attempts, correct FROM user_calculator_stats"
+        )).all() == [(1, "TVM", 2, 1)]